@@ -0,0 +1,13 @@
+from django.contrib import admin
+from .models import LocationRollup
+
+
+@admin.register(LocationRollup)
+class LocationRollupAdmin(admin.ModelAdmin):
+    list_display = (
+        "location_key", "period", "period_start", "count",
+        "mean_price", "median_price", "mean_distress_score", "updated_at",
+    )
+    list_filter = ("period",)
+    search_fields = ("location_key",)
+    date_hierarchy = "period_start"
@@ -0,0 +1,14 @@
+import time
+from django.core.management.base import BaseCommand
+from analytics.rollups import refresh_medians
+
+
+class Command(BaseCommand):
+    help = "Recompute the rollup medians cleared by writes since the last run"
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        refreshed = refresh_medians()
+        self.stdout.write(self.style.SUCCESS(
+            f"Refreshed {refreshed} rollup medians in {time.perf_counter() - started:.2f}s."
+        ))
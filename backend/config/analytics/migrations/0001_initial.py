@@ -0,0 +1,43 @@
+# Generated by Django 6.0 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+from analytics.rollups import rebuild_rollups
+
+
+def seed_rollups(apps, schema_editor):
+    rebuild_rollups(
+        apps.get_model('listings', 'Property'),
+        apps.get_model('analytics', 'LocationRollup'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('listings', '0009_property_favorite_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LocationRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('location_key', models.CharField(max_length=255)),
+                ('period', models.CharField(choices=[('day', 'Day'), ('week', 'Week')], max_length=4)),
+                ('period_start', models.DateField()),
+                ('count', models.IntegerField(default=0)),
+                ('price_sum', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('score_sum', models.FloatField(default=0.0)),
+                ('median_price', models.FloatField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['period', 'period_start'], name='rollup_period_start_idx')],
+                'constraints': [models.UniqueConstraint(fields=('period', 'location_key', 'period_start'), name='unique_rollup_bucket')],
+            },
+        ),
+        migrations.RunPython(seed_rollups, migrations.RunPython.noop),
+    ]
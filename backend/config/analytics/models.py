@@ -0,0 +1,48 @@
+from django.db import models
+
+
+class LocationRollup(models.Model):
+    """
+    Listing statistics per normalized location and day / week, bucketed
+    by ``Property.created_at`` in the current time zone.
+
+    Sums are kept up to date incrementally by ``analytics.rollups``;
+    ``median_price`` is null until recomputed after a write.
+    """
+    PERIOD_CHOICES = [
+        ("day", "Day"),
+        ("week", "Week"),
+    ]
+
+    location_key = models.CharField(max_length=255)
+    period = models.CharField(max_length=4, choices=PERIOD_CHOICES)
+    period_start = models.DateField()
+
+    count = models.IntegerField(default=0)
+    price_sum = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    score_sum = models.FloatField(default=0.0)
+    median_price = models.FloatField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["period", "location_key", "period_start"],
+                name="unique_rollup_bucket",
+            ),
+        ]
+        indexes = [
+            # heatmap: every location over a time range
+            models.Index(fields=["period", "period_start"], name="rollup_period_start_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.location_key} {self.period} {self.period_start}: {self.count} listings"
+
+    @property
+    def mean_price(self):
+        return float(self.price_sum / self.count) if self.count else 0.0
+
+    @property
+    def mean_distress_score(self):
+        return self.score_sum / self.count if self.count else 0.0
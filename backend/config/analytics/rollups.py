@@ -0,0 +1,237 @@
+"""
+Location / time rollups behind the analytics API.
+
+A bucket is ``(period, location_key, period_start)`` and stores the
+listing count, price sum and distress score sum; means are derived from
+those sums. Writes apply ``(count, price_sum, score_sum)`` deltas to the
+buckets they touch with a single ``INSERT ... ON CONFLICT DO UPDATE``,
+which adds to the stored values atomically, so a bulk import costs one
+statement per chunk however many buckets it touches.
+
+Medians cannot be maintained from deltas, so a write clears the median
+of every bucket it touches and ``refresh_medians`` recomputes pending
+ones; the ``refresh_rollup_medians`` command runs it (schedule it every
+few minutes), so API reads never write. ``rebuild_rollups`` recomputes
+everything from ``Property``.
+"""
+import statistics
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+PERIODS = ("day", "week")
+
+
+def align(day, period):
+    """First day of the day / week (Monday) containing date ``day``."""
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def period_start(value, period):
+    """First day of the bucket containing the aware datetime ``value``."""
+    return align(timezone.localtime(value).date(), period)
+
+
+def period_bounds(start, period):
+    """Aware datetimes ``[begin, end)`` covered by the bucket starting at ``start``."""
+    tz = timezone.get_current_timezone()
+    begin = timezone.make_aware(datetime.combine(start, time.min), tz)
+    end = timezone.make_aware(
+        datetime.combine(start + timedelta(days=7 if period == "week" else 1), time.min), tz
+    )
+    return begin, end
+
+
+def buckets_for(location_key, created_at):
+    return {(period, location_key, period_start(created_at, period)) for period in PERIODS}
+
+
+def _bucket_listings(bucket):
+    from listings.models import Property  # ✅ lazy import
+
+    period, location_key, start = bucket
+    begin, end = period_bounds(start, period)
+    return Property.objects.filter(
+        location_key=location_key, created_at__gte=begin, created_at__lt=end
+    ).order_by()
+
+
+# =========================
+# INCREMENTAL UPDATES
+# =========================
+
+def new_deltas():
+    return defaultdict(lambda: (0, Decimal(0), 0.0))
+
+
+def add_listing(deltas, location_key, created_at, price, score, sign=1):
+    """Accumulate one listing (``sign=-1`` to remove it) into ``deltas``."""
+    for bucket in buckets_for(location_key, created_at):
+        count, price_sum, score_sum = deltas[bucket]
+        deltas[bucket] = (
+            count + sign,
+            price_sum + sign * Decimal(str(price)),
+            score_sum + sign * (score or 0.0),
+        )
+
+
+def apply_deltas(deltas):
+    """
+    Add ``{bucket: (count, price_sum, score_sum)}`` to the rollup table
+    in one statement and mark the touched medians for recomputation.
+    """
+    from .models import LocationRollup  # ✅ lazy import
+
+    ops = connection.ops
+    now = ops.adapt_datetimefield_value(timezone.now())
+    rows = [
+        (
+            period,
+            location_key,
+            ops.adapt_datefield_value(start),
+            count,
+            ops.adapt_decimalfield_value(price_sum, 20, 2),
+            score_sum,
+            now,
+        )
+        for (period, location_key, start), (count, price_sum, score_sum) in deltas.items()
+        if count or price_sum or score_sum
+    ]
+    if not rows:
+        return
+
+    table = connection.ops.quote_name(LocationRollup._meta.db_table)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(
+            f"""
+            INSERT INTO {table}
+                (period, location_key, period_start, count, price_sum, score_sum, updated_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (period, location_key, period_start) DO UPDATE SET
+                count = {table}.count + excluded.count,
+                price_sum = {table}.price_sum + excluded.price_sum,
+                score_sum = {table}.score_sum + excluded.score_sum,
+                median_price = NULL,
+                updated_at = excluded.updated_at
+            """,
+            rows,
+        )
+        # Buckets whose last listing was removed
+        for (period, location_key, start), (count, _, _) in deltas.items():
+            if count < 0:
+                LocationRollup.objects.filter(
+                    period=period, location_key=location_key, period_start=start, count__lte=0
+                ).delete()
+
+
+def recompute_buckets(buckets):
+    """Recompute sums for ``buckets`` from ``Property`` (when deltas are unknown)."""
+    from .models import LocationRollup  # ✅ lazy import
+
+    with transaction.atomic():
+        for bucket in buckets:
+            period, location_key, start = bucket
+            totals = _bucket_listings(bucket).aggregate(
+                count=Count("id"), price_sum=Sum("price"), score_sum=Sum("distress_score")
+            )
+            if not totals["count"]:
+                LocationRollup.objects.filter(
+                    period=period, location_key=location_key, period_start=start
+                ).delete()
+                continue
+            LocationRollup.objects.update_or_create(
+                period=period,
+                location_key=location_key,
+                period_start=start,
+                defaults={**totals, "median_price": None},
+            )
+
+
+def recompute_for_pks(pks):
+    """Recompute every bucket the given listings fall in."""
+    from listings.models import Property  # ✅ lazy import
+
+    buckets = set()
+    rows = Property.objects.filter(pk__in=pks).values_list("location_key", "created_at")
+    for location_key, created_at in rows.iterator(chunk_size=2000):
+        buckets |= buckets_for(location_key, created_at)
+    recompute_buckets(buckets)
+
+
+def refresh_medians(rollups=None):
+    """
+    Fill in ``median_price`` for the rollups in ``rollups`` (default: all)
+    whose median is pending; returns how many were refreshed.
+    """
+    from .models import LocationRollup  # ✅ lazy import
+
+    if rollups is None:
+        rollups = LocationRollup.objects.all()
+    refreshed = 0
+    for rollup in rollups.filter(median_price__isnull=True).iterator(chunk_size=1000):
+        bucket = (rollup.period, rollup.location_key, rollup.period_start)
+        # The middle one (odd count) or two (even count) prices
+        middle = (rollup.count - 1) // 2
+        prices = list(
+            _bucket_listings(bucket)
+            .order_by("price")
+            .values_list("price", flat=True)[middle:middle + 2 - rollup.count % 2]
+        )
+        if prices:
+            rollup.median_price = float(sum(prices) / len(prices))
+            rollup.save(update_fields=["median_price"])
+            refreshed += 1
+    return refreshed
+
+
+# =========================
+# FULL REBUILD
+# =========================
+
+def rebuild_rollups(property_model=None, rollup_model=None, chunk_size=10000):
+    """
+    Rebuild the whole rollup table, medians included, in one pass over
+    ``Property``. Migrations pass their historical models; returns the
+    bucket count.
+    """
+    if property_model is None:
+        from listings.models import Property as property_model  # ✅ lazy import
+    if rollup_model is None:
+        from .models import LocationRollup as rollup_model  # ✅ lazy import
+
+    values = defaultdict(lambda: ([], []))
+    rows = (
+        property_model.objects
+        .order_by()
+        .values_list("location_key", "created_at", "price", "distress_score")
+        .iterator(chunk_size=chunk_size)
+    )
+    for location_key, created_at, price, score in rows:
+        for bucket in buckets_for(location_key, created_at):
+            prices, scores = values[bucket]
+            prices.append(price)
+            scores.append(score)
+
+    with transaction.atomic():
+        rollup_model.objects.all().delete()
+        rollup_model.objects.bulk_create(
+            [
+                rollup_model(
+                    period=period,
+                    location_key=location_key,
+                    period_start=start,
+                    count=len(prices),
+                    price_sum=sum(prices),
+                    score_sum=sum(scores),
+                    median_price=float(statistics.median(prices)),
+                )
+                for (period, location_key, start), (prices, scores) in values.items()
+            ],
+            batch_size=1000,
+        )
+    return len(values)
@@ -0,0 +1,66 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from listings.models import Property
+from listings.signals import properties_bulk_created, properties_bulk_updated
+
+from .rollups import add_listing, apply_deltas, new_deltas, recompute_for_pks
+
+ROLLUP_FIELDS = {"location", "location_key", "price", "distress_score", "created_at"}
+
+
+def _affects_rollups(fields):
+    return fields is None or bool(ROLLUP_FIELDS & set(fields))
+
+
+@receiver(pre_save, sender=Property)
+def remember_rollup_values(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or instance.pk is None or not _affects_rollups(update_fields):
+        return
+    if getattr(instance, "_loaded_rollup_values", None) is None:
+        # Not loaded from the database with these fields (built with a pk,
+        # or loaded with .only()): read what the row holds before this save
+        instance._loaded_rollup_values = (
+            Property.objects
+            .filter(pk=instance.pk)
+            .values_list("location_key", "created_at", "price", "distress_score")
+            .first()
+        )
+
+
+@receiver(post_save, sender=Property)
+def update_rollups_on_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or not _affects_rollups(update_fields):
+        return
+    deltas = new_deltas()
+    previous = None if created else getattr(instance, "_loaded_rollup_values", None)
+    if previous:
+        add_listing(deltas, *previous, sign=-1)
+    current = instance.rollup_values()
+    add_listing(deltas, *current)
+    apply_deltas(deltas)
+    instance._loaded_rollup_values = current
+
+
+@receiver(post_delete, sender=Property)
+def update_rollups_on_delete(sender, instance, **kwargs):
+    deltas = new_deltas()
+    values = getattr(instance, "_loaded_rollup_values", None) or instance.rollup_values()
+    add_listing(deltas, *values, sign=-1)
+    apply_deltas(deltas)
+
+
+@receiver(properties_bulk_created, sender=Property)
+def update_rollups_on_bulk_create(sender, instances, **kwargs):
+    deltas = new_deltas()
+    for instance in instances:
+        instance._loaded_rollup_values = instance.rollup_values()
+        add_listing(deltas, *instance._loaded_rollup_values)
+    apply_deltas(deltas)
+
+
+@receiver(properties_bulk_updated, sender=Property)
+def update_rollups_on_bulk_update(sender, instances, fields, **kwargs):
+    # The previous values are already overwritten, so recount the buckets
+    if _affects_rollups(fields):
+        recompute_for_pks([instance.pk for instance in instances])
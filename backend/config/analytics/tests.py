@@ -0,0 +1,131 @@
+import io
+from datetime import timedelta
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from listings.models import Property
+from listings.utils import process_csv
+from .models import LocationRollup
+from .rollups import rebuild_rollups, refresh_medians
+
+
+class RollupTests(TestCase):
+    def rollup(self, location_key, period="day"):
+        refresh_medians(LocationRollup.objects.all())
+        return LocationRollup.objects.get(period=period, location_key=location_key)
+
+    def snapshot(self):
+        refresh_medians(LocationRollup.objects.all())
+        return sorted(
+            LocationRollup.objects.values_list(
+                "period", "location_key", "period_start", "count", "price_sum",
+                "score_sum", "median_price",
+            )
+        )
+
+    def test_writes_update_buckets(self):
+        first = Property.objects.create(title="A", description="", location="Nairobi", price=100, distress_score=2)
+        Property.objects.create(title="B", description="", location="Nairobi", price=300, distress_score=4)
+        Property.objects.create(title="C", description="", location="Nairobi", price=500, distress_score=6)
+
+        nairobi = self.rollup("nairobi")
+        self.assertEqual((nairobi.count, nairobi.mean_price, nairobi.median_price), (3, 300.0, 300.0))
+        self.assertEqual(self.rollup("nairobi", "week").mean_distress_score, 4.0)
+
+        first.location = "Mombasa"
+        first.save()
+        self.assertIsNone(LocationRollup.objects.get(period="day", location_key="nairobi").median_price)
+        self.assertEqual(self.rollup("nairobi").median_price, 400.0)
+        self.assertEqual(self.rollup("mombasa").count, 1)
+
+        first.delete()
+        self.assertFalse(LocationRollup.objects.filter(location_key="mombasa").exists())
+
+    def test_saves_reuse_the_loaded_values(self):
+        Property.objects.create(title="A", description="", location="Nairobi", price=100, distress_score=2)
+        previous_values = '"listings_property"."distress_score" FROM "listings_property"'
+
+        loaded = Property.objects.get()
+        loaded.price = 200
+        with CaptureQueriesContext(connection) as queries:
+            loaded.save()
+        self.assertFalse([q for q in queries if previous_values in q["sql"]])
+
+        # Built without loading: the previous values are read instead
+        unloaded = Property.objects.only("id", "title", "description", "location", "price").get()
+        unloaded.location = "Mombasa"
+        unloaded.save()
+        self.assertFalse(LocationRollup.objects.filter(location_key="nairobi").exists())
+        self.assertEqual((self.rollup("mombasa").count, self.rollup("mombasa").mean_price), (1, 200.0))
+
+        stored = Property.objects.get()
+        Property(
+            pk=stored.pk, title="A", description="", location="Mombasa", price=300,
+            distress_score=2, created_at=stored.created_at,
+        ).save()
+        self.assertEqual((self.rollup("mombasa").count, self.rollup("mombasa").mean_price), (1, 300.0))
+
+    def test_bulk_import_matches_rebuild(self):
+        process_csv(io.BytesIO(
+            b"title,description,location,price\n"
+            b"A,must sell,Nairobi,100\nB,,Kisumu,200\nC,urgent,nairobi,400\n"
+        ))
+        incremental = self.snapshot()
+        self.assertEqual(len(incremental), 4)
+
+        rebuild_rollups()
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_rescore_recounts_score_sums(self):
+        Property.objects.create(title="A", description="", location="Nairobi", price=100, distress_score=0)
+        Property.objects.filter(title="A").update(description="must sell urgent")
+        call_command("rescore_properties", stdout=io.StringIO())
+        self.assertEqual(self.rollup("nairobi").score_sum, Property.objects.get().distress_score)
+
+
+class AnalyticsAPITests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i, (location, price) in enumerate([("Nairobi", 100), ("Nairobi", 300), ("Mombasa", 1000)]):
+            Property.objects.create(title=f"L{i}", description="", location=location, price=price)
+        # Move one listing into last week and rebuild
+        Property.objects.filter(title="L1").update(created_at=timezone.now() - timedelta(days=7))
+        rebuild_rollups()
+
+    def test_heatmap(self):
+        # Cells only: reads never refresh medians
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/analytics/heatmap/", {"period": "day"})
+        self.assertEqual(response.status_code, 200)
+        cells = response.json()["cells"]
+        self.assertEqual(
+            [(c["location_key"], c["count"]) for c in cells],
+            [("mombasa", 1), ("nairobi", 1), ("nairobi", 1)],
+        )
+
+    def test_trends_for_one_location_and_whole_market(self):
+        series = self.client.get("/api/analytics/trends/", {"location": "Nairobi"}).json()["series"]
+        self.assertEqual([row["mean_price"] for row in series], [300.0, 100.0])
+
+        market = self.client.get("/api/analytics/trends/").json()["series"]
+        self.assertEqual([row["count"] for row in market], [1, 2])
+        self.assertEqual(market[-1]["mean_price"], 550.0)
+        self.assertIsNone(market[-1]["median_price"])
+
+    def test_pending_medians_wait_for_the_command(self):
+        Property.objects.create(title="L3", description="", location="Mombasa", price=3000)
+        cell = self.client.get("/api/analytics/heatmap/", {"period": "day", "location": "mombasa"}).json()["cells"][0]
+        self.assertIsNone(cell["median_price"])
+
+        call_command("refresh_rollup_medians", stdout=io.StringIO())
+        cell = self.client.get("/api/analytics/heatmap/", {"period": "day", "location": "mombasa"}).json()["cells"][0]
+        self.assertEqual(cell["median_price"], 2000.0)
+
+    def test_rejects_bad_params(self):
+        response = self.client.get("/api/analytics/trends/", {"period": "year"})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get("/api/analytics/heatmap/", {"start": "2026-02-01", "end": "2026-01-01"})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,7 @@
+from django.urls import path
+from .views import HeatmapView, TrendsView
+
+urlpatterns = [
+    path('heatmap/', HeatmapView.as_view(), name='analytics-heatmap'),
+    path('trends/', TrendsView.as_view(), name='analytics-trends'),
+]
@@ -0,0 +1,127 @@
+from datetime import timedelta
+from django.db.models import Sum
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from listings.models import normalize_location
+from .models import LocationRollup
+from .rollups import align
+
+
+class RollupQuerySerializer(serializers.Serializer):
+    period = serializers.ChoiceField(choices=["day", "week"], default="week")
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    location = serializers.CharField(required=False, allow_blank=True)
+
+    # Default window when ``start`` is omitted
+    DEFAULT_SPAN = {"day": timedelta(days=30), "week": timedelta(weeks=12)}
+
+    def validate(self, attrs):
+        period = attrs["period"]
+        attrs["end"] = attrs.get("end") or timezone.localdate()
+        attrs["start"] = attrs.get("start") or attrs["end"] - self.DEFAULT_SPAN[period]
+        if attrs["start"] > attrs["end"]:
+            raise serializers.ValidationError("start must not be after end.")
+        # Align to bucket boundaries so partial first weeks are included
+        attrs["start"] = align(attrs["start"], period)
+        attrs["locations"] = [
+            key for key in (normalize_location(loc) for loc in attrs.pop("location", "").split(",")) if key
+        ]
+        return attrs
+
+
+class RollupView(APIView):
+    """
+    Read-only views of ``LocationRollup``. ``median_price`` is null for
+    buckets written since the last ``refresh_rollup_medians`` run.
+    """
+    permission_classes = [AllowAny]
+
+    def get_params(self, request):
+        params = RollupQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return params.validated_data
+
+    def get_rollups(self, params):
+        rollups = LocationRollup.objects.filter(
+            period=params["period"],
+            period_start__gte=params["start"],
+            period_start__lte=params["end"],
+        )
+        if params["locations"]:
+            rollups = rollups.filter(location_key__in=params["locations"])
+        return rollups
+
+    def serialize(self, rollup, *fields):
+        return {
+            **{field: getattr(rollup, field) for field in fields},
+            "count": rollup.count,
+            "mean_price": rollup.mean_price,
+            "median_price": rollup.median_price,
+            "mean_distress_score": rollup.mean_distress_score,
+        }
+
+
+class HeatmapView(RollupView):
+    """
+    One cell per location and day / week:
+    ``?period=week&start=2026-01-01&end=2026-03-31&location=nairobi,mombasa``.
+    """
+
+    def get(self, request, format=None):
+        params = self.get_params(request)
+        rollups = self.get_rollups(params)
+        return Response({
+            "period": params["period"],
+            "start": params["start"],
+            "end": params["end"],
+            "cells": [
+                self.serialize(rollup, "location_key", "period_start")
+                for rollup in rollups.order_by("location_key", "period_start")
+            ],
+        })
+
+
+class TrendsView(RollupView):
+    """
+    Time series per day / week for the given locations, or for the whole
+    market when no location is given. Medians only exist per location,
+    so ``median_price`` is null when several locations are combined.
+    """
+
+    def get(self, request, format=None):
+        params = self.get_params(request)
+        rollups = self.get_rollups(params)
+
+        if len(params["locations"]) == 1:
+            series = [
+                self.serialize(rollup, "period_start")
+                for rollup in rollups.order_by("period_start")
+            ]
+        else:
+            series = []
+            totals = (
+                rollups.order_by("period_start")
+                .values("period_start")
+                .annotate(total=Sum("count"), prices=Sum("price_sum"), scores=Sum("score_sum"))
+            )
+            for row in totals:
+                series.append({
+                    "period_start": row["period_start"],
+                    "count": row["total"],
+                    "mean_price": float(row["prices"] / row["total"]),
+                    "median_price": None,
+                    "mean_distress_score": row["scores"] / row["total"],
+                })
+
+        return Response({
+            "period": params["period"],
+            "start": params["start"],
+            "end": params["end"],
+            "locations": params["locations"],
+            "series": series,
+        })
@@ -0,0 +1,96 @@
+"""
+Keyword matcher micro-benchmark.
+
+Compares the compiled automaton with a naive ``phrase in text`` loop for
+dictionaries of 10, 1k and 10k phrases. Run from backend/config:
+
+    python -m benchmarks.bench_keywords
+"""
+import argparse
+import json
+import random
+import time
+
+from listings.keywords import KeywordMatcher
+
+WORDS = [
+    "urgent", "sale", "must", "sell", "auction", "bank", "repossessed", "owner",
+    "relocating", "quick", "distress", "reduced", "price", "plot", "title",
+    "deed", "haraka", "inauzwa", "mnada", "bei", "nafuu", "shamba", "nyumba",
+    "bungalow", "maisonette", "apartment", "acre", "ready", "cash", "buyer",
+]
+
+
+def make_keywords(size, rng):
+    keywords = {}
+    while len(keywords) < size:
+        phrase = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))
+        keywords[f"{phrase} {len(keywords)}" if phrase in keywords else phrase] = rng.randint(1, 3)
+    return keywords
+
+
+def make_descriptions(count, rng):
+    return [
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 60))).capitalize()
+        for _ in range(count)
+    ]
+
+
+def naive_score(keywords, text):
+    text = text.lower()
+    return sum(weight for keyword, weight in keywords.items() if keyword in text)
+
+
+def timed(func, descriptions):
+    started = time.perf_counter()
+    for text in descriptions:
+        func(text)
+    elapsed = time.perf_counter() - started
+    return round(len(descriptions) / elapsed, 1)
+
+
+def run(sizes, documents, seed):
+    rng = random.Random(seed)
+    descriptions = make_descriptions(documents, rng)
+    results = []
+
+    for size in sizes:
+        keywords = make_keywords(size, rng)
+
+        started = time.perf_counter()
+        matcher = KeywordMatcher(keywords, scan_limit=0)
+        compile_seconds = time.perf_counter() - started
+
+        results.append({
+            "keywords": size,
+            "compile_seconds": round(compile_seconds, 4),
+            "automaton_docs_per_sec": timed(matcher.score, descriptions),
+            "naive_docs_per_sec": timed(lambda text: naive_score(keywords, text), descriptions),
+        })
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.documents, args.seed)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'keywords':>9} {'compile s':>10} {'automaton docs/s':>17} {'naive docs/s':>13}")
+    for row in results:
+        print(
+            f"{row['keywords']:>9} {row['compile_seconds']:>10} "
+            f"{row['automaton_docs_per_sec']:>17} {row['naive_docs_per_sec']:>13}"
+        )
+
+
+if __name__ == "__main__":
+    main()
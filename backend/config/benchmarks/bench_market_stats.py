@@ -0,0 +1,114 @@
+"""
+Market statistics benchmark.
+
+Times ``listings.market.compute_market_stats`` (one grouped NumPy pass)
+against a per-location ``statistics`` loop on synthetic listings with a
+few mis-keyed outliers, 1M rows over 5k locations by default. Run from
+backend/config:
+
+    python -m benchmarks.bench_market_stats --rows 1000000 --locations 5000
+"""
+import argparse
+import json
+import statistics
+import time
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from listings.market import compute_market_stats
+
+AS_OF = pd.Timestamp("2026-06-01", tz="UTC")
+
+
+def make_frame(rows, locations, seed):
+    rng = np.random.default_rng(seed)
+    keys = np.array([f"location {i}" for i in range(locations)], dtype=object)
+    # Zipf-like location sizes, log-normal prices and 0.1% fat-finger prices
+    weights = 1 / np.arange(1, locations + 1) ** 0.8
+    location = rng.choice(locations, size=rows, p=weights / weights.sum())
+    price = np.round(rng.lognormal(15, 0.6, size=rows), 2)
+    outliers = rng.random(rows) < 0.001
+    price[outliers] *= 1e5
+    age = pd.to_timedelta(rng.integers(0, 365 * 24 * 3600, size=rows), unit="s")
+    return pd.DataFrame({"location_key": keys[location], "price": price, "created_at": AS_OF - age})
+
+
+def naive_stats(frame, trim, window_days):
+    since = AS_OF - pd.Timedelta(days=window_days)
+    prices, recent = defaultdict(list), defaultdict(list)
+    for key, price, created_at in frame.itertuples(index=False):
+        prices[key].append(price)
+        if created_at >= since:
+            recent[key].append(price)
+
+    results = {}
+    for key, values in prices.items():
+        values.sort()
+        cut = int(len(values) * trim)
+        results[key] = (
+            statistics.median(values),
+            statistics.fmean(values[cut:len(values) - cut]),
+            statistics.median(recent[key]) if recent[key] else None,
+        )
+    return results
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def run(rows, locations, seed, trim, window_days, naive):
+    frame = make_frame(rows, locations, seed)
+    stats, engine_seconds = timed(
+        lambda: compute_market_stats(frame, as_of=AS_OF, trim=trim, window_days=window_days)
+    )
+    result = {
+        "rows": rows,
+        "locations": int(frame["location_key"].nunique()),
+        "engine_seconds": round(engine_seconds, 4),
+        "engine_rows_per_sec": round(rows / engine_seconds, 1),
+        # How far the plain mean drifts from the median because of the outliers
+        "median_mean_ratio": round(float(
+            (frame.groupby("location_key")["price"].mean() / stats["median_price"]).median()
+        ), 3),
+    }
+
+    if naive:
+        expected, naive_seconds = timed(naive_stats, frame, trim, window_days)
+        actual = stats[["median_price", "trimmed_mean_price"]]
+        result["naive_seconds"] = round(naive_seconds, 4)
+        result["speedup"] = round(naive_seconds / engine_seconds, 1)
+        result["max_relative_error"] = float(max(
+            abs(actual.at[key, "median_price"] - median) / median
+            + abs(actual.at[key, "trimmed_mean_price"] - trimmed) / trimmed
+            for key, (median, trimmed, _) in expected.items()
+        ))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--locations", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--trim", type=float, default=0.1)
+    parser.add_argument("--window-days", type=int, default=90)
+    parser.add_argument("--no-naive", action="store_true", help="Skip the per-location loop")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    result = run(args.rows, args.locations, args.seed, args.trim, args.window_days, not args.no_naive)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    for name, value in result.items():
+        print(f"{name:>22} {value}")
+
+
+if __name__ == "__main__":
+    main()
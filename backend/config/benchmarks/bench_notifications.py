@@ -0,0 +1,81 @@
+"""
+Notification transport benchmark against the local provider stub.
+
+Sends in-memory notifications through the SendGrid and Twilio backends
+(pointed at ``benchmarks.provider_stub``) and reports messages/sec. Run
+from backend/config:
+
+    python -m benchmarks.bench_notifications --messages 20000
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+from notifications.backends import SendGridEmailBackend, TwilioSMSBackend  # noqa: E402
+from notifications.models import Notification  # noqa: E402
+
+from .provider_stub import start_stub  # noqa: E402
+
+
+def make_notifications(channel, count):
+    return [
+        Notification(
+            notification_type=channel,
+            recipient=f"investor{i}@example.com" if channel == "email" else f"+2547{i:08d}",
+            subject="Distress Property Alert: Bungalow in Karen",
+            message="<p>A property is flagged as distressed.</p>",
+        )
+        for i in range(count)
+    ]
+
+
+def run_channel(backend, notifications, send_size, workers):
+    chunks = [notifications[i:i + send_size] for i in range(0, len(notifications), send_size)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        errors = [e for result in pool.map(backend.send_messages, chunks) for e in result if e]
+    elapsed = time.perf_counter() - started
+    return {
+        "messages": len(notifications),
+        "errors": len(errors),
+        "seconds": round(elapsed, 3),
+        "messages_per_sec": round(len(notifications) / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=10000)
+    parser.add_argument("--sms-messages", type=int, default=1000)
+    parser.add_argument("--send-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.0, help="Stub response latency in seconds")
+    args = parser.parse_args()
+
+    server = start_stub(latency=args.latency)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    email = SendGridEmailBackend(api_key="stub", base_url=base_url, pool_size=args.workers)
+    sms = TwilioSMSBackend(
+        account_sid="ACstub", auth_token="stub", from_number="+254700000000",
+        base_url=base_url, pool_size=args.workers,
+    )
+
+    results = {
+        "email": run_channel(email, make_notifications("email", args.messages), args.send_size, args.workers),
+        "sms": run_channel(sms, make_notifications("sms", args.sms_messages), 50, args.workers),
+        "stub_requests": server.requests,
+    }
+    server.shutdown()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
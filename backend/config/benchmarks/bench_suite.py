@@ -0,0 +1,363 @@
+"""
+End-to-end benchmark suite over seeded synthetic listings.
+
+Runs each scenario against a throwaway test database (never the
+configured one), filled through the ingestion paths themselves:
+
+    scoring           calculate_distress_score vs score_batch
+    process_csv       CSV upload import
+    import_properties the import_properties command
+    api               list / filter / ordering / search latency, cold and warm cache
+    notify            notify_users fan-out to matching alert rules
+    dedupe            near-duplicate re-clustering of the table and per-listing lookup
+
+Results, with the commit, seed and row count they came from, are
+written as JSON; ``--compare`` lines two result files up. Run from
+backend/config:
+
+    python -m benchmarks.bench_suite --rows 100000 --output after.json
+    python -m benchmarks.bench_suite --compare before.json after.json
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+os.environ.setdefault("PERF_LOG_LEVEL", "WARNING")
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+from django.test.utils import CaptureQueriesContext, setup_test_environment  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from listings.cache import get_cache  # noqa: E402
+from listings.dedupe import band_keys, find_duplicates, listing_text, rebuild_index, signatures  # noqa: E402
+from listings.models import AlertRule, AlertRuleLocation, NotificationPreference, Property  # noqa: E402
+from listings.utils import _chunked, calculate_distress_score, notify_users, process_csv, score_batch  # noqa: E402
+from notifications.models import Notification  # noqa: E402
+
+from .generator import LOCATIONS, generate_listings, write_csv  # noqa: E402
+
+SCENARIOS = ["scoring", "process_csv", "import_properties", "api", "notify", "dedupe"]
+
+API_ENDPOINTS = {
+    "list": {},
+    "filter_location": {"location": "Kilimani"},
+    "order_price": {"ordering": "-price"},
+    "search": {"search": "auction"},
+    "search_location": {"search": "must sell", "location": "Karen"},
+}
+
+
+def rate(count, seconds):
+    return round(count / seconds, 1) if seconds else 0.0
+
+
+def latency_summary(samples):
+    samples = sorted(samples)
+    if len(samples) < 2:
+        return {"mean_ms": round(samples[0], 3) if samples else 0.0}
+    cuts = statistics.quantiles(samples, n=20, method="inclusive")
+    return {
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "p50_ms": round(cuts[9], 3),
+        "p95_ms": round(cuts[18], 3),
+        "max_ms": round(samples[-1], 3),
+    }
+
+
+@contextmanager
+def test_database(path):
+    """A fresh database for the run, dropped afterwards."""
+    connection.settings_dict.setdefault("TEST", {})["NAME"] = path
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+@contextmanager
+def listings_file(rows, seed, start, style, duplicate_rate=0.0):
+    """Temporary CSV of synthetic listings, written as a stream."""
+    with tempfile.NamedTemporaryFile("w", suffix=".csv", newline="", encoding="utf-8", delete=False) as f:
+        write_csv(f, generate_listings(rows, seed, start, duplicate_rate=duplicate_rate), style)
+    try:
+        yield Path(f.name)
+    finally:
+        os.unlink(f.name)
+
+
+# =========================
+# SCENARIOS
+# =========================
+
+def bench_scoring(options):
+    medians = {name: float(median) for name, median, _ in LOCATIONS}
+    scalar_seconds = batch_seconds = 0.0
+    rows = 0
+
+    for chunk in _chunked(generate_listings(options.score_rows, options.seed), 10000):
+        prices = [row["price"] for row in chunk]
+        descriptions = [row["description"] for row in chunk]
+        averages = [medians[row["location"]] for row in chunk]
+
+        started = time.perf_counter()
+        for price, description, average in zip(prices, descriptions, averages):
+            calculate_distress_score(price, description, average)
+        scalar_seconds += time.perf_counter() - started
+
+        started = time.perf_counter()
+        score_batch(prices, descriptions, averages)
+        batch_seconds += time.perf_counter() - started
+        rows += len(chunk)
+
+    return {
+        "rows": rows,
+        "scalar_seconds": round(scalar_seconds, 4),
+        "scalar_rows_per_sec": rate(rows, scalar_seconds),
+        "batch_seconds": round(batch_seconds, 4),
+        "batch_rows_per_sec": rate(rows, batch_seconds),
+    }
+
+
+def bench_process_csv(options):
+    with listings_file(options.rows, options.seed, 0, "upload", options.duplicate_rate) as path, open(path, "rb") as f:
+        stats = process_csv(f)
+    return {
+        "rows": options.rows,
+        "created": stats["created"],
+        "seconds": stats["elapsed"],
+        "rows_per_sec": stats["rows_per_sec"],
+        "timings": stats["timings"],
+    }
+
+
+def bench_import_properties(options):
+    before = Property.objects.count()
+    # Numbered after the process_csv rows so nothing is a duplicate
+    with listings_file(options.rows, options.seed + 1, options.rows, "import") as path:
+        started = time.perf_counter()
+        call_command(
+            "import_properties", file=str(path), workers=options.workers,
+            stdout=io.StringIO(), stderr=io.StringIO(),
+        )
+        seconds = time.perf_counter() - started
+    imported = Property.objects.count() - before
+    return {
+        "rows": options.rows,
+        "imported": imported,
+        "workers": options.workers,
+        "seconds": round(seconds, 4),
+        "rows_per_sec": rate(imported, seconds),
+    }
+
+
+def bench_api(options):
+    client = APIClient()
+    results = {"listings": Property.objects.count()}
+
+    for name, params in API_ENDPOINTS.items():
+        for mode in ("cold", "warm"):
+            latencies, queries = [], 0
+            for _ in range(options.requests):
+                if mode == "cold":
+                    get_cache().clear()
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    response = client.get("/api/api/properties/", params)
+                    latencies.append((time.perf_counter() - started) * 1000)
+                assert response.status_code == 200, (name, response.status_code)
+                queries += len(captured)
+            results[f"{name}_{mode}"] = {
+                **latency_summary(latencies),
+                "queries_per_request": round(queries / options.requests, 2),
+            }
+
+    # Deep keyset pages: follow ``next`` ten times
+    get_cache().clear()
+    url, started = "/api/api/properties/?ordering=-price", time.perf_counter()
+    for _ in range(10):
+        url = client.get(url).json()["next"]
+    results["page_10_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    return results
+
+
+def bench_notify(options):
+    rng = random.Random(options.seed)
+    User = get_user_model()
+    users = User.objects.bulk_create([
+        User(username=f"bench-investor-{i}", email=f"investor{i}@example.com") for i in range(options.users)
+    ])
+    NotificationPreference.objects.bulk_create([
+        NotificationPreference(user=user, email_alert=True, sms_alert=i % 4 == 0, phone_number=f"+2547{i:08d}")
+        for i, user in enumerate(users)
+    ])
+    rules = AlertRule.objects.bulk_create([
+        AlertRule(user=user, min_distress_score=rng.choice([2, 3, 5]), any_location=i % 3 == 0)
+        for i, user in enumerate(users)
+    ])
+    locations = [name.lower() for name, _, _ in LOCATIONS]
+    AlertRuleLocation.objects.bulk_create([
+        AlertRuleLocation(rule=rule, location_key=key)
+        for rule in rules if not rule.any_location
+        for key in rng.sample(locations, 3)
+    ])
+
+    properties = list(Property.objects.filter(distress_score__gte=3).order_by("pk")[:options.alerts])
+    before = Notification.objects.count()
+    latencies = []
+    for property_obj in properties:
+        started = time.perf_counter()
+        notify_users(property_obj)
+        latencies.append((time.perf_counter() - started) * 1000)
+    queued = Notification.objects.count() - before
+    seconds = sum(latencies) / 1000
+    return {
+        "users": options.users,
+        "alerts": len(properties),
+        "notifications_queued": queued,
+        "notifications_per_sec": rate(queued, seconds),
+        **latency_summary(latencies),
+    }
+
+
+def bench_dedupe(options):
+    listings = Property.objects.count()
+    flagged = Property.objects.filter(duplicate_of__isnull=False).count()
+
+    started = time.perf_counter()
+    with transaction.atomic():
+        clusters = rebuild_index()
+    seconds = time.perf_counter() - started
+
+    # Single-listing check, as done before each save()
+    rng = random.Random(options.seed)
+    pks = list(Property.objects.values_list("pk", flat=True))
+    sample = Property.objects.filter(pk__in=rng.sample(pks, min(options.requests * 10, len(pks))))
+    latencies = []
+    for obj in sample:
+        started_lookup = time.perf_counter()
+        sigs = signatures([listing_text(obj.title, obj.description)])
+        find_duplicates([(None, obj.location_key, float(obj.price), sigs[0])], band_keys(sigs))
+        latencies.append((time.perf_counter() - started_lookup) * 1000)
+
+    return {
+        "listings": listings,
+        "flagged_on_ingest": flagged,
+        "rebuild_duplicates": len(clusters),
+        "rebuild_seconds": round(seconds, 4),
+        "rebuild_rows_per_sec": rate(listings, seconds),
+        "lookup": latency_summary(latencies),
+    }
+
+
+BENCHMARKS = {
+    "scoring": bench_scoring,
+    "process_csv": bench_process_csv,
+    "import_properties": bench_import_properties,
+    "api": bench_api,
+    "notify": bench_notify,
+    "dedupe": bench_dedupe,
+}
+
+
+# =========================
+# RESULTS
+# =========================
+
+def metadata(options):
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+        "platform": platform.platform(),
+        "rows": options.rows,
+        "seed": options.seed,
+    }
+
+
+def flatten(results, prefix=""):
+    for key, value in results.items():
+        if isinstance(value, dict):
+            yield from flatten(value, f"{prefix}{key}.")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield f"{prefix}{key}", value
+
+
+def compare(before_path, after_path):
+    before = dict(flatten(json.loads(Path(before_path).read_text())["scenarios"]))
+    after = dict(flatten(json.loads(Path(after_path).read_text())["scenarios"]))
+    print(f"{'metric':<48} {'before':>14} {'after':>14} {'after/before':>13}")
+    for key in sorted(set(before) & set(after)):
+        ratio = f"{after[key] / before[key]:.3f}" if before[key] else "-"
+        print(f"{key:<48} {before[key]:>14} {after[key]:>14} {ratio:>13}")
+
+
+def run(options):
+    results = {"meta": metadata(options), "scenarios": {}}
+    setup_test_environment()
+    database = options.database or os.path.join(tempfile.mkdtemp(prefix="bench-"), "bench.sqlite3")
+
+    with test_database(database):
+        for name in options.scenarios:
+            print(f"running {name}...", file=sys.stderr)
+            started = time.perf_counter()
+            results["scenarios"][name] = BENCHMARKS[name](options)
+            results["scenarios"][name]["wall_seconds"] = round(time.perf_counter() - started, 4)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10000, help="Listings per ingestion scenario")
+    parser.add_argument("--score-rows", type=int, help="Listings scored (default: --rows)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--workers", type=int, default=1, help="import_properties parse workers")
+    parser.add_argument("--duplicate-rate", type=float, default=0.0, help="Share of re-listed process_csv rows")
+    parser.add_argument("--requests", type=int, default=20, help="Requests per API endpoint and mode")
+    parser.add_argument("--users", type=int, default=1000, help="Alert subscribers for notify")
+    parser.add_argument("--alerts", type=int, default=50, help="Listings passed to notify_users")
+    parser.add_argument("--database", help="Test database name (default: a temporary SQLite file)")
+    parser.add_argument("--output", default="-", help="JSON results file, or - for stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="Compare two result files")
+    options = parser.parse_args()
+
+    if options.compare:
+        compare(*options.compare)
+        return
+
+    options.score_rows = options.score_rows or options.rows
+    results = json.dumps(run(options), indent=2)
+    if options.output == "-":
+        print(results)
+    else:
+        Path(options.output).write_text(results + "\n")
+
+
+if __name__ == "__main__":
+    main()
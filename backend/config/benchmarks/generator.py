@@ -0,0 +1,172 @@
+"""
+Seeded synthetic Kenyan property listings.
+
+``generate_listings`` yields realistic rows: neighbourhoods and towns with
+their own KES price levels, property types, English and Swahili distress
+phrases on about a fifth of the listings (priced below market), a few
+fat-finger prices and, optionally, the same property re-listed by another
+source with reworded text (near-duplicates). The same seed always yields the same rows, and rows
+are produced lazily, so 10M-row files can be written without holding
+them in memory. Write a CSV from backend/config:
+
+    python -m benchmarks.generator --rows 1000000 --output /tmp/listings.csv.gz
+"""
+import argparse
+import csv
+import gzip
+import io
+import random
+import sys
+from collections import deque
+
+# (location, median price in KES for the reference type, weight)
+LOCATIONS = [
+    ("Karen", 65_000_000, 4), ("Runda", 90_000_000, 2), ("Lavington", 55_000_000, 4),
+    ("Westlands", 28_000_000, 8), ("Kilimani", 18_000_000, 10), ("Kileleshwa", 20_000_000, 6),
+    ("Parklands", 15_000_000, 5), ("South B", 9_000_000, 5), ("Embakasi", 6_000_000, 8),
+    ("Kasarani", 7_000_000, 7), ("Ruaka", 8_500_000, 7), ("Syokimau", 9_500_000, 6),
+    ("Kitengela", 5_500_000, 8), ("Ngong", 6_500_000, 6), ("Rongai", 5_000_000, 7),
+    ("Juja", 4_500_000, 5), ("Thika", 5_000_000, 6), ("Kiambu", 9_000_000, 5),
+    ("Ruiru", 6_000_000, 6), ("Athi River", 5_000_000, 4), ("Nyali", 30_000_000, 4),
+    ("Bamburi", 12_000_000, 3), ("Diani", 25_000_000, 3), ("Malindi", 14_000_000, 3),
+    ("Kilifi", 9_000_000, 3), ("Kisumu", 7_500_000, 5), ("Nakuru", 7_000_000, 6),
+    ("Naivasha", 8_000_000, 4), ("Eldoret", 6_500_000, 5), ("Nanyuki", 9_000_000, 3),
+    ("Nyeri", 6_000_000, 3), ("Meru", 5_500_000, 3), ("Machakos", 4_500_000, 4),
+    ("Kajiado", 3_500_000, 3), ("Kakamega", 4_000_000, 3), ("Kericho", 4_500_000, 2),
+    ("Embu", 4_000_000, 2), ("Kisii", 4_500_000, 2), ("Voi", 3_000_000, 1),
+    ("Garissa", 3_000_000, 1),
+]
+
+# (title template, price multiplier)
+PROPERTY_TYPES = [
+    ("1/8 acre plot", 0.35), ("1/4 acre plot", 0.6), ("2 acre shamba", 0.9),
+    ("bedsitter", 0.15), ("1 bedroom apartment", 0.3), ("2 bedroom apartment", 0.5),
+    ("3 bedroom apartment", 0.75), ("3 bedroom maisonette", 1.0), ("4 bedroom townhouse", 1.3),
+    ("4 bedroom bungalow", 1.2), ("5 bedroom villa", 2.2), ("commercial block", 3.5),
+    ("godown", 1.6), ("rental flats", 2.8),
+]
+
+DISTRESS_PHRASES = [
+    "urgent", "must sell", "auction", "distress", "quick sale", "price reduced",
+    "bank auction", "owner relocating", "inauzwa haraka", "mnada", "bei nafuu",
+    "below market value", "cash buyers only", "repossessed",
+]
+
+NEUTRAL_PHRASES = [
+    "title deed ready", "near tarmac road", "borehole on site", "gated community",
+    "mature garden", "DSQ", "ample parking", "close to schools", "water and electricity connected",
+    "10 minutes to the CBD", "ocean view", "controlled development", "freehold",
+    "backup generator", "servant quarters", "spacious living room",
+]
+
+UPLOAD_FIELDS = ["title", "description", "location", "price"]
+IMPORT_FIELDS = ["Title", "Location", "Price (KES)", "Distress Score"]
+
+# Property.price is DECIMAL(12, 2)
+MAX_PRICE = 9_999_999_999
+
+
+def relisted(rng, original):
+    """The same property re-listed by another source: tagged title, re-cased copy, nudged price."""
+    return {
+        **original,
+        "title": f"{original['title']} (relisted)",
+        "description": original["description"].replace(". ", ", ", 1).upper(),
+        "price": int(round(original["price"] * rng.uniform(0.97, 1.03), -4)),
+    }
+
+
+def generate_listings(count, seed=7, start=0, distress_rate=0.2, outlier_rate=0.001, duplicate_rate=0.0):
+    """
+    Yield ``count`` listing dicts (title, description, location, price,
+    distress_score). Titles are numbered from ``start`` so batches with
+    different starts never collide on (title, location). A
+    ``duplicate_rate`` share of rows re-list one of the recent rows.
+    """
+    rng = random.Random(seed)
+    names = [name for name, _, _ in LOCATIONS]
+    medians = {name: median for name, median, _ in LOCATIONS}
+    weights = [weight for _, _, weight in LOCATIONS]
+    recent = deque(maxlen=1000)
+
+    for i in range(start, start + count):
+        if recent and duplicate_rate and rng.random() < duplicate_rate:
+            yield relisted(rng, rng.choice(recent))
+            continue
+
+        location = rng.choices(names, weights)[0]
+        kind, multiplier = rng.choice(PROPERTY_TYPES)
+        distressed = rng.random() < distress_rate
+
+        price = medians[location] * multiplier * rng.lognormvariate(0, 0.35)
+        phrases = rng.sample(NEUTRAL_PHRASES, rng.randint(1, 3))
+        score = 0
+        if distressed:
+            price *= rng.uniform(0.55, 0.9)
+            phrases += rng.sample(DISTRESS_PHRASES, rng.randint(1, 3))
+            score = rng.randint(3, 10)
+        if rng.random() < outlier_rate:
+            # Extra zeros typed by mistake
+            price *= 1000
+        rng.shuffle(phrases)
+        details = ", ".join(phrases)
+        # Land reference number, unique per property
+        parcel = f"LR No. {rng.randint(1, 29999)}/{rng.randint(1, 9999)}"
+
+        listing = {
+            "title": f"{kind.capitalize()} in {location} #{i}",
+            "description": f"{kind.capitalize()} for sale in {location}. {details[0].upper()}{details[1:]}. {parcel}.",
+            "location": location,
+            "price": min(max(int(round(price, -4)), 100_000), MAX_PRICE),
+            "distress_score": score,
+        }
+        recent.append(listing)
+        yield listing
+
+
+def write_csv(stream, listings, style="upload"):
+    """
+    Write listings as CSV text to ``stream``. ``"upload"`` matches the
+    CSV upload API (title, description, location, price); ``"import"``
+    matches the import_properties command's messy headers.
+    """
+    writer = csv.writer(stream)
+    if style == "import":
+        writer.writerow(IMPORT_FIELDS)
+        for row in listings:
+            writer.writerow([row["title"], row["location"], f"{row['price']:,}", row["distress_score"]])
+    else:
+        writer.writerow(UPLOAD_FIELDS)
+        for row in listings:
+            writer.writerow([row["title"], row["description"], row["location"], row["price"]])
+
+
+def csv_bytes(count, seed=7, start=0, style="upload", duplicate_rate=0.0):
+    """An in-memory CSV file of ``count`` listings."""
+    text = io.StringIO()
+    write_csv(text, generate_listings(count, seed, start, duplicate_rate=duplicate_rate), style)
+    return io.BytesIO(text.getvalue().encode())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--start", type=int, default=0, help="First title number")
+    parser.add_argument("--style", choices=["upload", "import"], default="upload")
+    parser.add_argument("--duplicate-rate", type=float, default=0.0, help="Share of re-listed rows")
+    parser.add_argument("--output", default="-", help="File path (.gz to compress) or - for stdout")
+    args = parser.parse_args()
+
+    listings = generate_listings(args.rows, args.seed, args.start, duplicate_rate=args.duplicate_rate)
+    if args.output == "-":
+        write_csv(sys.stdout, listings, args.style)
+        return
+
+    opener = gzip.open if args.output.endswith(".gz") else open
+    with opener(args.output, "wt", newline="", encoding="utf-8") as f:
+        write_csv(f, listings, args.style)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Load test of the listings read API under uvicorn, WSGI vs ASGI.
+
+Holds ``--connections`` concurrent keep-alive connections (aiohttp) for
+``--duration`` seconds. Half the requests are list pages (varied
+ordering and page size, so mostly response-cache hits) and half are
+detail reads of random listings (mostly misses that reach the ORM). It
+reports throughput, latency percentiles and errors. ``--compare`` serves
+the project with uvicorn twice, once as WSGI (``--interface wsgi``) and
+once as ASGI, and prints the two side by side. Needs uvicorn and
+aiohttp. Run from backend/config against a seeded database:
+
+    python -m benchmarks.load_test --compare --connections 1000 --duration 30
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --connections 1000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import Counter
+
+import aiohttp
+
+LIST_PATH = "/api/api/properties/"
+ORDERINGS = ["-created_at", "-distress_score", "price", "-price"]
+
+INTERFACES = {
+    "wsgi": ("config.wsgi:application", "wsgi"),
+    "asgi": ("config.asgi:application", "asgi3"),
+}
+
+
+def raise_file_limit():
+    # One descriptor per connection, on both ends when the server is local
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def newest_id(base_url):
+    with urllib.request.urlopen(f"{base_url}{LIST_PATH}?page_size=1&fields=id", timeout=30) as response:
+        results = json.loads(response.read())["results"]
+    return results[0]["id"] if results else 1
+
+
+def request_paths(max_id, count, seed):
+    rng = random.Random(seed)
+    paths = []
+    for _ in range(count):
+        if rng.random() < 0.5:
+            paths.append(f"{LIST_PATH}?ordering={rng.choice(ORDERINGS)}&page_size={rng.randint(10, 60)}")
+        else:
+            paths.append(f"{LIST_PATH}{rng.randint(1, max_id)}/")
+    return paths
+
+
+async def worker(session, base_url, paths, deadline, latencies, statuses, errors):
+    i = random.randrange(len(paths))
+    while time.perf_counter() < deadline:
+        i = (i + 1) % len(paths)
+        started = time.perf_counter()
+        try:
+            async with session.get(base_url + paths[i]) as response:
+                await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+            errors[type(exc).__name__] += 1
+            continue
+        latencies.append((time.perf_counter() - started) * 1000)
+        statuses[response.status] += 1
+
+
+async def run_load(base_url, connections, duration, timeout, seed=7):
+    paths = request_paths(newest_id(base_url), 10000, seed)
+    latencies, statuses, errors = [], Counter(), Counter()
+
+    connector = aiohttp.TCPConnector(limit=connections)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout) as session:
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(
+            worker(session, base_url, paths, deadline, latencies, statuses, errors)
+            for _ in range(connections)
+        ))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else [0.0] * 99
+    return {
+        "connections": connections,
+        "requests": len(latencies),
+        "requests_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(cuts[49], 1),
+        "p95_ms": round(cuts[94], 1),
+        "p99_ms": round(cuts[98], 1),
+        "max_ms": round(latencies[-1], 1) if latencies else 0.0,
+        "non_2xx": sum(n for status, n in statuses.items() if not 200 <= status < 300),
+        "errors": dict(errors),
+    }
+
+
+def start_server(interface, port, workers):
+    app, flag = INTERFACES[interface]
+    command = [
+        sys.executable, "-m", "uvicorn", app,
+        "--interface", flag,
+        "--port", str(port),
+        "--workers", str(workers),
+        "--backlog", "4096",
+        "--no-access-log",
+        "--log-level", "warning",
+    ]
+    env = {**os.environ, "PERF_LOG_LEVEL": "WARNING"}
+    server = subprocess.Popen(command, env=env)
+
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(300):
+        try:
+            newest_id(base_url)
+            return server, base_url
+        except OSError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError(f"uvicorn ({interface}) did not start on port {port}")
+
+
+def serve_and_load(interface, args):
+    server, base_url = start_server(interface, args.port, args.workers)
+    try:
+        # Warm imports, connections and the response cache
+        asyncio.run(run_load(base_url, min(args.connections, 50), 2, args.timeout))
+        return asyncio.run(run_load(base_url, args.connections, args.duration, args.timeout))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def print_table(results):
+    names = list(results)
+    print(f"{'':<18}" + "".join(f"{name.upper():>14}" for name in names))
+    for metric in ["requests_per_sec", "p50_ms", "p95_ms", "p99_ms", "max_ms", "non_2xx"]:
+        print(f"{metric:<18}" + "".join(f"{results[name][metric]:>14}" for name in names))
+    print(f"{'errors':<18}" + "".join(f"{sum(results[name]['errors'].values()):>14}" for name in names))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", help="Load an already running server instead of starting uvicorn")
+    parser.add_argument("--compare", action="store_true", help="Run WSGI then ASGI under uvicorn")
+    parser.add_argument("--interface", choices=list(INTERFACES), default="asgi")
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of load per server")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--output", help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    raise_file_limit()
+    if args.url:
+        results = {"server": asyncio.run(run_load(args.url.rstrip("/"), args.connections, args.duration, args.timeout))}
+    else:
+        interfaces = list(INTERFACES) if args.compare else [args.interface]
+        results = {interface: serve_and_load(interface, args) for interface in interfaces}
+
+    print_table(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Local stand-in for the SendGrid and Twilio HTTP APIs.
+
+Accepts ``POST /v3/mail/send`` and ``POST /2010-04-01/Accounts/<sid>/Messages.json``
+and counts messages, so the notification transport can be benchmarked
+offline. Run from backend/config:
+
+    python -m benchmarks.provider_stub --port 8025
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        if self.path == "/v3/mail/send":
+            messages = len(json.loads(body)["personalizations"])
+            status = 202
+        elif self.path.endswith("/Messages.json"):
+            messages = 1
+            status = 201
+        else:
+            messages, status = 0, 404
+
+        with self.server.lock:
+            self.server.requests += 1
+            self.server.messages += messages
+
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub(port=0, latency=0.0):
+    """Start the stub on a background thread and return the server."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.messages = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    args = parser.parse_args()
+
+    server = start_stub(args.port, args.latency)
+    print(f"Provider stub listening on http://127.0.0.1:{server.server_port}")
+    try:
+        while True:
+            time.sleep(5)
+            print(f"{server.requests} requests, {server.messages} messages")
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
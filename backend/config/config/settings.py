@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 from datetime import timedelta
 
@@ -34,6 +35,7 @@ INSTALLED_APPS = [
     'listings',
     'users',
     'notifications',
+    'analytics',
     'core',
 ]
 
@@ -41,6 +43,7 @@ INSTALLED_APPS = [
 # MIDDLEWARE
 # ------------------------------------------------------------------
 MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -118,6 +121,166 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': (
         'django_filters.rest_framework.DjangoFilterBackend',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.TimedJSONRenderer',
+        'core.renderers.TimedBrowsableAPIRenderer',
+    ),
 }
 
+# ------------------------------------------------------------------
+# CACHES
+# ------------------------------------------------------------------
+# Local memory by default; set REDIS_URL to share the cache (and the
+# listings cache generation) between processes.
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'distress-property-detector',
+        }
+    }
+
+# ------------------------------------------------------------------
+# LISTINGS
+# ------------------------------------------------------------------
+# Rows per bulk_create batch when ingesting CSV uploads.
+LISTINGS_CSV_BATCH_SIZE = 1000
+
+# Uploads are imported by the process_csv_imports worker; a running job
+# whose worker has been silent this long is resumed by another worker.
+LISTINGS_CSV_IMPORT_LEASE_SECONDS = 300
+
+# Distress keyword dictionary: None (built-in), "db" (DistressKeyword
+# table) or a path to a JSON / CSV (keyword,weight) file.
+DISTRESS_KEYWORDS_SOURCE = None
+DISTRESS_KEYWORDS_WORD_BOUNDARY = False
+DISTRESS_KEYWORDS_RELOAD_SECONDS = 30
+
+# Full-text search backend for property listings. None picks one from the
+# database vendor (SQLite FTS5, PostgreSQL tsvector); see listings.search.
+LISTINGS_SEARCH_BACKEND = None
+
+# Reference price for price-deviation scoring: "mean", "median",
+# "trimmed_mean" or "recent_median" (see listings.market). Robust
+# figures are refreshed by the rebuild_market_stats command.
+LISTINGS_MARKET_PRICE_STRATEGY = 'mean'
+LISTINGS_MARKET_TRIM = 0.1
+LISTINGS_MARKET_WINDOW_DAYS = 90
+LISTINGS_MARKET_CACHE_TIMEOUT = 300
+
+# Near-duplicate listings (listings.dedupe): "flag" marks them with
+# duplicate_of, "merge" also skips them in bulk imports, "off" disables it
+# (run dedupe_properties after turning it back on).
+LISTINGS_DEDUPE_MODE = 'flag'
+# Minimum estimated Jaccard similarity of title + description 5-grams
+LISTINGS_DEDUPE_THRESHOLD = 0.8
+# Maximum relative price difference between duplicates (None: any price)
+LISTINGS_DEDUPE_PRICE_TOLERANCE = 0.1
+
+# Cached property API responses; any property write invalidates them.
+LISTINGS_CACHE_ALIAS = 'default'
+LISTINGS_CACHE_TIMEOUT = 300
+# Rendered rows of the HTML property list; keys change with each edit.
+LISTINGS_FRAGMENT_CACHE_TIMEOUT = 3600
+
+# Live listing stream (listings.stream): "memory" fans writes out within
+# one process, "redis" shares them between processes over pub/sub (needs
+# redis-py; opt in when running several ASGI processes).
+LISTINGS_STREAM_BROKER = os.getenv('LISTINGS_STREAM_BROKER', 'memory')
+LISTINGS_STREAM_REDIS_URL = os.getenv('LISTINGS_STREAM_REDIS_URL', os.getenv('REDIS_URL'))
+# Seconds between keep-alive comments on an idle stream
+LISTINGS_STREAM_HEARTBEAT = 15
+# Messages queued per client before it starts losing them
+LISTINGS_STREAM_QUEUE_SIZE = 100
+# Open streams per process
+LISTINGS_STREAM_MAX_CLIENTS = 1000
+
+# Property change feed (listings.changes): entries per page by default and
+# at most, and days tombstones are kept (older sync tokens get a 410).
+LISTINGS_CHANGES_PAGE_SIZE = 500
+LISTINGS_CHANGES_MAX_PAGE_SIZE = 5000
+LISTINGS_CHANGES_TOMBSTONE_DAYS = 30
+
+# ------------------------------------------------------------------
+# NOTIFICATIONS
+# ------------------------------------------------------------------
+# Delivery backend per channel, used by the send_notifications worker.
+# notifications.backends.FakeBackend simulates a provider offline.
+# Provider backends keep a pooled HTTP session per endpoint; `rate` caps
+# requests per second and `base_url` can point at a local stub server.
+NOTIFICATION_BACKENDS = {
+    'email': {
+        'BACKEND': (
+            'notifications.backends.SendGridEmailBackend'
+            if os.getenv('SENDGRID_API_KEY')
+            else 'notifications.backends.ConsoleBackend'
+        ),
+        'OPTIONS': {
+            'base_url': os.getenv('SENDGRID_API_URL', 'https://api.sendgrid.com'),
+            'rate': float(os.getenv('SENDGRID_RATE_LIMIT', '10')),
+        },
+    },
+    'sms': {
+        'BACKEND': (
+            'notifications.backends.TwilioSMSBackend'
+            if os.getenv('TWILIO_SID')
+            else 'notifications.backends.ConsoleBackend'
+        ),
+        'OPTIONS': {
+            'base_url': os.getenv('TWILIO_API_URL', 'https://api.twilio.com'),
+            'rate': float(os.getenv('TWILIO_RATE_LIMIT', '1')),
+        },
+    },
+}
+NOTIFICATION_MAX_ATTEMPTS = 5
+NOTIFICATION_RETRY_BASE_SECONDS = 30
+NOTIFICATION_LEASE_SECONDS = 300
+
+# ------------------------------------------------------------------
+# ASYNC VIEWS
+# ------------------------------------------------------------------
+# Read views dispatch on the event loop (core.async_views) only when
+# served by the ASGI app, which sets DJANGO_ASYNC_VIEWS=1. Under WSGI
+# they keep DRF's sync handlers rather than run through async_to_sync.
+ASYNC_VIEWS = os.getenv('DJANGO_ASYNC_VIEWS', '0') == '1'
+
+# ------------------------------------------------------------------
+# PERFORMANCE INSTRUMENTATION
+# ------------------------------------------------------------------
+# core.middleware.PerformanceMiddleware logs one JSON line per request
+# to the "core.perf" logger; slow or over-budget requests at WARNING.
+PERF_SLOW_REQUEST_MS = 1000
+
+# Add the Server-Timing header (query counts, span names) to responses.
+PERF_SERVER_TIMING = DEBUG
+
+# /metrics is staff-only; these client addresses (e.g. the Prometheus
+# server, comma-separated) may scrape it without logging in.
+PERF_METRICS_ALLOWED_IPS = [ip for ip in os.getenv('PERF_METRICS_ALLOWED_IPS', '').split(',') if ip]
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.perf': {
+            'handlers': ['console'],
+            'level': os.getenv('PERF_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
+# Runs the tests with the "core.perf" request log at ERROR
+TEST_RUNNER = 'core.testing.PerfTestRunner'
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
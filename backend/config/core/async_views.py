@@ -0,0 +1,123 @@
+"""
+Async read path for DRF generic views.
+
+DRF dispatches synchronously, so under ASGI every request would hold a
+worker thread for its whole lifetime. ``AsyncAPIViewMixin`` adds an
+async dispatch: ``a<method>`` handlers (``aget``) run on the event loop
+and read through Django's async ORM, while sync handlers (writes, with
+their scoring, signals and notifications) are offloaded to a thread
+explicitly with ``sync_to_async``. Authentication, permissions and
+throttling are sync DRF APIs that may query the database, so they are
+offloaded too, in one hop.
+
+The async dispatch is only used when ``settings.ASYNC_VIEWS`` is on,
+which ``config.asgi`` sets. Under WSGI there is no event loop to share,
+and running the views through ``async_to_sync`` would only add a
+thread hop per query, so views keep DRF's sync dispatch and handlers.
+Django fixes a view's mode when ``as_view()`` runs, i.e. when the
+URLconf is loaded.
+
+``AsyncListModelMixin`` and ``AsyncRetrieveModelMixin`` provide async
+``aget`` handlers next to DRF's sync ``get``; put them before the DRF
+generic view in the bases:
+
+    class PropertyListView(AsyncListModelMixin, generics.ListCreateAPIView):
+        ...
+"""
+import asyncio
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from django.utils.functional import classproperty
+from rest_framework.response import Response
+
+
+class AsyncAPIViewMixin:
+    @classproperty
+    def view_is_async(cls):
+        return settings.ASYNC_VIEWS
+
+    def dispatch(self, request, *args, **kwargs):
+        # Django awaits the view on the event loop only if it was built async
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return super().dispatch(request, *args, **kwargs)
+        return self.adispatch(request, *args, **kwargs)
+
+    async def adispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            method = request.method.lower()
+            if method in self.http_method_names:
+                handler = getattr(self, f"a{method}", None) or getattr(self, method, self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            if iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def afilter_queryset(self, queryset):
+        # Filter backends are sync and may query (e.g. the search index check)
+        return await sync_to_async(self.filter_queryset)(queryset)
+
+
+class AsyncListModelMixin(AsyncAPIViewMixin):
+    async def aget(self, request, *args, **kwargs):
+        return await self.alist(request, *args, **kwargs)
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = await self.afilter_queryset(self.get_queryset())
+
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = self.get_serializer([obj async for obj in queryset], many=True)
+        return Response(serializer.data)
+
+    async def apaginate_queryset(self, queryset):
+        """Async ``paginate_queryset``; the paginator needs an ``apaginate_queryset``."""
+        if self.paginator is None:
+            return None
+        return await self.paginator.apaginate_queryset(queryset, self.request, view=self)
+
+
+class AsyncRetrieveModelMixin(AsyncAPIViewMixin):
+    async def aget(self, request, *args, **kwargs):
+        return await self.aretrieve(request, *args, **kwargs)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
+
+    async def aget_object(self):
+        queryset = await self.afilter_queryset(self.get_queryset())
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        filter_kwargs = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        try:
+            obj = await queryset.aget(**filter_kwargs)
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404(f"No {queryset.model._meta.object_name} matches the given query.")
+
+        self.check_object_permissions(self.request, obj)
+        return obj
@@ -0,0 +1,99 @@
+import json
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .perf import (
+    BUDGET_EXCEEDED,
+    DURATION,
+    QUERIES,
+    QUERY_SECONDS,
+    REQUESTS,
+    SPAN_SECONDS,
+    QueryBudgetExceeded,
+    enforce_budgets,
+    get_query_budget,
+    request_timings,
+)
+
+logger = logging.getLogger("core.perf")
+
+
+class PerformanceMiddleware:
+    """
+    Time every request: wall time, database queries and the ``span``s
+    entered while handling it. Logs one JSON line per request, feeds the
+    ``/metrics`` registry and, with ``PERF_SERVER_TIMING`` (on in DEBUG),
+    adds a ``Server-Timing`` header.
+
+    Queries run while a streaming response is consumed are not counted.
+    Works under WSGI and ASGI; async views keep running on the event loop.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        with request_timings() as timings:
+            response = self.get_response(request)
+        return self.record(request, response, timings)
+
+    async def __acall__(self, request):
+        with request_timings() as timings:
+            response = await self.get_response(request)
+        return self.record(request, response, timings)
+
+    def record(self, request, response, timings):
+        match = request.resolver_match
+        view = (match.view_name or match.route) if match else "<unresolved>"
+        budget = get_query_budget(match.func, request.method) if match else None
+        elapsed = timings.elapsed
+
+        REQUESTS.inc(view=view, method=request.method, status=response.status_code)
+        DURATION.observe(elapsed, view=view)
+        QUERIES.observe(timings.queries, view=view)
+        QUERY_SECONDS.inc(timings.query_seconds, view=view)
+        for name, seconds in timings.spans.items():
+            SPAN_SECONDS.inc(seconds, view=view, span=name)
+
+        if settings.PERF_SERVER_TIMING:
+            entries = [
+                f"total;dur={elapsed * 1000:.1f}",
+                f'db;dur={timings.query_seconds * 1000:.1f};desc="{timings.queries} queries"',
+                *(f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.spans.items()),
+            ]
+            if response.has_header("Server-Timing"):
+                entries.insert(0, response["Server-Timing"])
+            response["Server-Timing"] = ", ".join(entries)
+
+        over_budget = budget is not None and timings.queries > budget
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "view": view,
+            "status": response.status_code,
+            "duration_ms": round(elapsed * 1000, 2),
+            "db_queries": timings.queries,
+            "db_ms": round(timings.query_seconds * 1000, 2),
+            "spans_ms": {name: round(seconds * 1000, 2) for name, seconds in timings.spans.items()},
+            "query_budget": budget,
+        }
+        slow = elapsed * 1000 >= settings.PERF_SLOW_REQUEST_MS
+        logger.log(logging.WARNING if over_budget or slow else logging.INFO, json.dumps(record))
+
+        if over_budget:
+            BUDGET_EXCEEDED.inc(view=view)
+            if enforce_budgets.get():
+                raise QueryBudgetExceeded(
+                    f"{request.method} {request.path} ({view}) ran {timings.queries} queries, "
+                    f"budget is {budget}:\n" + "\n".join(timings.sql)
+                )
+        return response
@@ -0,0 +1,248 @@
+"""
+Per-request performance instrumentation.
+
+``PerformanceMiddleware`` (core.middleware) opens a ``RequestTimings``
+for every request. Database queries are timed by an execute wrapper
+installed on every connection, and code paths worth watching mark
+themselves with ``span("scoring")`` / ``@timed("notification")``; all
+three are no-ops outside a request. Totals go to a structured log line,
+the in-process ``registry`` that ``/metrics`` renders in the Prometheus
+text format and, with ``PERF_SERVER_TIMING``, the ``Server-Timing`` header.
+
+Views declare how many queries they may run with ``@query_budget(n)``
+(or a ``query_budget`` class attribute). Over-budget requests are logged
+and counted; under ``core.testing.enforce_query_budgets`` they fail.
+"""
+import functools
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current = ContextVar("perf_request_timings", default=None)
+
+# Set by core.testing.enforce_query_budgets
+enforce_budgets = ContextVar("perf_enforce_query_budgets", default=False)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class RequestTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.spans = defaultdict(float)
+        self.active = set()
+        self.sql = []
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def __call__(self, execute, sql, params, many, context):
+        # Connection execute wrapper
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.query_seconds += time.perf_counter() - started
+            if enforce_budgets.get():
+                self.sql.append(sql)
+
+
+def current_timings():
+    return _current.get()
+
+
+def time_query(execute, sql, params, many, context):
+    """Execute wrapper on every connection; times queries of the current request."""
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    return timings(execute, sql, params, many, context)
+
+
+def install_query_timer(connection, **kwargs):
+    # connection_created receiver. The request is found through a context
+    # variable, so this works for any thread the request's queries run in.
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+@contextmanager
+def request_timings():
+    timings = RequestTimings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def span(name):
+    """Add the time spent in the block to the current request's ``name`` span."""
+    timings = _current.get()
+    # Outside a request, or nested in a span of the same name
+    if timings is None or name in timings.active:
+        yield
+        return
+
+    timings.active.add(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.spans[name] += time.perf_counter() - started
+        timings.active.discard(name)
+
+
+def timed(name):
+    """Decorator form of ``span``."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TimedSerializerMixin:
+    """DRF serializer mixin counting ``to_representation`` as ``serialization``."""
+
+    def to_representation(self, instance):
+        with span("serialization"):
+            return super().to_representation(instance)
+
+
+def query_budget(limit=None, **per_method):
+    """
+    Declare the most queries a view (function or class) may run per
+    request: ``@query_budget(3)``, or per method, ``@query_budget(3, POST=15)``.
+    """
+    def decorator(view):
+        view.query_budget = {"*": limit, **{method.upper(): n for method, n in per_method.items()}}
+        return view
+    return decorator
+
+
+def get_query_budget(view_func, method):
+    for view in (view_func, getattr(view_func, "view_class", None), getattr(view_func, "cls", None)):
+        budget = getattr(view, "query_budget", None)
+        if isinstance(budget, dict):
+            return budget.get(method, budget["*"])
+        if budget is not None:
+            return budget
+    return None
+
+
+# =========================
+# METRICS
+# =========================
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = (
+        '{}="{}"'.format(name, str(value).replace("\\", r"\\").replace('"', r'\"').replace("\n", r"\n"))
+        for name, value in zip(names, values)
+    )
+    return "{" + ",".join(pairs) + "}"
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.values = defaultdict(float)
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        with self.lock:
+            self.values[key] += amount
+
+    def samples(self):
+        with self.lock:
+            items = sorted(self.values.items())
+        for key, value in items:
+            yield f"{self.name}{_labels(self.labels, key)} {value:g}"
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [cumulative bucket counts, sum, count]
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        with self.lock:
+            state = self.values.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self):
+        with self.lock:
+            items = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self.values.items())
+        for key, (counts, total, count) in items:
+            for bound, bucket_count in [*zip(self.buckets, counts), ("+Inf", count)]:
+                labels = _labels((*self.labels, "le"), (*key, f"{bound:g}" if bound != "+Inf" else bound))
+                yield f"{self.name}_bucket{labels} {bucket_count}"
+            yield f"{self.name}_sum{_labels(self.labels, key)} {total:g}"
+            yield f"{self.name}_count{_labels(self.labels, key)} {count}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+REQUESTS = registry.register(Counter(
+    "http_requests_total", "Requests by view, method and status.", ("view", "method", "status"),
+))
+DURATION = registry.register(Histogram(
+    "http_request_duration_seconds", "Wall time per request.", ("view",),
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+))
+QUERIES = registry.register(Histogram(
+    "http_request_db_queries", "Database queries per request.", ("view",),
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100),
+))
+QUERY_SECONDS = registry.register(Counter(
+    "http_request_db_seconds_total", "Time spent in database queries.", ("view",),
+))
+SPAN_SECONDS = registry.register(Counter(
+    "http_request_span_seconds_total", "Time spent in instrumented code paths.", ("view", "span"),
+))
+BUDGET_EXCEEDED = registry.register(Counter(
+    "http_request_query_budget_exceeded_total", "Requests that ran more queries than their budget.", ("view",),
+))
@@ -0,0 +1,17 @@
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+
+from .perf import span
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """JSON renderer whose encoding time counts as the ``serialization`` span."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with span("serialization"):
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+class TimedBrowsableAPIRenderer(BrowsableAPIRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with span("serialization"):
+            return super().render(data, accepted_media_type, renderer_context)
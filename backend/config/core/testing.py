@@ -0,0 +1,56 @@
+"""
+Test helpers for query budgets, and the project's test runner.
+
+``enforce_query_budgets`` wraps a test method or ``TestCase`` class so
+that any request to a view declaring ``query_budget`` fails the test
+when it runs more queries than the budget, listing the SQL it ran::
+
+    @enforce_query_budgets
+    class PropertyAPITests(TestCase):
+        ...
+"""
+import functools
+import inspect
+import logging
+import os
+
+from asgiref.sync import iscoroutinefunction
+from django.test.runner import DiscoverRunner
+
+from .perf import enforce_budgets
+
+
+def enforce_query_budgets(test):
+    if inspect.isclass(test):
+        for name, attr in list(vars(test).items()):
+            if name.startswith("test") and callable(attr):
+                setattr(test, name, enforce_query_budgets(attr))
+        return test
+
+    if iscoroutinefunction(test):
+        @functools.wraps(test)
+        async def async_wrapper(*args, **kwargs):
+            token = enforce_budgets.set(True)
+            try:
+                return await test(*args, **kwargs)
+            finally:
+                enforce_budgets.reset(token)
+        return async_wrapper
+
+    @functools.wraps(test)
+    def wrapper(*args, **kwargs):
+        token = enforce_budgets.set(True)
+        try:
+            return test(*args, **kwargs)
+        finally:
+            enforce_budgets.reset(token)
+    return wrapper
+
+
+class PerfTestRunner(DiscoverRunner):
+    """Keeps the per-request ``core.perf`` log quiet unless ``PERF_LOG_LEVEL`` is set."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        if "PERF_LOG_LEVEL" not in os.environ:
+            logging.getLogger("core.perf").setLevel(logging.ERROR)
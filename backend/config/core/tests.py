@@ -1,3 +1,108 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.http import JsonResponse
+from django.test import TestCase, override_settings
+from django.urls import path
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from listings.models import Property
+from .perf import QueryBudgetExceeded, query_budget, registry
+from .testing import enforce_query_budgets
+
+
+@query_budget(2)
+def listing_titles(request):
+    # One query per listing: the N+1 the budget is there to catch
+    ids = Property.objects.values_list("pk", flat=True)
+    return JsonResponse({"titles": [Property.objects.get(pk=pk).title for pk in ids]})
+
+
+@query_budget(2)
+async def async_listing_titles(request):
+    ids = [pk async for pk in Property.objects.values_list("pk", flat=True)]
+    return JsonResponse({"titles": [(await Property.objects.aget(pk=pk)).title for pk in ids]})
+
+
+urlpatterns = [
+    path("titles/", listing_titles, name="titles"),
+    path("async-titles/", async_listing_titles, name="async-titles"),
+]
+
+
+@override_settings(PERF_SERVER_TIMING=True)
+class PerformanceMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user("agent", "agent@example.com", "pw")
+        for i in range(3):
+            Property.objects.create(title=f"Listing {i}", description="", location="Nairobi", price=1000)
+
+    def test_server_timing_and_metrics(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post(
+            "/api/api/properties/",
+            {"title": "New", "description": "urgent auction", "location": "Nairobi", "price": 500},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        entries = [entry.split(";")[0] for entry in response["Server-Timing"].split(", ")]
+        self.assertEqual(entries[:2], ["total", "db"])
+        self.assertTrue({"scoring", "notification", "serialization"} <= set(entries))
+
+        self.client.force_login(get_user_model().objects.create_user("ops", is_staff=True))
+        metrics = self.client.get("/metrics")
+        self.assertEqual(metrics["Content-Type"], "text/plain; version=0.0.4; charset=utf-8")
+        body = metrics.content.decode()
+        self.assertIn('http_requests_total{view="api-property-list",method="POST",status="201"}', body)
+        self.assertIn('http_request_span_seconds_total{view="api-property-list",span="scoring"}', body)
+        self.assertIn("listings_cache_misses_total", body)
+
+    def test_server_timing_is_opt_in(self):
+        with override_settings(PERF_SERVER_TIMING=False):
+            response = self.client.get("/api/api/properties/")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("Server-Timing"))
+
+    def test_metrics_are_staff_only(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        self.client.force_login(get_user_model().objects.create_user("ops", is_staff=True))
+        self.assertEqual(self.client.get("/metrics").status_code, 200)
+
+    def test_metrics_allowed_clients(self):
+        with override_settings(PERF_METRICS_ALLOWED_IPS=["10.0.0.5"]):
+            self.assertEqual(self.client.get("/metrics", REMOTE_ADDR="10.0.0.5").status_code, 200)
+            self.assertEqual(self.client.get("/metrics", REMOTE_ADDR="203.0.113.9").status_code, 403)
+        with override_settings(PERF_METRICS_ALLOWED_IPS=None):
+            self.assertEqual(self.client.get("/metrics").status_code, 403)
+
+    @override_settings(ROOT_URLCONF="core.tests")
+    def test_query_budget(self):
+        # Over budget is only counted outside enforce_query_budgets
+        self.assertEqual(self.client.get("/titles/").status_code, 200)
+        self.assertIn('http_request_query_budget_exceeded_total{view="titles"}', registry.render())
+
+        with self.assertRaisesMessage(QueryBudgetExceeded, "ran 4 queries, budget is 2"):
+            enforce_query_budgets(lambda: self.client.get("/titles/"))()
+
+    @override_settings(ROOT_URLCONF="core.tests")
+    async def test_async_views_are_timed(self):
+        response = await self.async_client.get("/async-titles/")
+        self.assertIn('db;dur=', response["Server-Timing"])
+        self.assertIn('desc="4 queries"', response["Server-Timing"])
+
+        @enforce_query_budgets
+        async def fetch():
+            return await self.async_client.get("/async-titles/")
+
+        with self.assertRaisesMessage(QueryBudgetExceeded, "ran 4 queries, budget is 2"):
+            await fetch()
+
+    @enforce_query_budgets
+    def test_listing_endpoints_within_budget(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        for path in ("/api/api/properties/", f"/api/api/properties/{Property.objects.first().pk}/", "/api/api/favorites/"):
+            with self.subTest(path=path):
+                self.assertEqual(client.get(path).status_code, 200)
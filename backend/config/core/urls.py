@@ -1,7 +1,8 @@
 # core/urls.py
 from django.urls import path
-from .views import home_view
+from .views import home_view, metrics_view
 
 urlpatterns = [
     path("", home_view, name="home"),
+    path("metrics", metrics_view, name="metrics"),
 ]
@@ -1,5 +1,10 @@
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
 from django.shortcuts import render
-#from properties.models import Property
+from listings.cache import cache_stats
+from listings.models import Property
+from listings.search import search_properties
+from .perf import registry
 
 def home_view(request): 
     return render(request, "home.html")
@@ -27,8 +32,20 @@ def property_list_view(request):
     location = request.GET.get("location", "")
     properties = Property.objects.all()
     if query:
-        properties = properties.filter(description__icontains=query)
+        properties = search_properties(properties, query).order_by("-search_rank")
     if location:
         properties = properties.filter(location__icontains=location)
     return render(request, "property_list.html", {"properties": properties})
 
+
+def metrics_view(request):
+    """Request metrics in the Prometheus text exposition format."""
+    allowed = settings.PERF_METRICS_ALLOWED_IPS or ()
+    if not request.user.is_staff and request.META.get("REMOTE_ADDR") not in allowed:
+        return HttpResponseForbidden()
+
+    stats = cache_stats()
+    lines = [registry.render()]
+    for name, key in (("listings_cache_hits_total", "hits"), ("listings_cache_misses_total", "misses")):
+        lines.append(f"# TYPE {name} counter\n{name} {stats[key]}\n")
+    return HttpResponse("".join(lines), content_type="text/plain; version=0.0.4; charset=utf-8")
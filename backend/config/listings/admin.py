@@ -1,5 +1,66 @@
 from django.contrib import admin
-from .models import Property, Favorite
+from .models import (
+    Property,
+    Favorite,
+    LocationMarketStats,
+    DistressKeyword,
+    AlertRule,
+    AlertRuleLocation,
+    CSVImportJob,
+)
 
-admin.site.register(Property)
-admin.site.register(Favorite)
+@admin.register(Property)
+class PropertyAdmin(admin.ModelAdmin):
+    list_display = ("title", "location", "price", "distress_score", "favorite_count", "duplicate_of", "created_at")
+    list_filter = ("source", ("duplicate_of", admin.EmptyFieldListFilter))
+    list_select_related = ("duplicate_of",)
+    search_fields = ("title", "location")
+    ordering = ("-created_at",)
+    readonly_fields = ("favorite_count",)
+    raw_id_fields = ("duplicate_of",)
+
+
+@admin.register(Favorite)
+class FavoriteAdmin(admin.ModelAdmin):
+    list_display = ("user", "property", "added_at")
+    list_select_related = ("user", "property")
+    raw_id_fields = ("user", "property")
+
+
+@admin.register(LocationMarketStats)
+class LocationMarketStatsAdmin(admin.ModelAdmin):
+    list_display = (
+        "location_key", "count", "mean_price", "median_price", "trimmed_mean_price",
+        "recent_count", "recent_median_price", "stats_version", "updated_at",
+    )
+    search_fields = ("location_key",)
+
+
+@admin.register(DistressKeyword)
+class DistressKeywordAdmin(admin.ModelAdmin):
+    list_display = ("phrase", "weight", "language", "is_active", "updated_at")
+    list_filter = ("language", "is_active")
+    search_fields = ("phrase",)
+
+
+class AlertRuleLocationInline(admin.TabularInline):
+    model = AlertRuleLocation
+    extra = 0
+
+
+@admin.register(AlertRule)
+class AlertRuleAdmin(admin.ModelAdmin):
+    list_display = ("user", "min_distress_score", "min_price", "max_price", "any_location", "is_active")
+    list_filter = ("is_active", "any_location")
+    inlines = [AlertRuleLocationInline]
+
+
+@admin.register(CSVImportJob)
+class CSVImportJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "id", "original_name", "status", "rows_processed", "rows_created",
+        "rows_rejected", "rows_duplicate", "created_at", "finished_at",
+    )
+    list_filter = ("status",)
+    readonly_fields = ("rows_processed", "rows_created", "rows_rejected", "rows_duplicate",
+                       "processing_seconds", "started_at", "finished_at", "heartbeat_at")
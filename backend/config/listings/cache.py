@@ -0,0 +1,190 @@
+"""
+Response cache for the property API.
+
+GET responses from ``PropertyListView`` and ``PropertyDetailView`` are
+cached as serialized data under a key built from the path and the
+normalized query string. Every key embeds the current *generation*, a
+counter bumped after any property write (save, delete, bulk import,
+bulk rescore), so a write invalidates every cached page at once without
+tracking which pages it touched; stale entries simply age out.
+
+Responses carry an ``ETag`` derived from the ``updated_at`` and
+``favorite_count`` of the listings they contain, so clients revalidating
+with ``If-None-Match`` get a 304 without the body. There is no
+``Last-Modified``: a list page changes when listings enter or leave it
+and a favorite changes ``favorite_count`` without touching
+``updated_at``, so no timestamp of the rows can stand for the response.
+
+The cache alias and timeout come from ``LISTINGS_CACHE_ALIAS`` and
+``LISTINGS_CACHE_TIMEOUT``.
+
+The HTML property list caches each rendered table row instead; see
+``render_cached_rows``.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response
+from django.utils.safestring import mark_safe
+from rest_framework.response import Response
+
+GENERATION_KEY = "listings:generation"
+HITS_KEY = "listings:cache:hits"
+MISSES_KEY = "listings:cache:misses"
+
+
+def get_cache():
+    return caches[getattr(settings, "LISTINGS_CACHE_ALIAS", "default")]
+
+
+def _incr(key, delta=1):
+    cache = get_cache()
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        # Missing (first use or evicted); add() loses no race with incr()
+        cache.add(key, 0, timeout=None)
+        return cache.incr(key, delta)
+
+
+def current_generation():
+    generation = get_cache().get(GENERATION_KEY)
+    if generation is None:
+        get_cache().add(GENERATION_KEY, 1, timeout=None)
+        generation = get_cache().get(GENERATION_KEY, 1)
+    return generation
+
+
+def bump_generation():
+    """Invalidate every cached property response once the transaction commits."""
+    transaction.on_commit(lambda: _incr(GENERATION_KEY))
+
+
+def cache_stats():
+    cache = get_cache()
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / total if total else 0.0,
+        "generation": current_generation(),
+    }
+
+
+def normalized_params(query_params):
+    """Query params as a stable string: sorted keys and values, blanks dropped."""
+    items = []
+    for key in sorted(query_params):
+        values = sorted(v for v in query_params.getlist(key) if v != "")
+        items.extend(f"{key}={value}" for value in values)
+    return "&".join(items)
+
+
+def fingerprint(*parts):
+    return hashlib.sha1("\x1f".join(str(part) for part in parts).encode()).hexdigest()
+
+
+class CachedResponseMixin:
+    """
+    Cache GET responses of a DRF generic view, through its sync ``get``
+    or its async ``aget`` (see ``core.async_views``).
+
+    The view calls ``set_cache_etag`` with the listings it serializes while
+    building a fresh response; the ETag is stored with the data so a
+    cached hit can answer conditional requests without touching the
+    database.
+    """
+    cache_prefix = "listings:api"
+
+    def get_cache_key(self, request):
+        return "{}:v{}:{}".format(
+            self.cache_prefix,
+            current_generation(),
+            fingerprint(request.get_host(), request.path, normalized_params(request.query_params)),
+        )
+
+    def set_cache_etag(self, request, rows):
+        rows = [row for row in rows if getattr(row, "updated_at", None)]
+        etag = fingerprint(
+            request.path,
+            normalized_params(request.query_params),
+            # favorite_count changes without touching updated_at
+            *(f"{row.pk}@{row.updated_at.timestamp()}#{getattr(row, 'favorite_count', '')}" for row in rows),
+        )
+        self.cache_etag = f'"{etag}"'
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # Runs in a worker thread under the async dispatch, so the blocking
+        # cache lookup shares that hop with authentication.
+        self.cache_entry = None
+        if request.method in ("GET", "HEAD"):
+            self.cache_key = self.get_cache_key(request)
+            self.cache_entry = get_cache().get(self.cache_key)
+            _incr(MISSES_KEY if self.cache_entry is None else HITS_KEY)
+
+    def get(self, request, *args, **kwargs):
+        entry = self.cache_entry
+        if entry is None:
+            self.cache_etag = None
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            entry = (response.data, self.cache_etag)
+            get_cache().set(self.cache_key, entry, getattr(settings, "LISTINGS_CACHE_TIMEOUT", 300))
+        return self.cached_response(request, entry, "HIT" if self.cache_entry else "MISS")
+
+    async def aget(self, request, *args, **kwargs):
+        entry = self.cache_entry
+        if entry is None:
+            self.cache_etag = None
+            response = await super().aget(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            entry = (response.data, self.cache_etag)
+            await get_cache().aset(self.cache_key, entry, getattr(settings, "LISTINGS_CACHE_TIMEOUT", 300))
+        return self.cached_response(request, entry, "HIT" if self.cache_entry else "MISS")
+
+    def cached_response(self, request, entry, status):
+        data, etag = entry
+        response = Response(data)
+        response["X-Cache"] = status
+        if etag:
+            response["ETag"] = etag
+        return get_conditional_response(request, etag=etag, response=response)
+
+
+# =========================
+# HTML ROW FRAGMENTS
+# =========================
+
+def render_cached_rows(template_name, properties):
+    """
+    Render ``template_name`` once per property, as ``[(property, html)]``.
+
+    Fragments are keyed on the listing's ``id``, ``updated_at`` and
+    ``favorite_count`` (which changes without touching ``updated_at``), so
+    an edit simply misses and no invalidation is needed. A page costs one
+    ``get_many`` plus, on misses, one ``set_many``.
+    """
+    cache = get_cache()
+    keys = [
+        "listings:row:" + fingerprint(template_name, p.pk, p.updated_at.timestamp(), p.favorite_count)
+        for p in properties
+    ]
+    cached = cache.get_many(keys)
+    fresh = {}
+    rows = []
+    for key, prop in zip(keys, properties):
+        html = cached.get(key)
+        if html is None:
+            html = fresh[key] = render_to_string(template_name, {"p": prop})
+        rows.append((prop, mark_safe(html)))
+    if fresh:
+        cache.set_many(fresh, getattr(settings, "LISTINGS_FRAGMENT_CACHE_TIMEOUT", 3600))
+    return rows
@@ -0,0 +1,151 @@
+"""
+Property change feed for delta sync clients.
+
+Every property write appends to ``PropertyChange``, in the same
+transaction as the write where there is one. That covers saves and
+deletes (signals) and bulk loads and bulk updates (the
+``properties_bulk_created`` / ``properties_bulk_updated`` signals).
+``seq`` is an auto-increment key, so the feed is read in key order:
+
+    GET /api/api/properties/changes/?since=<token>&limit=500
+
+The response holds the entries after ``since`` and a ``next`` token for
+the following call. ``created`` and ``updated`` entries carry the
+listing as it is now, in the list API's row format, and ``deleted``
+entries are tombstones. Without ``since`` the feed starts from the
+beginning, which is a full snapshot of the live listings.
+
+The log is compacted as it is written. Each listing keeps its
+``created`` entry and at most one ``updated`` entry, which moves to a
+new ``seq`` on every update, and a delete replaces both with a
+tombstone. A sync therefore costs one indexed range scan over the
+listings changed since the token, however often they changed.
+
+``prune_property_changes`` drops tombstones older than
+``LISTINGS_CHANGES_TOMBSTONE_DAYS``. Tokens record when they were
+issued, and a token older than that gets a 410: the client may have
+missed a delete, so it must start over.
+"""
+import base64
+import struct
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Property, PropertyChange
+from .serializers import PropertyListSerializer
+
+BATCH_SIZE = 1000
+
+# Key of the PostgreSQL advisory lock. Each transaction that records
+# changes holds it until it commits, so seq order is commit order and
+# a reader never skips a seq that commits late. SQLite already
+# serializes writers.
+SEQUENCE_LOCK = 0x6C697374
+
+
+class StaleToken(Exception):
+    """The token predates the tombstones still kept."""
+
+
+# =========================
+# RECORDING
+# =========================
+
+def record_changes(kind, pks):
+    """Append ``kind`` entries for the listings ``pks``, compacting older ones."""
+    pks = list(pks)
+    if not pks:
+        return
+
+    with transaction.atomic(savepoint=False):
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_xact_lock(%s)", [SEQUENCE_LOCK])
+
+        if kind != PropertyChange.CREATED:
+            for start in range(0, len(pks), BATCH_SIZE):
+                superseded = PropertyChange.objects.filter(property_id__in=pks[start:start + BATCH_SIZE])
+                if kind == PropertyChange.UPDATED:
+                    superseded = superseded.filter(kind=PropertyChange.UPDATED)
+                superseded.delete()
+
+        PropertyChange.objects.bulk_create(
+            [PropertyChange(property_id=pk, kind=kind) for pk in pks],
+            batch_size=BATCH_SIZE,
+        )
+
+
+def prune_tombstones(days=None):
+    """Delete tombstones older than ``days``; returns how many."""
+    if days is None:
+        days = settings.LISTINGS_CHANGES_TOMBSTONE_DAYS
+    # An hour of slack for transactions still open when their token was issued
+    cutoff = timezone.now() - timedelta(days=days, hours=1)
+    deleted, _ = PropertyChange.objects.filter(
+        kind=PropertyChange.DELETED, changed_at__lt=cutoff
+    ).delete()
+    return deleted
+
+
+# =========================
+# TOKENS
+# =========================
+
+def encode_token(seq, issued):
+    """``seq`` read up to and the unix time it was read at, in 16 characters."""
+    return base64.urlsafe_b64encode(struct.pack(">QI", seq, int(issued))).rstrip(b"=").decode()
+
+
+def decode_token(token):
+    """``(seq, issued)`` of a token; ValueError if malformed, StaleToken if expired."""
+    try:
+        seq, issued = struct.unpack(">QI", base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except (ValueError, struct.error):
+        raise ValueError("Invalid sync token.")
+    if time.time() - issued > settings.LISTINGS_CHANGES_TOMBSTONE_DAYS * 86400:
+        raise StaleToken("Sync token expired, start over without since.")
+    return seq, issued
+
+
+# =========================
+# READING
+# =========================
+
+def read_changes(since, issued, limit):
+    """
+    The feed page after ``since``: ``(entries, next_token, has_more)``.
+
+    A partial page's token keeps the caller's ``issued``: the entries it
+    has yet to read may be older than this call.
+    """
+    changes = list(PropertyChange.objects.filter(seq__gt=since).order_by("seq")[:limit + 1])
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    live = {change.property_id for change in changes if change.kind != PropertyChange.DELETED}
+    rows = {}
+    if live:
+        listings = list(Property.objects.filter(pk__in=live).defer("description"))
+        rows = {row["id"]: row for row in PropertyListSerializer(listings, many=True).data}
+
+    entries, sent = [], set()
+    for change in changes:
+        if change.kind == PropertyChange.DELETED:
+            entries.append({"seq": change.seq, "kind": change.kind, "id": change.property_id})
+        elif change.property_id in rows and change.property_id not in sent:
+            # Its created and updated entries carry the same row; send it once.
+            # A missing row was deleted since, and its tombstone follows.
+            sent.add(change.property_id)
+            entries.append({
+                "seq": change.seq, "kind": change.kind,
+                "id": change.property_id, "listing": rows[change.property_id],
+            })
+
+    seq = changes[-1].seq if changes else since
+    if not has_more or issued is None:
+        issued = time.time()
+    return entries, encode_token(seq, issued), has_more
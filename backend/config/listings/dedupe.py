@@ -0,0 +1,458 @@
+"""
+Near-duplicate listing detection with MinHash and LSH.
+
+The same property often arrives through several sources (CSV uploads,
+the API, manual entry) with slightly different titles and descriptions.
+A listing's text (title and description) is reduced to a MinHash
+signature of ``NUM_PERM`` values over its character 5-grams; the share
+of equal values in two signatures estimates the Jaccard similarity of
+their 5-gram sets. Each signature is cut into ``BANDS`` bands of
+``ROWS`` values and every band is hashed to a bucket key stored in
+``ListingBucket``, so the candidates for a listing come from one
+indexed ``IN`` lookup and only they are compared. With 16 bands of 8,
+pairs at 0.8 similarity become candidates about 95% of the time and
+pairs at 0.5 about 6% of the time.
+
+A match must have the same location key, a price within
+``LISTINGS_DEDUPE_PRICE_TOLERANCE`` (relative) and reach
+``LISTINGS_DEDUPE_THRESHOLD`` estimated similarity; the earliest listing
+of a cluster is its canonical one. ``LISTINGS_DEDUPE_MODE``:
+
+``"flag"`` (default)
+    new near-duplicates are kept with ``duplicate_of`` pointing at the
+    canonical listing; flagged listings are left out of the market
+    statistics and trigger no alerts.
+``"merge"``
+    bulk imports (``process_csv``, ``import_properties``) skip
+    near-duplicates like exact duplicates; single creates are flagged.
+``"off"``
+    no indexing and no checks; ingestion pays nothing.
+
+The ``dedupe_properties`` command rebuilds the index and re-clusters the
+whole table; run it after turning dedupe on.
+"""
+import hashlib
+import re
+from collections import defaultdict
+from decimal import Decimal
+from itertools import combinations, islice
+
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+
+SHINGLE_SIZE = 5
+NUM_PERM = 128
+BANDS, ROWS = 16, 8
+
+# SQLite allows at most 32766 parameters per statement
+LOOKUP_BATCH = 5000
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def _constants(label, shape):
+    """Fixed pseudo-random uint64s; stored signatures depend on them never changing."""
+    count = int(np.prod(shape))
+    values = [
+        int.from_bytes(hashlib.blake2b(f"{label}:{i}".encode(), digest_size=8).digest(), "little")
+        for i in range(count)
+    ]
+    return np.array(values, dtype=np.uint64).reshape(shape)
+
+
+# Multiply-shift hashing: h(x) = ((a * x + b) mod 2**64) >> 32, a odd
+_A = _constants("minhash-a", NUM_PERM) | np.uint64(1)
+_B = _constants("minhash-b", NUM_PERM)
+_BAND_MIX = _constants("band-mix", (BANDS, ROWS)) | np.uint64(1)
+_BAND_SALT = _constants("band-salt", BANDS)
+
+
+def get_mode():
+    return getattr(settings, "LISTINGS_DEDUPE_MODE", "flag")
+
+
+def listing_text(title, description):
+    return f"{title or ''} {description or ''}"
+
+
+def normalize_text(text):
+    return _NON_WORD.sub(" ", text.lower()).strip().ljust(SHINGLE_SIZE)
+
+
+def signatures(texts, block=64):
+    """
+    MinHash signatures, one ``uint32`` row of ``NUM_PERM`` values per text.
+
+    The character 5-grams of a block of texts are packed into integers in
+    one pass over their concatenated bytes; repeated 5-grams need no
+    de-duplication since they cannot change a minimum.
+    """
+    result = np.empty((len(texts), NUM_PERM), dtype=np.uint32)
+    for start in range(0, len(texts), block):
+        encoded = [normalize_text(text).encode() for text in texts[start:start + block]]
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+
+        count = len(data) - SHINGLE_SIZE + 1
+        values = np.zeros(count, dtype=np.uint64)
+        for i in range(SHINGLE_SIZE):
+            values |= data[i:i + count] << np.uint64(8 * i)
+
+        # Keep only the windows that lie inside one text
+        lengths = np.array([len(text) for text in encoded])
+        windows = lengths - SHINGLE_SIZE + 1
+        offsets = np.cumsum(windows) - windows
+        positions = np.arange(windows.sum()) + np.repeat(np.cumsum(lengths) - lengths - offsets, windows)
+
+        # One row per hash function keeps each text's windows contiguous
+        hashed = np.multiply.outer(_A, values[positions])
+        hashed += _B[:, None]
+        hashed >>= np.uint64(32)
+        result[start:start + len(encoded)] = np.minimum.reduceat(hashed, offsets, axis=1).T
+    return result
+
+
+def band_keys(sigs):
+    """LSH bucket key (signed 64-bit) of every band of every signature."""
+    bands = np.asarray(sigs, dtype=np.uint64).reshape(len(sigs), BANDS, ROWS)
+    keys = (bands * _BAND_MIX).sum(axis=2, dtype=np.uint64) + _BAND_SALT
+    keys ^= keys >> np.uint64(29)
+    return keys.view(np.int64)
+
+
+def prices_close(price, other):
+    tolerance = settings.LISTINGS_DEDUPE_PRICE_TOLERANCE
+    if tolerance is None:
+        return True
+    return abs(price - other) <= tolerance * max(abs(price), abs(other))
+
+
+def similarity(sig, other):
+    return np.count_nonzero(sig == other) / NUM_PERM
+
+
+def to_bytes(sig):
+    return sig.astype("<u4").tobytes()
+
+
+def from_bytes(data):
+    return np.frombuffer(bytes(data), dtype="<u4")
+
+
+# =========================
+# MATCHING
+# =========================
+
+def _fetch_candidates(pks, canonical):
+    """
+    Indexed listings as columns: ``{pk: position}`` and the cluster roots,
+    location keys, prices and signatures at those positions.
+    """
+    from .models import ListingSignature, Property  # ✅ lazy import
+
+    quote = connection.ops.quote_name
+    signature_table = quote(ListingSignature._meta.db_table)
+    property_table = quote(Property._meta.db_table)
+    positions, roots, locations, prices, sigs = {}, [], [], [], []
+    with connection.cursor() as cursor:
+        for start in range(0, len(pks), LOOKUP_BATCH):
+            batch = pks[start:start + LOOKUP_BATCH]
+            cursor.execute(
+                f"SELECT s.property_id, p.location_key, p.price, p.duplicate_of_id, s.signature "
+                f"FROM {signature_table} s JOIN {property_table} p ON p.id = s.property_id "
+                f"WHERE s.property_id IN ({', '.join(['%s'] * len(batch))})",
+                batch,
+            )
+            for pk, location_key, price, duplicate_of, signature in cursor.fetchall():
+                positions[pk] = len(roots)
+                roots.append(canonical.get(pk, pk) if canonical is not None else (duplicate_of or pk))
+                locations.append(location_key)
+                prices.append(float(price))
+                sigs.append(from_bytes(signature))
+    sigs = np.array(sigs, dtype=np.uint32).reshape(len(roots), NUM_PERM)
+    return positions, roots, locations, prices, sigs
+
+
+def find_duplicates(items, keys, threshold=None, canonical=None):
+    """
+    Match ``items`` — ``(ref, location_key, price, signature)`` in
+    ingestion order, with their ``band_keys`` — against the indexed
+    listings and against earlier items.
+
+    Returns ``{ref: canonical}`` for every item that is a near-duplicate:
+    the pk of the earliest matching indexed listing's cluster, or else the
+    canonical of the earliest matching item. Indexed listings resolve to
+    their stored ``duplicate_of``, or to ``canonical[pk]`` when a
+    ``canonical`` dict is given (re-clustering).
+    """
+    from .models import ListingBucket  # ✅ lazy import
+
+    if threshold is None:
+        threshold = settings.LISTINGS_DEDUPE_THRESHOLD
+    if not items:
+        return {}
+
+    refs = [item[0] for item in items]
+    locations = [item[1] for item in items]
+    prices = [item[2] for item in items]
+    sigs = np.array([item[3] for item in items], dtype=np.uint32).reshape(len(items), NUM_PERM)
+
+    # Group the items by bucket key: flat[starts[g]:ends[g]] share a key
+    flat = keys.ravel()
+    owners = np.repeat(np.arange(len(items)), BANDS)
+    order = np.lexsort((owners, flat))
+    flat, owners = flat[order], owners[order]
+    starts = np.flatnonzero(np.r_[True, flat[1:] != flat[:-1]])
+    ends = np.r_[starts[1:], len(flat)]
+    bucket_keys = flat[starts].tolist()
+
+    # Items sharing a bucket, as (later, earlier)
+    earlier_pairs = set()
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        if end - start > 1:
+            group = np.unique(owners[start:end]).tolist()
+            earlier_pairs.update((later, first) for first, later in combinations(group, 2))
+
+    # Indexed listings sharing a bucket with an item, as (item, pk). Raw SQL:
+    # compiling an ORM IN() of thousands of keys costs more than running it
+    group_of = {key: g for g, key in enumerate(bucket_keys)}
+    own = set(refs)
+    indexed_pairs = set()
+    table = connection.ops.quote_name(ListingBucket._meta.db_table)
+    with connection.cursor() as cursor:
+        for start in range(0, len(bucket_keys), LOOKUP_BATCH):
+            batch = bucket_keys[start:start + LOOKUP_BATCH]
+            cursor.execute(
+                f"SELECT bucket, property_id FROM {table} WHERE bucket IN ({', '.join(['%s'] * len(batch))})",
+                batch,
+            )
+            for bucket, pk in cursor.fetchall():
+                if pk not in own:
+                    g = group_of[bucket]
+                    indexed_pairs.update((item, pk) for item in owners[starts[g]:ends[g]].tolist())
+
+    def verified(pairs, other_locations, other_prices, other_sigs):
+        """The ``(item, other)`` pairs with the same location, a close price and similar text."""
+        kept = [
+            (item, other) for item, other in pairs
+            if locations[item] == other_locations[other] and prices_close(prices[item], other_prices[other])
+        ]
+        if not kept:
+            return []
+        left, right = np.array(kept).T
+        same = np.count_nonzero(sigs[left] == other_sigs[right], axis=1) / NUM_PERM
+        return [pair for pair, score in zip(kept, same.tolist()) if score >= threshold]
+
+    positions, roots, *columns = _fetch_candidates(sorted({pk for _, pk in indexed_pairs}), canonical)
+    best_indexed = {}
+    indexed_pairs = [(item, positions[pk]) for item, pk in indexed_pairs if pk in positions]
+    for item, other in verified(indexed_pairs, *columns):
+        best_indexed[item] = min(best_indexed.get(item, roots[other]), roots[other])
+
+    first_earlier = {}
+    for item, other in verified(earlier_pairs, locations, prices, sigs):
+        first_earlier[item] = min(first_earlier.get(item, other), other)
+
+    matches = {}
+    for item, ref in enumerate(refs):
+        if item in best_indexed:
+            matches[ref] = best_indexed[item]
+        elif item in first_earlier:
+            earlier = refs[first_earlier[item]]
+            matches[ref] = matches.get(earlier, earlier)
+    return matches
+
+
+def near_duplicate_rows(rows, threshold=None):
+    """
+    Indices of ``(title, description, location_key, price)`` rows that
+    are near-duplicates of an indexed listing or of an earlier row.
+    """
+    sigs = signatures([listing_text(title, description) for title, description, _, _ in rows])
+    items = [
+        (("row", i), location_key, float(price), sig)
+        for i, ((_, _, location_key, price), sig) in enumerate(zip(rows, sigs))
+    ]
+    return {index for _, index in find_duplicates(items, band_keys(sigs), threshold)}
+
+
+# =========================
+# INDEXING
+# =========================
+
+def index_signatures(pks, sigs, keys):
+    """Store signatures and bucket rows; plain executemany, the ORM is too slow for 16 rows per listing."""
+    from .models import ListingBucket, ListingSignature  # ✅ lazy import
+
+    quote = connection.ops.quote_name
+    pks = [int(pk) for pk in pks]
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {quote(ListingSignature._meta.db_table)} (property_id, signature) VALUES (%s, %s)",
+            [(pk, to_bytes(sig)) for pk, sig in zip(pks, sigs)],
+        )
+        cursor.executemany(
+            f"INSERT INTO {quote(ListingBucket._meta.db_table)} (bucket, property_id) VALUES (%s, %s)",
+            [(key, pk) for pk, row in zip(pks, keys.tolist()) for key in row],
+        )
+
+
+def dedupe_listings(instances):
+    """
+    Index newly saved listings and flag those that near-duplicate an
+    indexed listing or an earlier one of ``instances`` (unless dedupe is off).
+    Returns the flagged instances.
+    """
+    from .models import LocationMarketStats, Property  # ✅ lazy import
+    from .signals import _add_delta, properties_bulk_updated  # ✅ lazy import
+
+    if not instances or get_mode() == "off":
+        return []
+
+    sigs = signatures([listing_text(obj.title, obj.description) for obj in instances])
+    keys = band_keys(sigs)
+    items = [(obj.pk, obj.location_key, float(obj.price), sig) for obj, sig in zip(instances, sigs)]
+    matches = find_duplicates(items, keys)
+    index_signatures([obj.pk for obj in instances], sigs, keys)
+
+    flagged = [obj for obj in instances if obj.pk in matches]
+    if not flagged:
+        return []
+
+    # Duplicates leave the market statistics
+    deltas = defaultdict(lambda: (0, Decimal(0)))
+    for obj in flagged:
+        _add_delta(deltas, obj.market_values(), -1)
+        obj.duplicate_of_id = matches[obj.pk]
+        obj._loaded_market_values = None
+
+    with transaction.atomic():
+        Property.objects.bulk_update(flagged, ["duplicate_of"], batch_size=1000)
+        LocationMarketStats.apply_deltas(deltas)
+    properties_bulk_updated.send(sender=Property, instances=flagged, fields=["duplicate_of"])
+    return flagged
+
+
+def flag_new_listing(instance):
+    """
+    Before a single listing is inserted, point ``duplicate_of`` at the
+    cluster it near-duplicates, so it is never counted in market stats.
+    The signature is kept on the instance for ``index_listing``.
+    """
+    if get_mode() == "off" or instance.duplicate_of_id:
+        return
+    sigs = signatures([listing_text(instance.title, instance.description)])
+    keys = band_keys(sigs)
+    matches = find_duplicates([(None, instance.location_key, float(instance.price), sigs[0])], keys)
+    instance.duplicate_of_id = matches.get(None)
+    instance._dedupe_signature = (sigs, keys)
+
+
+def index_listing(instance):
+    """Index a listing just inserted through ``save()``."""
+    if get_mode() == "off":
+        return
+    sigs, keys = getattr(instance, "_dedupe_signature", None) or (None, None)
+    if sigs is None:
+        sigs = signatures([listing_text(instance.title, instance.description)])
+        keys = band_keys(sigs)
+    index_signatures([instance.pk], sigs, keys)
+    instance._dedupe_signature = None
+
+
+def reindex_listing(instance):
+    """Replace the signature of an edited listing (its flag is left as is)."""
+    from .models import ListingBucket, ListingSignature  # ✅ lazy import
+
+    if get_mode() == "off":
+        return
+
+    sigs = signatures([listing_text(instance.title, instance.description)])
+    ListingSignature.objects.filter(property_id=instance.pk).delete()
+    ListingBucket.objects.filter(property_id=instance.pk).delete()
+    index_signatures([instance.pk], sigs, band_keys(sigs))
+
+
+def promote_duplicates(duplicate_pks):
+    """
+    After a canonical listing is deleted (``duplicate_of`` is nulled),
+    make its earliest remaining duplicate canonical and point the rest at it.
+    """
+    from .models import LocationMarketStats, Property  # ✅ lazy import
+
+    if not duplicate_pks:
+        return None
+    remaining = list(Property.objects.filter(pk__in=duplicate_pks).order_by("pk"))
+    if not remaining:
+        return None
+    promoted, rest = remaining[0], remaining[1:]
+    with transaction.atomic():
+        Property.objects.filter(pk__in=[obj.pk for obj in rest]).update(duplicate_of=promoted)
+        location_key, price = promoted.market_values()
+        LocationMarketStats.apply_deltas({location_key: (1, price)})
+    return promoted
+
+
+# =========================
+# RE-CLUSTERING
+# =========================
+
+def rebuild_index(threshold=None, chunk_size=2000):
+    """
+    Re-index every listing in pk order and cluster the table. Returns
+    ``{pk: canonical pk}`` for the near-duplicates; flags are not changed.
+    """
+    from .models import ListingBucket, ListingSignature, Property  # ✅ lazy import
+
+    ListingBucket.objects.all().delete()
+    ListingSignature.objects.all().delete()
+
+    canonical = {}
+    rows = (
+        Property.objects
+        .order_by("pk")
+        .values_list("pk", "title", "description", "location_key", "price")
+        .iterator(chunk_size=chunk_size)
+    )
+    while chunk := list(islice(rows, chunk_size)):
+        sigs = signatures([listing_text(title, description) for _, title, description, _, _ in chunk])
+        keys = band_keys(sigs)
+        items = [
+            (pk, location_key, float(price), sig)
+            for (pk, _, _, location_key, price), sig in zip(chunk, sigs)
+        ]
+        canonical.update(find_duplicates(items, keys, threshold, canonical=canonical))
+        index_signatures([pk for pk, *_ in chunk], sigs, keys)
+    return canonical
+
+
+def apply_clusters(canonical, batch_size=1000):
+    """
+    Set ``duplicate_of`` from ``{pk: canonical pk}``: listings missing
+    from it become canonical. Returns the changed listings.
+    """
+    from .models import LocationMarketStats, Property  # ✅ lazy import
+    from .signals import _add_delta, properties_bulk_updated  # ✅ lazy import
+
+    current = dict(
+        Property.objects.filter(duplicate_of__isnull=False).values_list("pk", "duplicate_of_id")
+    )
+    pending = sorted(pk for pk in set(current) | set(canonical) if current.get(pk) != canonical.get(pk))
+
+    changed = []
+    deltas = defaultdict(lambda: (0, Decimal(0)))
+    for start in range(0, len(pending), batch_size):
+        batch = Property.objects.filter(pk__in=pending[start:start + batch_size])
+        for obj in batch.only("pk", "location", "price", "duplicate_of"):
+            _add_delta(deltas, obj.market_values(), -1)
+            obj.duplicate_of_id = canonical.get(obj.pk)
+            obj._loaded_market_values = obj.market_values()
+            _add_delta(deltas, obj._loaded_market_values, 1)
+            changed.append(obj)
+
+    if changed:
+        with transaction.atomic():
+            Property.objects.bulk_update(changed, ["duplicate_of"], batch_size=batch_size)
+            LocationMarketStats.apply_deltas(deltas)
+        properties_bulk_updated.send(sender=Property, instances=changed, fields=["duplicate_of"])
+    return changed
@@ -0,0 +1,131 @@
+"""
+Streaming exporters for the property table.
+
+Each exporter turns an iterable of row tuples (``values_list`` over a
+server-side ``iterator``) into an iterable of byte chunks for a
+``StreamingHttpResponse``. Rows are consumed ``chunk_size`` at a time, so
+memory use depends on the chunk size, not on the size of the table.
+Under ASGI, wrap the exporter in ``aiter_chunks``: Django reads a sync
+iterator into a list before serving it asynchronously.
+Parquet needs the optional ``pyarrow`` package.
+"""
+import csv
+import io
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .utils import _chunked
+
+EXPORT_FIELDS = [
+    "id",
+    "title",
+    "description",
+    "location",
+    "price",
+    "distress_score",
+    "source",
+    "favorite_count",
+    "created_at",
+    "updated_at",
+]
+
+
+class _Buffer:
+    """File-like object that hands back what was written since the last drain."""
+
+    def __init__(self):
+        self.buffer = io.BytesIO()
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode()
+        self.buffer.write(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = self.buffer.getvalue()
+        self.buffer = io.BytesIO()
+        return data
+
+
+async def aiter_chunks(chunks):
+    """Async iterator over ``chunks``, each chunk produced in a worker thread."""
+    chunks = iter(chunks)
+    done = object()
+    # thread_sensitive: the server-side cursor stays on one connection
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    while (chunk := await next_chunk(chunks, done)) is not done:
+        yield chunk
+
+
+def export_csv(fields, rows, chunk_size=2000):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for chunk in _chunked(rows, chunk_size):
+        writer.writerows(chunk)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def export_ndjson(fields, rows, chunk_size=2000):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for chunk in _chunked(rows, chunk_size):
+        yield "".join(
+            encoder.encode(dict(zip(fields, row))) + "\n" for row in chunk
+        ).encode()
+
+
+def parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def export_parquet(fields, rows, chunk_size=50000):
+    """One Parquet row group per ``chunk_size`` rows, flushed as it is written."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {
+        "id": pa.int64(),
+        "price": pa.decimal128(12, 2),
+        "distress_score": pa.float64(),
+        "favorite_count": pa.int64(),
+        "created_at": pa.timestamp("us", tz="UTC"),
+        "updated_at": pa.timestamp("us", tz="UTC"),
+    }
+    schema = pa.schema([(field, types.get(field, pa.string())) for field in fields])
+
+    sink = _Buffer()
+    with pq.ParquetWriter(sink, schema, compression="snappy") as writer:
+        for chunk in _chunked(rows, chunk_size):
+            columns = list(zip(*chunk))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(column, type=schema.field(i).type) for i, column in enumerate(columns)],
+                schema=schema,
+            ))
+            yield sink.drain()
+    yield sink.drain()
+
+
+EXPORTERS = {
+    "csv": (export_csv, "text/csv", "csv"),
+    "ndjson": (export_ndjson, "application/x-ndjson", "ndjson"),
+    "parquet": (export_parquet, "application/vnd.apache.parquet", "parquet"),
+}
@@ -1,11 +1,78 @@
 # listings/forms.py
 from django import forms
-from .models import Property
+from .models import Property, normalize_location
+from .search import search_properties
 
 class PropertyForm(forms.ModelForm):
     class Meta:
         model = Property
         fields = ["title", "description", "location", "price"]
 
+    def clean(self):
+        cleaned_data = super().clean()
+        title, location = cleaned_data.get("title"), cleaned_data.get("location")
+        if title and location and Property.duplicate_exists(title, location, self.instance.pk):
+            raise forms.ValidationError("A property with this title already exists in this location.")
+        return cleaned_data
+
 class PropertyCSVUploadForm(forms.Form):
     csv_file = forms.FileField(label='Select CSV file')
+
+class ListingFilterForm(forms.Form):
+    """Location, price range and minimum distress score, read from the query string."""
+    location = forms.CharField(required=False, widget=forms.TextInput(attrs={"placeholder": "Location"}))
+    min_price = forms.DecimalField(required=False, min_value=0, widget=forms.NumberInput(attrs={"placeholder": "Min price"}))
+    max_price = forms.DecimalField(required=False, min_value=0, widget=forms.NumberInput(attrs={"placeholder": "Max price"}))
+    min_score = forms.FloatField(required=False, min_value=0, widget=forms.NumberInput(attrs={"placeholder": "Min score"}))
+
+    def clean(self):
+        cleaned_data = super().clean()
+        low, high = cleaned_data.get("min_price"), cleaned_data.get("max_price")
+        if low is not None and high is not None and low > high:
+            raise forms.ValidationError("Min price must not exceed max price.")
+        if cleaned_data.get("location"):
+            cleaned_data["location_key"] = normalize_location(cleaned_data["location"])
+        return cleaned_data
+
+    def filter(self, queryset):
+        """Apply the valid filters to ``queryset`` (call after ``is_valid()``)."""
+        data = getattr(self, "cleaned_data", {})
+        if data.get("location_key"):
+            queryset = queryset.filter(location_key=data["location_key"])
+        if data.get("min_price") is not None:
+            queryset = queryset.filter(price__gte=data["min_price"])
+        if data.get("max_price") is not None:
+            queryset = queryset.filter(price__lte=data["max_price"])
+        if data.get("min_score") is not None:
+            queryset = queryset.filter(distress_score__gte=data["min_score"])
+        return queryset
+
+    def matches(self, location_key, price, score):
+        """The same test as ``filter`` for one listing, in memory."""
+        data = self.cleaned_data
+        return (
+            (not data.get("location_key") or location_key == data["location_key"])
+            and (data.get("min_price") is None or price >= data["min_price"])
+            and (data.get("max_price") is None or price <= data["max_price"])
+            and (data.get("min_score") is None or score >= data["min_score"])
+        )
+
+
+class PropertyFilterForm(ListingFilterForm):
+    """Filters for the HTML property list: adds full-text search and ordering."""
+    ORDERING_CHOICES = [
+        ("-created_at", "Newest"),
+        ("-distress_score", "Most distressed"),
+        ("price", "Cheapest"),
+        ("-price", "Most expensive"),
+    ]
+
+    search = forms.CharField(required=False, widget=forms.TextInput(attrs={"placeholder": "Search title or description"}))
+    ordering = forms.ChoiceField(required=False, choices=ORDERING_CHOICES)
+
+    def filter(self, queryset):
+        queryset = super().filter(queryset)
+        search = getattr(self, "cleaned_data", {}).get("search")
+        if search:
+            queryset = search_properties(queryset, search)
+        return queryset
@@ -0,0 +1,105 @@
+"""
+Background CSV imports.
+
+``PropertyCSVUploadView`` only stores the upload as a ``CSVImportJob``;
+the ``process_csv_imports`` worker command claims jobs and imports them
+in chunks. Each chunk and the job's progress counters are committed in
+one transaction, so after a crash the job resumes at the first row that
+was not committed, with no partial chunk left behind.
+"""
+import csv
+import time
+from datetime import timedelta
+from io import TextIOWrapper
+from itertools import islice
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import CSVImportJob
+from .utils import CSVChunkImporter, _chunked
+
+
+class JobLost(Exception):
+    """Another worker took over the job after our lease expired."""
+
+
+def claim_import_job():
+    """
+    Lock the next pending job, or a running job whose worker stopped
+    sending heartbeats, and mark it running. Returns None when idle.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.LISTINGS_CSV_IMPORT_LEASE_SECONDS)
+
+    with transaction.atomic():
+        job = (
+            CSVImportJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(Q(status="pending") | Q(status="running", heartbeat_at__lt=stale))
+            .order_by("created_at")
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = "running"
+        job.started_at = job.started_at or now
+        job.heartbeat_at = now
+        job.save(update_fields=["status", "started_at", "heartbeat_at"])
+    return job
+
+
+def run_import_job(job):
+    """Import ``job.file`` from its checkpoint to the end; returns the job."""
+    importer = CSVChunkImporter(job.batch_size)
+
+    try:
+        with job.file.open("rb") as raw:
+            reader = csv.DictReader(TextIOWrapper(raw, encoding="utf-8", newline=""))
+            # Rows before the checkpoint were committed by an earlier run
+            rows = islice(reader, job.rows_processed, None)
+
+            for chunk in _chunked(rows, job.batch_size):
+                started = time.perf_counter()
+                with transaction.atomic():
+                    created, rejected, duplicates = importer.import_chunk(chunk)
+                    advanced = CSVImportJob.objects.filter(
+                        pk=job.pk, status="running", rows_processed=job.rows_processed,
+                    ).update(
+                        rows_processed=F("rows_processed") + len(chunk),
+                        rows_created=F("rows_created") + created,
+                        rows_rejected=F("rows_rejected") + rejected,
+                        rows_duplicate=F("rows_duplicate") + duplicates,
+                        processing_seconds=F("processing_seconds") + (time.perf_counter() - started),
+                        heartbeat_at=timezone.now(),
+                    )
+                    if not advanced:
+                        raise JobLost(job.pk)
+                job.rows_processed += len(chunk)
+    except JobLost:
+        job.refresh_from_db()
+        return job
+    except (OSError, UnicodeDecodeError, csv.Error, DatabaseError) as e:
+        # A chunk that hit a DatabaseError (an IntegrityError from a
+        # concurrent insert, a DataError) was rolled back by its atomic
+        # block; failing the job stops it from being re-claimed forever.
+        CSVImportJob.objects.filter(pk=job.pk).update(
+            status="failed", error=f"{type(e).__name__}: {e}", finished_at=timezone.now(),
+        )
+        job.refresh_from_db()
+        return job
+
+    CSVImportJob.objects.filter(pk=job.pk, status="running").update(
+        status="completed", finished_at=timezone.now(),
+    )
+    job.refresh_from_db()
+    return job
+
+
+def run_pending_imports():
+    """Process jobs until none are claimable; returns the jobs handled."""
+    handled = []
+    while (job := claim_import_job()) is not None:
+        handled.append(run_import_job(job))
+    return handled
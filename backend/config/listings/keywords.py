@@ -0,0 +1,212 @@
+"""
+Distress keyword matching.
+
+The keyword dictionary is compiled once into an Aho-Corasick automaton so
+a description is scanned in a single pass no matter how many phrases the
+dictionary holds. The dictionary comes from ``DISTRESS_KEYWORDS`` in
+``listings.utils`` by default, or from a file / the ``DistressKeyword``
+table depending on ``settings.DISTRESS_KEYWORDS_SOURCE``, and is reloaded
+when that source changes.
+"""
+import csv
+import json
+import threading
+import time
+from pathlib import Path
+from django.conf import settings
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over a ``{phrase: weight}`` dictionary.
+
+    Every phrase found in a text counts once, overlapping matches
+    included. With ``word_boundary=True`` a phrase only counts when it is
+    not glued to letters or digits on either side.
+
+    Dictionaries of at most ``scan_limit`` phrases are matched with plain
+    substring checks instead, which are faster than walking the automaton
+    in Python when there are only a handful of phrases.
+    """
+
+    def __init__(self, keywords, word_boundary=False, scan_limit=32):
+        self.word_boundary = word_boundary
+        self.phrases = []
+        self.weights = []
+
+        # State 0 is the root; goto[state] maps a character to the next state
+        self.goto = [{}]
+        self.outputs = [()]
+
+        for phrase, weight in keywords.items():
+            phrase = phrase.strip().lower()
+            if not phrase:
+                continue
+            state = 0
+            for char in phrase:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.outputs.append(())
+                state = next_state
+            if not self.outputs[state]:
+                self.phrases.append(phrase)
+                self.weights.append(float(weight))
+                self.outputs[state] = (len(self.phrases) - 1,)
+
+        self.fail = [0] * len(self.goto)
+        self._build_failure_links()
+        self.use_scan = not word_boundary and len(self.phrases) <= scan_limit
+
+    def __len__(self):
+        return len(self.phrases)
+
+    def _build_failure_links(self):
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[next_state] = target if target != next_state else 0
+                self.outputs[next_state] += self.outputs[self.fail[next_state]]
+
+    def _is_boundary(self, text, start, end):
+        return (
+            (start == 0 or not text[start - 1].isalnum())
+            and (end == len(text) or not text[end].isalnum())
+        )
+
+    def find(self, text):
+        """Return the indexes of every phrase that occurs in ``text``."""
+        found = set()
+        if not text:
+            return found
+
+        text = text.lower()
+        if self.use_scan:
+            return {index for index, phrase in enumerate(self.phrases) if phrase in text}
+
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        state = 0
+
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in outputs[state]:
+                if self.word_boundary and not self._is_boundary(
+                    text, position + 1 - len(self.phrases[index]), position + 1
+                ):
+                    continue
+                found.add(index)
+
+        return found
+
+    def matches(self, text):
+        return [self.phrases[index] for index in sorted(self.find(text))]
+
+    def score(self, text):
+        return float(sum(self.weights[index] for index in self.find(text)))
+
+    def score_many(self, texts):
+        return [self.score(text) for text in texts]
+
+
+# =========================
+# DICTIONARY SOURCES
+# =========================
+
+def load_keywords_file(path):
+    """
+    Read a keyword dictionary from a JSON object (``{"phrase": weight}``)
+    or a CSV file with ``keyword,weight`` columns.
+    """
+    path = Path(path)
+    with open(path, encoding="utf-8-sig") as f:
+        if path.suffix.lower() == ".json":
+            return {str(k): float(v) for k, v in json.load(f).items()}
+
+        keywords = {}
+        for row in csv.DictReader(f):
+            phrase = (row.get("keyword") or "").strip()
+            if phrase:
+                keywords[phrase] = float(row.get("weight") or 1)
+        return keywords
+
+
+def _source_version(source):
+    """Cheap fingerprint of the dictionary source, used to detect changes."""
+    if not source:
+        return "builtin"
+
+    if source == "db":
+        from django.db.models import Count, Max
+        from .models import DistressKeyword  # ✅ lazy import
+
+        return tuple(
+            DistressKeyword.objects
+            .filter(is_active=True)
+            .aggregate(count=Count("id"), latest=Max("updated_at"))
+            .values()
+        )
+
+    stat = Path(source).stat()
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _load_keywords(source):
+    if not source:
+        from .utils import DISTRESS_KEYWORDS  # ✅ lazy import
+        return DISTRESS_KEYWORDS
+
+    if source == "db":
+        from .models import DistressKeyword  # ✅ lazy import
+        return dict(
+            DistressKeyword.objects
+            .filter(is_active=True)
+            .values_list("phrase", "weight")
+        )
+
+    return load_keywords_file(source)
+
+
+_lock = threading.Lock()
+_state = {"matcher": None, "version": None, "checked_at": 0.0}
+
+
+def get_keyword_matcher():
+    """
+    Return the compiled matcher for the configured dictionary.
+
+    The source is checked for changes at most once every
+    ``DISTRESS_KEYWORDS_RELOAD_SECONDS``; the automaton is only rebuilt
+    when it actually changed.
+    """
+    now = time.monotonic()
+    matcher = _state["matcher"]
+    if matcher is not None and now - _state["checked_at"] < settings.DISTRESS_KEYWORDS_RELOAD_SECONDS:
+        return matcher
+
+    with _lock:
+        source = settings.DISTRESS_KEYWORDS_SOURCE
+        version = (source, _source_version(source))
+        if _state["matcher"] is None or version != _state["version"]:
+            _state["matcher"] = KeywordMatcher(
+                _load_keywords(source),
+                word_boundary=settings.DISTRESS_KEYWORDS_WORD_BOUNDARY,
+            )
+            _state["version"] = version
+        _state["checked_at"] = now
+        return _state["matcher"]
+
+
+def reload_keyword_matcher():
+    """Force the next ``get_keyword_matcher()`` call to re-check the source."""
+    with _lock:
+        _state["version"] = None
+        _state["checked_at"] = 0.0
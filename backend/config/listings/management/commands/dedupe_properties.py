@@ -0,0 +1,59 @@
+import time
+from collections import Counter
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from listings.dedupe import apply_clusters, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the near-duplicate index and flag near-duplicate listings across the table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report the clusters without changing anything"
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=None,
+            help="Minimum estimated similarity (default: LISTINGS_DEDUPE_THRESHOLD)"
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Listings signed and matched per batch"
+        )
+        parser.add_argument(
+            "--show",
+            type=int,
+            default=10,
+            help="Largest clusters to list"
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+
+        with transaction.atomic():
+            canonical = rebuild_index(options["threshold"], max(options["chunk_size"], 1))
+            clusters = Counter(canonical.values())
+
+            for root, size in clusters.most_common(options["show"]):
+                self.stdout.write(f"Listing {root}: {size} near-duplicate(s)")
+
+            if options["dry_run"]:
+                transaction.set_rollback(True)
+                changed = None
+            else:
+                changed = apply_clusters(canonical)
+
+        summary = (
+            f"{len(canonical)} near-duplicates in {len(clusters)} clusters "
+            f"({time.perf_counter() - started:.2f}s)"
+        )
+        if changed is None:
+            self.stdout.write(self.style.WARNING(f"Dry run: {summary}; nothing changed."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Deduplicated: {summary}; {len(changed)} listings updated."))
@@ -1,7 +1,70 @@
 import csv
+import gzip
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from pathlib import Path
+import django
 from django.core.management.base import BaseCommand
-from listings.models import Property
+from django.db import transaction
+from listings.dedupe import get_mode as get_dedupe_mode, near_duplicate_rows
+from listings.models import Property, normalize_location
+from listings.signals import properties_bulk_created
+
+DATA_DIR = Path(__file__).resolve().parent.parent.parent / "data"
+
+REQUIRED_FIELDS = ["title", "location", "price", "distress_score"]
+
+# Header mapping for messy CSVs
+HEADER_MAP = {
+    "price (kes)": "price",
+    "distress score": "distress_score",
+}
+
+
+def normalize_header(header):
+    header = (header or "").strip().lower()
+    return HEADER_MAP.get(header, header)
+
+
+def parse_rows(rows):
+    """
+    Validate a chunk of ``(row_number, row)`` pairs.
+
+    Runs inside worker processes, so it only touches plain data. Returns
+    ``(parsed, errors)`` where ``parsed`` holds ``(row_number, fields)``
+    tuples ready for saving and ``errors`` holds ``(row_number, message)``.
+    """
+    parsed, errors = [], []
+
+    for row_number, row in rows:
+        clean_row = {k: (v or "").strip() for k, v in row.items() if isinstance(k, str)}
+
+        # Check required fields
+        missing = [field for field in REQUIRED_FIELDS if not clean_row.get(field)]
+        if missing:
+            errors.append((row_number, f"missing {missing} → {row}"))
+            continue
+
+        # Convert numeric fields safely
+        try:
+            price = float(clean_row["price"].replace(",", ""))  # handle commas in numbers
+            distress_score = float(clean_row["distress_score"])
+        except ValueError as ve:
+            errors.append((row_number, f"invalid numeric → {row} ({ve})"))
+            continue
+
+        parsed.append((row_number, {
+            "title": clean_row["title"],
+            "location": clean_row["location"],
+            "price": price,
+            "distress_score": distress_score,
+        }))
+
+    return parsed, errors
+
 
 class Command(BaseCommand):
     help = "Import properties from a CSV file with validation and header mapping"
@@ -11,75 +74,148 @@ class Command(BaseCommand):
             "--file",
             type=str,
             default="demo_properties.csv",
-            help="CSV filename inside listings/data/"
+            help="Path to a CSV (or .csv.gz) file, or a filename inside listings/data/"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Rows per parse chunk and per bulk insert"
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Worker processes used to parse and validate rows"
         )
 
     def handle(self, *args, **options):
-        file_name = options["file"]
-        data_path = Path(__file__).resolve().parent.parent.parent / "data" / file_name
+        data_path = self.resolve_path(options["file"])
+        batch_size = max(options["batch_size"], 1)
+        workers = max(options["workers"], 1)
 
-        if not data_path.exists():
-            self.stderr.write(self.style.ERROR(f"File not found: {data_path}"))
+        if data_path is None:
+            self.stderr.write(self.style.ERROR(f"File not found: {options['file']}"))
             return
 
+        started = time.perf_counter()
         total, imported, skipped = 0, 0, 0
-        required_fields = ["title", "location", "price", "distress_score"]
 
-        # Header mapping for messy CSVs
-        header_map = {
-            "price (kes)": "price",
-            "distress score": "distress_score",
-        }
+        # Existing keys are loaded once instead of querying per row
+        seen = set(
+            Property.objects.values_list("title", "location_key").iterator(chunk_size=batch_size)
+        )
 
-        with open(data_path, newline="", encoding="utf-8-sig") as f:
+        with self.open_file(data_path) as f:
             reader = csv.DictReader(f)
 
-            # Normalize headers
-            reader.fieldnames = [h.strip().lower() for h in reader.fieldnames]
-
-            # Apply header mapping
-            reader.fieldnames = [header_map.get(h, h) for h in reader.fieldnames]
+            # Normalize headers and apply header mapping
+            reader.fieldnames = [normalize_header(h) for h in reader.fieldnames or []]
 
             self.stdout.write(self.style.WARNING(f"Headers normalized: {reader.fieldnames}"))
 
-            for row in reader:
-                total += 1
-                clean_row = {header_map.get(k.strip().lower(), k.strip().lower()): v.strip() for k, v in row.items()}
-
-                # Check required fields
-                missing = [field for field in required_fields if not clean_row.get(field)]
-                if missing:
-                    skipped += 1
-                    self.stderr.write(self.style.ERROR(f"Row {total} skipped: missing {missing} → {row}"))
-                    continue
-
-                # Convert numeric fields safely
-                try:
-                    price = float(clean_row["price"].replace(",", ""))  # handle commas in numbers
-                    distress_score = float(clean_row["distress_score"])
-                except ValueError as ve:
-                    skipped += 1
-                    self.stderr.write(self.style.ERROR(f"Row {total} skipped: invalid numeric → {row} ({ve})"))
-                    continue
+            chunks = self.read_chunks(reader, batch_size)
+            for parsed, errors in self.parse_chunks(chunks, workers):
+                total += len(parsed) + len(errors)
 
-                # Skip duplicates
-                if Property.objects.filter(title=clean_row["title"], location=clean_row["location"]).exists():
+                for row_number, message in errors:
                     skipped += 1
-                    self.stdout.write(self.style.WARNING(f"Row {total} duplicate skipped: {clean_row['title']} in {clean_row['location']}"))
-                    continue
-
-                try:
-                    Property.objects.create(
-                        title=clean_row["title"],
-                        location=clean_row["location"],
-                        price=price,
-                        distress_score=distress_score,
+                    self.stderr.write(self.style.ERROR(f"Row {row_number} skipped: {message}"))
+
+                batch, row_numbers = [], []
+                for row_number, fields in parsed:
+                    # Skip duplicates
+                    key = (fields["title"], normalize_location(fields["location"]))
+                    if key in seen:
+                        skipped += 1
+                        self.stdout.write(self.style.WARNING(
+                            f"Row {row_number} duplicate skipped: {fields['title']} in {fields['location']}"
+                        ))
+                        continue
+                    seen.add(key)
+                    batch.append(Property(location_key=key[1], **fields))
+                    row_numbers.append(row_number)
+
+                if get_dedupe_mode() == "merge" and batch:
+                    near = near_duplicate_rows(
+                        [(obj.title, obj.description, obj.location_key, obj.price) for obj in batch]
                     )
-                    imported += 1
-                except Exception as e:
-                    skipped += 1
-                    self.stderr.write(self.style.ERROR(f"Row {total} skipped: error saving → {row} ({e})"))
+                    for index in sorted(near):
+                        skipped += 1
+                        self.stdout.write(self.style.WARNING(
+                            f"Near-duplicate skipped: {batch[index].title} in {batch[index].location}"
+                        ))
+                    batch = [obj for i, obj in enumerate(batch) if i not in near]
+                    row_numbers = [n for i, n in enumerate(row_numbers) if i not in near]
 
+                try:
+                    self.save_batch(batch, batch_size)
+                    imported += len(batch)
+                except Exception:
+                    # Retry row by row so only the offending rows are lost
+                    for row_number, obj in zip(row_numbers, batch):
+                        try:
+                            self.save_batch([obj], 1)
+                            imported += 1
+                        except Exception as e:
+                            skipped += 1
+                            self.stderr.write(self.style.ERROR(f"Row {row_number} skipped: error saving ({e})"))
+
+        elapsed = time.perf_counter() - started
+        rate = imported / elapsed if elapsed else 0.0
         self.stdout.write(self.style.SUCCESS(
-            f"Import complete: {imported} added, {skipped} skipped, out of {total} rows."
+            f"Import complete: {imported} added, {skipped} skipped, out of {total} rows "
+            f"in {elapsed:.2f}s ({rate:.0f} rows/sec)."
         ))
+
+    def save_batch(self, batch, batch_size):
+        for obj in batch:
+            # Left over from a failed attempt at a larger batch
+            obj.pk = None
+            obj._state.adding = True
+        with transaction.atomic():
+            Property.objects.bulk_create(batch, batch_size=batch_size)
+            properties_bulk_created.send(sender=Property, instances=batch)
+
+    def resolve_path(self, file_name):
+        for candidate in (Path(file_name).expanduser(), DATA_DIR / file_name):
+            if candidate.is_file():
+                return candidate
+        return None
+
+    def open_file(self, path):
+        with open(path, "rb") as f:
+            is_gzip = f.read(2) == b"\x1f\x8b"
+        opener = gzip.open if is_gzip else open
+        return opener(path, "rt", newline="", encoding="utf-8-sig")
+
+    def read_chunks(self, reader, size):
+        rows = enumerate(reader, start=1)
+        while True:
+            chunk = list(islice(rows, size))
+            if not chunk:
+                return
+            yield chunk
+
+    def parse_chunks(self, chunks, workers):
+        """Parse chunks in order, keeping at most two chunks per worker in flight."""
+        if workers == 1:
+            for chunk in chunks:
+                yield parse_rows(chunk)
+            return
+
+        # Spawned, not forked: each worker sets Django up before unpickling
+        # parse_rows (this module imports the models) and never shares the
+        # parent's database connection.
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=django.setup,
+        ) as pool:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(pool.submit(parse_rows, chunk))
+                if len(pending) >= workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
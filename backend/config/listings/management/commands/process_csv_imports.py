@@ -0,0 +1,39 @@
+import time
+from django.core.management.base import BaseCommand
+from listings.imports import run_pending_imports
+
+
+class Command(BaseCommand):
+    help = "Process uploaded CSV import jobs in committed, resumable chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling for new uploads instead of exiting when the queue is empty"
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Seconds to wait between polls when the queue is empty (with --loop)"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                jobs = run_pending_imports()
+                for job in jobs:
+                    style = self.style.SUCCESS if job.status == "completed" else self.style.ERROR
+                    self.stdout.write(style(
+                        f"Job {job.pk} {job.status}: {job.rows_processed} rows processed, "
+                        f"{job.rows_created} created, {job.rows_rejected} rejected, "
+                        f"{job.rows_duplicate} duplicates ({job.rows_per_sec:.0f} rows/sec)"
+                        + (f" - {job.error}" if job.error else "")
+                    ))
+                if not options["loop"]:
+                    break
+                if not jobs:
+                    time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
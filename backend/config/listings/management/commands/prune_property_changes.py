@@ -0,0 +1,13 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from listings.changes import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = "Delete change feed tombstones older than LISTINGS_CHANGES_TOMBSTONE_DAYS"
+
+    def handle(self, *args, **options):
+        deleted = prune_tombstones()
+        self.stdout.write(self.style.SUCCESS(
+            f"Pruned {deleted} tombstones older than {settings.LISTINGS_CHANGES_TOMBSTONE_DAYS} days."
+        ))
@@ -0,0 +1,60 @@
+import time
+from decimal import Decimal
+from django.core.management.base import BaseCommand, CommandError
+from listings.market import build_market_stats, save_market_stats
+from listings.models import LocationMarketStats
+
+
+class Command(BaseCommand):
+    help = "Rebuild LocationMarketStats from scratch, or verify it with --check"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only compare the stored stats with a fresh computation"
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=10000,
+            help="Rows fetched per database round trip"
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        fresh = build_market_stats(chunk_size=options["chunk_size"])
+
+        if options["check"]:
+            self.check_stats(fresh)
+            return
+
+        version = save_market_stats(fresh)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt market stats for {len(fresh)} locations "
+            f"(version {version}) in {time.perf_counter() - started:.2f}s."
+        ))
+
+    def check_stats(self, fresh):
+        stored = {
+            stats.location_key: stats
+            for stats in LocationMarketStats.objects.filter(count__gt=0)
+        }
+        drift = 0
+
+        for key in sorted(set(fresh) | set(stored)):
+            expected, actual = fresh.get(key), stored.get(key)
+            expected_values = (expected.count, expected.price_sum) if expected else (0, Decimal(0))
+            actual_values = (actual.count, actual.price_sum) if actual else (0, Decimal(0))
+            if expected_values != actual_values:
+                drift += 1
+                self.stderr.write(self.style.ERROR(
+                    f"{key!r}: stored count/sum {actual_values}, expected {expected_values}"
+                ))
+
+        if drift:
+            raise CommandError(f"Market stats drift in {drift} locations.")
+        self.stdout.write(self.style.SUCCESS(
+            f"Market stats match for {len(fresh)} locations."
+        ))
@@ -0,0 +1,185 @@
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from listings.market import reference_prices
+from listings.models import Property, normalize_location
+from listings.signals import properties_bulk_updated
+
+
+def score_chunk(prices, descriptions, market_averages):
+    """Score one chunk. Runs inside worker processes."""
+    from listings.utils import score_batch
+
+    return score_batch(prices, descriptions, market_averages).tolist()
+
+
+class Command(BaseCommand):
+    help = "Recompute distress_score for all (or filtered) properties in resumable chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Properties per primary-key range, scored and written together"
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Worker processes used for scoring"
+        )
+        parser.add_argument(
+            "--location",
+            type=str,
+            help="Only rescore properties in this location (case-insensitive)"
+        )
+        parser.add_argument(
+            "--since",
+            type=str,
+            help="Only rescore properties updated on or after this date/datetime (ISO 8601)"
+        )
+        parser.add_argument(
+            "--checkpoint",
+            type=str,
+            default="rescore_checkpoint.json",
+            help="File recording the last primary key written"
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Continue from the checkpoint left by an interrupted run"
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = max(options["chunk_size"], 1)
+        workers = max(options["workers"], 1)
+        checkpoint_path = Path(options["checkpoint"])
+        filters = {"location": options["location"], "since": options["since"]}
+
+        queryset = Property.objects.order_by("pk")
+        if options["location"]:
+            queryset = queryset.filter(location_key=normalize_location(options["location"]))
+        if options["since"]:
+            queryset = queryset.filter(updated_at__gte=self.parse_since(options["since"]))
+
+        state = {"last_pk": 0, "processed": 0, "updated": 0, "filters": filters}
+        if options["resume"] and checkpoint_path.exists():
+            saved = json.loads(checkpoint_path.read_text())
+            if saved.get("filters") != filters:
+                raise CommandError("Checkpoint was written with different --location/--since filters.")
+            state.update(saved)
+            self.stdout.write(self.style.WARNING(f"Resuming after pk {state['last_pk']}"))
+
+        market_averages = reference_prices()
+
+        started = time.perf_counter()
+        chunks = self.read_chunks(queryset, state["last_pk"], chunk_size, market_averages)
+        for rows, scores in self.score_chunks(chunks, workers):
+            now = timezone.now()
+            changed = [
+                Property(pk=pk, distress_score=score, updated_at=now)
+                for (pk, current), score in zip(rows, scores)
+                if current != score
+            ]
+
+            with transaction.atomic():
+                Property.objects.bulk_update(
+                    changed, ["distress_score", "updated_at"], batch_size=chunk_size
+                )
+            if changed:
+                properties_bulk_updated.send(
+                    sender=Property, instances=changed, fields=["distress_score", "updated_at"]
+                )
+
+            state["last_pk"] = rows[-1][0]
+            state["processed"] += len(rows)
+            state["updated"] += len(changed)
+            self.write_checkpoint(checkpoint_path, state)
+
+            self.stdout.write(
+                f"Rescored up to pk {state['last_pk']}: "
+                f"{state['processed']} processed, {state['updated']} updated"
+            )
+
+        elapsed = time.perf_counter() - started
+        checkpoint_path.unlink(missing_ok=True)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rescore complete: {state['updated']} of {state['processed']} properties updated "
+            f"in {elapsed:.2f}s."
+        ))
+
+    def parse_since(self, value):
+        since = parse_datetime(value)
+        if since is None:
+            day = parse_date(value)
+            if day is None:
+                raise CommandError(f"Invalid --since value: {value}")
+            since = datetime.combine(day, datetime.min.time())
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        return since
+
+    def read_chunks(self, queryset, last_pk, chunk_size, market_averages):
+        """
+        Yield ``(rows, payload)`` per primary-key range, where ``rows`` is a
+        list of ``(pk, current_score)`` and ``payload`` the scoring inputs.
+        """
+        while True:
+            chunk = list(
+                queryset
+                .filter(pk__gt=last_pk)
+                .values_list("pk", "distress_score", "price", "description", "location")[:chunk_size]
+                .iterator(chunk_size=chunk_size)
+            )
+            if not chunk:
+                return
+
+            last_pk = chunk[-1][0]
+            rows = [(pk, score) for pk, score, _, _, _ in chunk]
+            payload = (
+                [float(price) for _, _, price, _, _ in chunk],
+                [description for _, _, _, description, _ in chunk],
+                [market_averages.get(normalize_location(location), 0.0) for *_, location in chunk],
+            )
+            yield rows, payload
+
+    def score_chunks(self, chunks, workers):
+        """Score chunks in order, keeping at most two chunks per worker in flight."""
+        if workers == 1:
+            for rows, payload in chunks:
+                yield rows, score_chunk(*payload)
+            return
+
+        # Spawned, not forked: each worker sets Django up and opens its own
+        # database connections (e.g. for DISTRESS_KEYWORDS_SOURCE="db")
+        # instead of sharing the parent's socket.
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=django.setup,
+        ) as pool:
+            pending = deque()
+            for rows, payload in chunks:
+                pending.append((rows, pool.submit(score_chunk, *payload)))
+                if len(pending) >= workers * 2:
+                    rows, future = pending.popleft()
+                    yield rows, future.result()
+            while pending:
+                rows, future = pending.popleft()
+                yield rows, future.result()
+
+    def write_checkpoint(self, path, state):
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_text(json.dumps(state))
+        os.replace(tmp_path, path)
@@ -0,0 +1,251 @@
+"""
+Robust per-location market statistics.
+
+``compute_market_stats`` summarizes every location in one grouped pass:
+prices are sorted once by (location, price) with ``np.lexsort`` and the
+quartiles, median and trimmed mean of each location are read off the
+sorted array by group offsets, with no per-location Python loop. The
+same pass over the listings created in the trailing window (90 days by
+default) gives the recent statistics.
+
+The results are stored on ``LocationMarketStats`` by the
+``rebuild_market_stats`` command, each run stamping a new
+``stats_version``. ``count``, ``price_sum`` and ``mean_price`` stay
+incrementally maintained; the robust columns only change on a rebuild,
+so lookups of them are cached per version.
+
+``LISTINGS_MARKET_PRICE_STRATEGY`` picks the reference price used for
+price-deviation scoring: ``"mean"`` (default), ``"median"``,
+``"trimmed_mean"`` or ``"recent_median"``. Locations without a robust
+value yet (added since the last rebuild) fall back to the mean.
+"""
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .cache import get_cache
+
+# Part of every cache key: bump when the statistics change meaning
+ENGINE_VERSION = 1
+VERSION_KEY = "listings:market:version"
+
+STRATEGIES = {
+    "mean": "mean_price",
+    "median": "median_price",
+    "trimmed_mean": "trimmed_mean_price",
+    "recent_median": "recent_median_price",
+}
+
+
+# =========================
+# ENGINE
+# =========================
+
+def _summarize(codes, prices, groups, trim):
+    """Per-group count, quartiles and trimmed mean for integer group ``codes``."""
+    counts = np.bincount(codes, minlength=groups)
+    if not len(prices):
+        missing = np.full(groups, np.nan)
+        return counts, missing, missing, missing, missing
+
+    order = np.lexsort((prices, codes))
+    values, codes = prices[order], codes[order]
+    starts = np.cumsum(counts) - counts
+    last = np.maximum(counts - 1, 0)
+    end = len(values) - 1
+
+    def quantile(q):
+        # Linear interpolation between closest ranks ("inclusive" method)
+        position = last * q
+        low = np.floor(position).astype(np.int64)
+        high = np.minimum(low + 1, last)
+        fraction = position - low
+        result = (
+            values[np.minimum(starts + low, end)] * (1 - fraction)
+            + values[np.minimum(starts + high, end)] * fraction
+        )
+        return np.where(counts > 0, result, np.nan)
+
+    # Drop the lowest and highest ``trim`` share of each location
+    cut = np.floor(counts * trim).astype(np.int64)
+    rank = np.arange(len(values)) - starts[codes]
+    keep = (rank >= cut[codes]) & (rank < (counts - cut)[codes])
+    kept = np.bincount(codes[keep], minlength=groups)
+    sums = np.bincount(codes[keep], weights=values[keep], minlength=groups)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        trimmed = np.where(kept > 0, sums / kept, np.nan)
+
+    return counts, quantile(0.25), quantile(0.5), quantile(0.75), trimmed
+
+
+def compute_market_stats(frame, as_of=None, trim=0.1, window_days=90):
+    """
+    Summarize a DataFrame of listings (``location_key``, ``price``,
+    ``created_at``) into one row per location, indexed by
+    ``location_key``. ``as_of`` (default now) ends the recent window.
+    """
+    as_of = pd.Timestamp.now(tz="UTC") if as_of is None else pd.Timestamp(as_of)
+    codes, keys = pd.factorize(frame["location_key"], sort=True)
+    prices = frame["price"].to_numpy(dtype=float)
+    recent = (frame["created_at"] >= as_of - pd.Timedelta(days=window_days)).to_numpy()
+
+    count, p25, median, p75, trimmed = _summarize(codes, prices, len(keys), trim)
+    recent_count, _, recent_median, _, recent_trimmed = _summarize(
+        codes[recent], prices[recent], len(keys), trim
+    )
+    return pd.DataFrame(
+        {
+            "count": count,
+            "p25_price": p25,
+            "median_price": median,
+            "p75_price": p75,
+            "trimmed_mean_price": trimmed,
+            "recent_count": recent_count,
+            "recent_median_price": recent_median,
+            "recent_trimmed_mean_price": recent_trimmed,
+        },
+        index=pd.Index(keys, name="location_key"),
+    )
+
+
+# =========================
+# STORAGE
+# =========================
+
+def load_market_frame(queryset=None, chunk_size=10000):
+    """
+    Read the listings into a DataFrame; prices also as exact integer cents.
+    Flagged near-duplicates are left out.
+    """
+    from .models import Property  # ✅ lazy import
+
+    if queryset is None:
+        queryset = Property.objects.filter(duplicate_of__isnull=True)
+    rows = (
+        queryset
+        .order_by()
+        .values_list("location_key", "price", "created_at")
+        .iterator(chunk_size=chunk_size)
+    )
+    frame = pd.DataFrame.from_records(rows, columns=["location_key", "price", "created_at"])
+    frame["price_cents"] = frame["price"].map(lambda price: int(price.scaleb(2))).astype("int64")
+    frame["price"] = frame["price_cents"] / 100
+    frame["created_at"] = pd.to_datetime(frame["created_at"], utc=True)
+    return frame
+
+
+def _optional(value):
+    return None if np.isnan(value) else float(value)
+
+
+def build_market_stats(as_of=None, chunk_size=10000):
+    """Fresh, unsaved ``LocationMarketStats`` per location, keyed by location."""
+    from .models import LocationMarketStats  # ✅ lazy import
+
+    frame = load_market_frame(chunk_size=chunk_size)
+    stats = compute_market_stats(
+        frame,
+        as_of=as_of,
+        trim=settings.LISTINGS_MARKET_TRIM,
+        window_days=settings.LISTINGS_MARKET_WINDOW_DAYS,
+    )
+    sums = frame.groupby("location_key")["price_cents"].sum()
+
+    fresh = {}
+    for key, row in stats.iterrows():
+        price_sum = Decimal(int(sums[key])).scaleb(-2)
+        fresh[key] = LocationMarketStats(
+            location_key=key,
+            count=int(row["count"]),
+            price_sum=price_sum,
+            mean_price=float(price_sum / int(row["count"])),
+            p25_price=_optional(row["p25_price"]),
+            median_price=_optional(row["median_price"]),
+            p75_price=_optional(row["p75_price"]),
+            trimmed_mean_price=_optional(row["trimmed_mean_price"]),
+            recent_count=int(row["recent_count"]),
+            recent_median_price=_optional(row["recent_median_price"]),
+            recent_trimmed_mean_price=_optional(row["recent_trimmed_mean_price"]),
+        )
+    return fresh
+
+
+def save_market_stats(fresh):
+    """Replace the stored stats with ``fresh`` under a new version; returns it."""
+    from .models import LocationMarketStats  # ✅ lazy import
+
+    with transaction.atomic():
+        version = (LocationMarketStats.objects.aggregate(v=Max("stats_version"))["v"] or 0) + 1
+        now = timezone.now()
+        for stats in fresh.values():
+            stats.stats_version = version
+            stats.stats_computed_at = now
+        LocationMarketStats.objects.all().delete()
+        LocationMarketStats.objects.bulk_create(fresh.values(), batch_size=1000)
+        transaction.on_commit(lambda: get_cache().set(VERSION_KEY, version, timeout=None))
+    return version
+
+
+# =========================
+# LOOKUPS
+# =========================
+
+def get_strategy(strategy=None):
+    strategy = strategy or settings.LISTINGS_MARKET_PRICE_STRATEGY
+    if strategy not in STRATEGIES:
+        raise ValueError(
+            f"Unknown market price strategy {strategy!r}; expected one of {sorted(STRATEGIES)}"
+        )
+    return strategy
+
+
+def current_version():
+    from .models import LocationMarketStats  # ✅ lazy import
+
+    version = get_cache().get(VERSION_KEY)
+    if version is None:
+        version = LocationMarketStats.objects.aggregate(v=Max("stats_version"))["v"] or 0
+        get_cache().add(VERSION_KEY, version, timeout=None)
+    return version
+
+
+def robust_prices(strategy=None):
+    """
+    ``{location_key: price}`` of a rebuild-only strategy, cached per stats
+    version (empty for ``"mean"``, which changes on every write).
+    """
+    from .models import LocationMarketStats  # ✅ lazy import
+
+    strategy = get_strategy(strategy)
+    if strategy == "mean":
+        return {}
+
+    column = STRATEGIES[strategy]
+    key = f"listings:market:{ENGINE_VERSION}:{strategy}:v{current_version()}"
+    prices = get_cache().get(key)
+    if prices is None:
+        prices = dict(
+            LocationMarketStats.objects
+            .filter(count__gt=0, **{f"{column}__isnull": False})
+            .values_list("location_key", column)
+        )
+        get_cache().set(key, prices, timeout=settings.LISTINGS_MARKET_CACHE_TIMEOUT)
+    return prices
+
+
+def reference_prices(strategy=None):
+    """``{location_key: reference price}`` for every location with listings."""
+    from .models import LocationMarketStats  # ✅ lazy import
+
+    prices = dict(
+        LocationMarketStats.objects
+        .filter(count__gt=0)
+        .values_list("location_key", "mean_price")
+    )
+    prices.update(robust_prices(strategy))
+    return prices
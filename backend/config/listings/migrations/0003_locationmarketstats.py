@@ -0,0 +1,55 @@
+# Generated by Django 6.0 on 2026-10-18 15:45
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def seed_market_stats(apps, schema_editor):
+    Property = apps.get_model('listings', 'Property')
+    LocationMarketStats = apps.get_model('listings', 'LocationMarketStats')
+
+    totals = defaultdict(lambda: [0, Decimal(0)])
+    for location, price in Property.objects.values_list('location', 'price').iterator():
+        entry = totals[(location or '').strip().lower()]
+        entry[0] += 1
+        entry[1] += price
+
+    LocationMarketStats.objects.bulk_create([
+        LocationMarketStats(
+            location_key=key,
+            count=count,
+            price_sum=price_sum,
+            mean_price=float(price_sum / count),
+        )
+        for key, (count, price_sum) in totals.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0002_alter_favorite_property_alter_favorite_user_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LocationMarketStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('location_key', models.CharField(max_length=255, unique=True)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('price_sum', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('mean_price', models.FloatField(default=0.0)),
+                ('p25_price', models.FloatField(blank=True, null=True)),
+                ('median_price', models.FloatField(blank=True, null=True)),
+                ('p75_price', models.FloatField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'location market stats',
+            },
+        ),
+        migrations.RunPython(seed_market_stats, migrations.RunPython.noop),
+    ]
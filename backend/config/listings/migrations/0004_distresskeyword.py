@@ -0,0 +1,24 @@
+# Generated by Django 6.0 on 2026-10-18 15:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0003_locationmarketstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DistressKeyword',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('phrase', models.CharField(max_length=255, unique=True)),
+                ('weight', models.FloatField(default=1.0)),
+                ('language', models.CharField(default='en', max_length=10)),
+                ('is_active', models.BooleanField(default=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
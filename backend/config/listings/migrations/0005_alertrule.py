@@ -0,0 +1,62 @@
+# Generated by Django 6.0 on 2026-10-18 15:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_default_rules(apps, schema_editor):
+    # Keep the old behaviour (alert on score >= 5 anywhere) for existing users
+    NotificationPreference = apps.get_model('listings', 'NotificationPreference')
+    AlertRule = apps.get_model('listings', 'AlertRule')
+
+    user_ids = NotificationPreference.objects.values_list('user_id', flat=True).distinct()
+    AlertRule.objects.bulk_create(
+        [AlertRule(user_id=user_id, min_distress_score=5.0) for user_id in user_ids],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0004_distresskeyword'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlertRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('min_distress_score', models.FloatField(default=5.0)),
+                ('min_price', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('max_price', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('any_location', models.BooleanField(default=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alert_rules', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AlertRuleLocation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('location_key', models.CharField(max_length=255)),
+                ('rule', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='locations', to='listings.alertrule')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='alertrule',
+            index=models.Index(fields=['is_active', 'any_location', 'min_distress_score'], name='alertrule_match_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='alertrulelocation',
+            index=models.Index(fields=['location_key', 'rule'], name='alertrule_location_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='alertrulelocation',
+            unique_together={('rule', 'location_key')},
+        ),
+        migrations.RunPython(create_default_rules, migrations.RunPython.noop),
+    ]
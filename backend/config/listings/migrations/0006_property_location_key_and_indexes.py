@@ -0,0 +1,95 @@
+# Generated by Django 6.0 on 2026-10-18 15:52
+
+from django.db import migrations, models
+
+
+def backfill_location_key(apps, schema_editor):
+    Property = apps.get_model('listings', 'Property')
+
+    batch = []
+    for prop in Property.objects.only('id', 'location').iterator(chunk_size=2000):
+        prop.location_key = (prop.location or '').strip().lower()
+        batch.append(prop)
+        if len(batch) >= 2000:
+            Property.objects.bulk_update(batch, ['location_key'])
+            batch = []
+    Property.objects.bulk_update(batch, ['location_key'])
+
+
+def rename_duplicate_listings(apps, schema_editor):
+    """
+    Make (title, location_key) unique without deleting anything: the
+    oldest listing of each group keeps its title, the others are renamed
+    "<title> (duplicate <id>)" and their favorites move to the oldest
+    one where the user has not favorited it already.
+    """
+    Property = apps.get_model('listings', 'Property')
+    Favorite = apps.get_model('listings', 'Favorite')
+
+    duplicate_groups = (
+        Property.objects
+        .values('title', 'location_key')
+        .annotate(first_id=models.Min('id'), total=models.Count('id'))
+        .filter(total__gt=1)
+    )
+    for group in duplicate_groups:
+        duplicates = list(
+            Property.objects
+            .filter(title=group['title'], location_key=group['location_key'])
+            .exclude(id=group['first_id'])
+            .only('id', 'title')
+        )
+        kept_by = set(
+            Favorite.objects.filter(property_id=group['first_id']).values_list('user_id', flat=True)
+        )
+        for favorite in Favorite.objects.filter(property__in=duplicates).order_by('id'):
+            if favorite.user_id not in kept_by:
+                kept_by.add(favorite.user_id)
+                favorite.property_id = group['first_id']
+                favorite.save(update_fields=['property'])
+
+        for prop in duplicates:
+            suffix = f" (duplicate {prop.id})"
+            prop.title = prop.title[:255 - len(suffix)] + suffix
+        Property.objects.bulk_update(duplicates, ['title'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0005_alertrule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='location_key',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(backfill_location_key, migrations.RunPython.noop),
+        migrations.RunPython(rename_duplicate_listings, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['location', 'created_at', 'id'], name='property_location_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['location_key', 'created_at'], name='property_lockey_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['created_at', 'id'], name='property_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['price', 'id'], name='property_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['distress_score', 'id'], name='property_score_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='property',
+            constraint=models.UniqueConstraint(fields=('title', 'location_key'), name='unique_property_title_location'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0 on 2026-10-18 17:05
+
+from django.db import migrations
+
+from listings.search import install_search_index, uninstall_search_index
+
+
+def create_search_index(apps, schema_editor):
+    install_search_index(schema_editor)
+
+
+def drop_search_index(apps, schema_editor):
+    uninstall_search_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0006_property_location_key_and_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 6.0 on 2026-10-18 18:40
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from listings.search import install_search_index
+
+
+def backfill_favorite_count(apps, schema_editor):
+    Property = apps.get_model('listings', 'Property')
+    Favorite = apps.get_model('listings', 'Favorite')
+
+    counts = (
+        Favorite.objects
+        .filter(property=OuterRef('pk'))
+        .order_by()
+        .values('property')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    Property.objects.filter(favorited_by__isnull=False).update(
+        favorite_count=Coalesce(Subquery(counts), 0)
+    )
+
+
+def reinstall_search_index(apps, schema_editor):
+    # Adding a NOT NULL column rebuilds listings_property on SQLite,
+    # which drops the full-text search triggers
+    install_search_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0008_csvimportjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='favorite_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_favorite_count, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['favorite_count', 'id'], name='property_favorites_idx'),
+        ),
+        migrations.RunPython(reinstall_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 6.0 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0009_property_favorite_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='locationmarketstats',
+            name='recent_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='locationmarketstats',
+            name='recent_median_price',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='locationmarketstats',
+            name='recent_trimmed_mean_price',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='locationmarketstats',
+            name='stats_computed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='locationmarketstats',
+            name='stats_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='locationmarketstats',
+            name='trimmed_mean_price',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 6.0 on 2026-10-18 21:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0010_locationmarketstats_robust'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingSignature',
+            fields=[
+                ('property', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='signature', serialize=False, to='listings.property')),
+                ('signature', models.BinaryField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='listings.property'),
+        ),
+        migrations.CreateModel(
+            name='ListingBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.BigIntegerField()),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lsh_buckets', to='listings.property')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['bucket', 'property'], name='listingbucket_lookup_idx')],
+            },
+        ),
+    ]
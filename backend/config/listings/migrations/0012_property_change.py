@@ -0,0 +1,37 @@
+# Generated by Django 6.0 on 2026-10-18 17:30
+
+from django.db import migrations, models
+
+
+def backfill_created(apps, schema_editor):
+    # Existing listings enter the feed as created, oldest first
+    Property = apps.get_model('listings', 'Property')
+    PropertyChange = apps.get_model('listings', 'PropertyChange')
+    qn = schema_editor.quote_name
+    schema_editor.execute(
+        f"INSERT INTO {qn(PropertyChange._meta.db_table)} (property_id, kind, changed_at) "
+        f"SELECT id, 'created', created_at FROM {qn(Property._meta.db_table)} ORDER BY id"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0011_dedupe'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertyChange',
+            fields=[
+                ('seq', models.BigAutoField(primary_key=True, serialize=False)),
+                ('property_id', models.BigIntegerField()),
+                ('kind', models.CharField(choices=[('created', 'Created'), ('updated', 'Updated'), ('deleted', 'Deleted')], max_length=10)),
+                ('changed_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['property_id', 'kind'], name='propertychange_property_idx'), models.Index(fields=['kind', 'changed_at'], name='propertychange_kind_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_created, migrations.RunPython.noop),
+    ]
@@ -1,21 +1,216 @@
-from django.db import models
+from decimal import Decimal
+from django.db import models, transaction
 from django.conf import settings
 
 
+def normalize_location(location):
+    """Key used to group listings by location (trimmed, case-folded)."""
+    return (location or "").strip().lower()
+
+
 class Property(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField()
     location = models.CharField(max_length=255)
+    # normalize_location(location), kept in sync by save(); bulk loaders set it explicitly
+    location_key = models.CharField(max_length=255, default="", editable=False)
     price = models.DecimalField(max_digits=12, decimal_places=2)
     distress_score = models.FloatField(default=0.0)
     source = models.CharField(max_length=50, default="manual")
+    # Denormalized Favorite count, adjusted with F() by the Favorite signals
+    favorite_count = models.PositiveIntegerField(default=0, editable=False)
+    # Earliest listing of this listing's near-duplicate cluster (see listings.dedupe)
+    duplicate_of = models.ForeignKey(
+        "self",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="duplicates"
+    )
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["title", "location_key"],
+                name="unique_property_title_location",
+            ),
+        ]
+        indexes = [
+            # location filter + default ordering
+            models.Index(fields=["location", "created_at", "id"], name="property_location_created_idx"),
+            # per-location scans (market stats, rescoring)
+            models.Index(fields=["location_key", "created_at"], name="property_lockey_created_idx"),
+            # keyset pagination on each ordering field
+            models.Index(fields=["created_at", "id"], name="property_created_idx"),
+            models.Index(fields=["price", "id"], name="property_price_idx"),
+            models.Index(fields=["distress_score", "id"], name="property_score_idx"),
+            models.Index(fields=["favorite_count", "id"], name="property_favorites_idx"),
+        ]
+
     def __str__(self):
         return f"{self.title} - {self.location}"
 
+    def save(self, *args, **kwargs):
+        self.location_key = normalize_location(self.location)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "location" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "location_key"}
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def duplicate_exists(cls, title, location, exclude_pk=None):
+        """Whether another listing already uses this title in this location."""
+        duplicates = cls.objects.filter(title=title, location_key=normalize_location(location))
+        if exclude_pk is not None:
+            duplicates = duplicates.exclude(pk=exclude_pk)
+        return duplicates.exists()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what is stored so save/delete can adjust market stats
+        if {"location", "price", "duplicate_of_id"} <= set(field_names):
+            instance._loaded_market_values = instance.market_values()
+        # ... and the analytics rollups
+        if {"location_key", "created_at", "price", "distress_score"} <= set(field_names):
+            instance._loaded_rollup_values = instance.rollup_values()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        if fields is None:
+            # The reloaded snapshots are not copied over; the next save re-reads the row
+            self.__dict__.pop("_loaded_market_values", None)
+            self._loaded_rollup_values = None
+
+    def rollup_values(self):
+        """``(location_key, created_at, price, distress_score)`` counted in analytics rollups."""
+        return (self.location_key, self.created_at, self.price, self.distress_score)
+
+    def market_values(self):
+        """``(location_key, price)`` counted in market stats, or None for a duplicate."""
+        if self.duplicate_of_id:
+            return None
+        price = Decimal(str(self.price)).quantize(Decimal("0.01"))
+        return (normalize_location(self.location), price)
+
+
+class LocationMarketStats(models.Model):
+    """
+    Materialized price statistics per normalized location.
+
+    ``count``, ``price_sum`` and ``mean_price`` are kept up to date
+    incrementally whenever a property is saved, bulk-created or deleted.
+    Percentiles, the trimmed mean and the recent-window figures are
+    refreshed by the ``rebuild_market_stats`` command (see
+    ``listings.market``), which stamps them with ``stats_version``.
+    """
+    location_key = models.CharField(max_length=255, unique=True)
+    count = models.PositiveIntegerField(default=0)
+    price_sum = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    mean_price = models.FloatField(default=0.0)
+    p25_price = models.FloatField(null=True, blank=True)
+    median_price = models.FloatField(null=True, blank=True)
+    p75_price = models.FloatField(null=True, blank=True)
+    trimmed_mean_price = models.FloatField(null=True, blank=True)
+
+    # Listings created in the trailing LISTINGS_MARKET_WINDOW_DAYS
+    recent_count = models.PositiveIntegerField(default=0)
+    recent_median_price = models.FloatField(null=True, blank=True)
+    recent_trimmed_mean_price = models.FloatField(null=True, blank=True)
+
+    stats_version = models.PositiveIntegerField(default=0)
+    stats_computed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "location market stats"
+
+    def __str__(self):
+        return f"{self.location_key} - {self.count} listings @ {self.mean_price:.2f}"
+
+    @classmethod
+    def apply_deltas(cls, deltas):
+        """
+        Apply ``{location_key: (count_delta, price_sum_delta)}`` changes.
+        """
+        with transaction.atomic():
+            for location_key, (count, price_sum) in deltas.items():
+                if not count and not price_sum:
+                    continue
+
+                stats, _ = (
+                    cls.objects
+                    .select_for_update()
+                    .get_or_create(location_key=location_key)
+                )
+                stats.count = max(stats.count + count, 0)
+                stats.price_sum += price_sum
+                stats.mean_price = float(stats.price_sum / stats.count) if stats.count else 0.0
+                stats.save(update_fields=["count", "price_sum", "mean_price", "updated_at"])
+
+
+class PropertyChange(models.Model):
+    """
+    One entry of the property change feed (see ``listings.changes``).
+
+    A listing has at most one ``created`` and one ``updated`` entry; an
+    update moves its ``updated`` entry to a new ``seq``, and a delete
+    replaces both with a ``deleted`` tombstone.
+    """
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+    KIND_CHOICES = [(CREATED, "Created"), (UPDATED, "Updated"), (DELETED, "Deleted")]
+
+    seq = models.BigAutoField(primary_key=True)
+    # Not a foreign key: tombstones outlive their listing
+    property_id = models.BigIntegerField()
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["property_id", "kind"], name="propertychange_property_idx"),
+            # tombstone pruning
+            models.Index(fields=["kind", "changed_at"], name="propertychange_kind_idx"),
+        ]
+
+    def __str__(self):
+        return f"#{self.seq} {self.kind} {self.property_id}"
+
+
+class ListingSignature(models.Model):
+    """MinHash signature of a listing's title and description."""
+    property = models.OneToOneField(
+        Property,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="signature"
+    )
+    # NUM_PERM little-endian uint32 values
+    signature = models.BinaryField()
+
+    def __str__(self):
+        return f"signature of {self.property_id}"
+
+
+class ListingBucket(models.Model):
+    """LSH bucket of one band of a listing's signature."""
+    bucket = models.BigIntegerField()
+    property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name="lsh_buckets")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["bucket", "property"], name="listingbucket_lookup_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.bucket} -> {self.property_id}"
+
 
 class Favorite(models.Model):
     user = models.ForeignKey(
@@ -37,6 +232,21 @@ class Favorite(models.Model):
         return f"{self.user.username} - {self.property.title}"
 
 
+class DistressKeyword(models.Model):
+    """
+    Distress phrase and its weight, used when
+    ``settings.DISTRESS_KEYWORDS_SOURCE == "db"``.
+    """
+    phrase = models.CharField(max_length=255, unique=True)
+    weight = models.FloatField(default=1.0)
+    language = models.CharField(max_length=10, default="en")
+    is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.phrase} ({self.weight})"
+
+
 class NotificationPreference(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -49,3 +259,117 @@ class NotificationPreference(models.Model):
 
     def __str__(self):
         return f"{self.user.username} - Email: {self.email_alert} | SMS: {self.sms_alert}"
+
+
+class AlertRule(models.Model):
+    """
+    A user's alert criteria. A listing matches when its distress score
+    and price fall inside the rule's bounds and its location is one of
+    the rule's locations (or the rule covers any location).
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="alert_rules"
+    )
+    min_distress_score = models.FloatField(default=5.0)
+    min_price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    max_price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    any_location = models.BooleanField(default=True)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["is_active", "any_location", "min_distress_score"],
+                name="alertrule_match_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - score >= {self.min_distress_score}"
+
+    @classmethod
+    def matching(cls, property_obj):
+        """Active rules that ``property_obj`` satisfies, found via indexed lookups."""
+        location_rules = AlertRuleLocation.objects.filter(
+            location_key=normalize_location(property_obj.location)
+        ).values("rule_id")
+
+        return cls.objects.filter(
+            models.Q(any_location=True) | models.Q(id__in=location_rules),
+            models.Q(min_price__isnull=True) | models.Q(min_price__lte=property_obj.price),
+            models.Q(max_price__isnull=True) | models.Q(max_price__gte=property_obj.price),
+            is_active=True,
+            min_distress_score__lte=property_obj.distress_score,
+        )
+
+
+class AlertRuleLocation(models.Model):
+    rule = models.ForeignKey(AlertRule, on_delete=models.CASCADE, related_name="locations")
+    location_key = models.CharField(max_length=255)
+
+    class Meta:
+        unique_together = ("rule", "location_key")
+        indexes = [
+            models.Index(fields=["location_key", "rule"], name="alertrule_location_idx"),
+        ]
+
+    def __str__(self):
+        return self.location_key
+
+
+class CSVImportJob(models.Model):
+    """
+    A CSV upload waiting for, or being processed by, the
+    process_csv_imports worker. ``rows_processed`` is committed together
+    with each chunk of imported rows, so it doubles as the resume point
+    after a crash.
+    """
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("running", "Running"),
+        ("completed", "Completed"),
+        ("failed", "Failed"),
+    ]
+
+    uploaded_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="csv_import_jobs"
+    )
+    file = models.FileField(upload_to="csv_imports/%Y/%m/")
+    original_name = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    batch_size = models.PositiveIntegerField(default=1000)
+
+    rows_processed = models.PositiveIntegerField(default=0)
+    rows_created = models.PositiveIntegerField(default=0)
+    rows_rejected = models.PositiveIntegerField(default=0)
+    rows_duplicate = models.PositiveIntegerField(default=0)
+    processing_seconds = models.FloatField(default=0.0)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Workers push this forward after every chunk; a running job whose
+    # heartbeat is older than the lease is treated as crashed and resumed
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "heartbeat_at"], name="csvimportjob_claim_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.original_name or self.file.name} ({self.status})"
+
+    @property
+    def rows_per_sec(self):
+        if not self.processing_seconds:
+            return 0.0
+        return round(self.rows_processed / self.processing_seconds, 1)
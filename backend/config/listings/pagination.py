@@ -0,0 +1,174 @@
+import base64
+import json
+from types import SimpleNamespace
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import Http404
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset ("seek") pagination on ``(<ordering field>, id)``.
+
+    Each page is fetched with ``WHERE (field, id) < (last_field, last_id)``
+    instead of ``OFFSET``, so page 10,000 costs the same as page 1. The
+    ordering field comes from ``?ordering=`` (restricted to the view's
+    ``ordering_fields``), or is the search rank when the queryset was
+    narrowed by a full-text search. Cursors are opaque base64 tokens.
+    """
+    page_size = 50
+    max_page_size = 500
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    ordering_query_param = "ordering"
+    default_ordering = "-created_at"
+    rank_annotation = "search_rank"
+
+    def get_ordering(self, request, queryset, view):
+        allowed = getattr(view, "ordering_fields", None) or []
+        requested = request.query_params.get(self.ordering_query_param, "")
+        ordering = requested.split(",")[0].strip()
+        if ordering.lstrip("-") in allowed:
+            return ordering
+        if self.rank_annotation in queryset.query.annotations:
+            return f"-{self.rank_annotation}"
+        return getattr(view, "keyset_default_ordering", self.default_ordering)
+
+    def get_output_field(self, queryset):
+        if self.field in queryset.query.annotations:
+            return queryset.query.annotations[self.field].output_field
+        return queryset.model._meta.get_field(self.field)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, obj, reverse):
+        value = getattr(obj, self.field)
+        payload = {
+            "o": self.ordering,
+            "v": value.isoformat() if hasattr(value, "isoformat") else str(value),
+            "id": obj.pk,
+            "r": reverse,
+        }
+        token = base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode())
+        return token.decode().rstrip("=")
+
+    def decode_cursor(self, queryset, token):
+        try:
+            token += "=" * (-len(token) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+            if payload["o"] != self.ordering:
+                raise ValueError("cursor ordering mismatch")
+            payload["v"] = self.get_output_field(queryset).to_python(payload["v"])
+            return payload
+        except (ValueError, KeyError, TypeError, ValidationError):
+            raise NotFound("Invalid cursor.")
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """The ordered, cursor-filtered queryset holding the page (plus one row)."""
+        self.request = request
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.field = self.ordering.lstrip("-")
+        self.size = self.get_page_size(request)
+
+        token = request.query_params.get(self.cursor_query_param)
+        self.cursor = self.decode_cursor(queryset, token) if token else None
+        self.reverse = bool(self.cursor and self.cursor["r"])
+
+        # Walking backwards (previous page) flips the sort and the comparison
+        descending = self.ordering.startswith("-") != self.reverse
+        prefix = "-" if descending else ""
+        queryset = queryset.order_by(f"{prefix}{self.field}", f"{prefix}pk")
+
+        if self.cursor:
+            lookup = "lt" if descending else "gt"
+            value = self.cursor["v"]
+            # The redundant inclusive bound lets the database seek on the
+            # (field, id) index instead of filtering from the start.
+            queryset = queryset.filter(
+                Q(**{f"{self.field}__{lookup}e": value}),
+                Q(**{f"{self.field}__{lookup}": value})
+                | Q(**{self.field: value, f"pk__{lookup}": self.cursor["id"]}),
+            )
+        return queryset[:self.size + 1]
+
+    def get_page(self, rows):
+        has_more = len(rows) > self.size
+        rows = rows[:self.size]
+        if self.reverse:
+            rows.reverse()
+
+        has_next = has_more if not self.reverse else True
+        has_previous = self.cursor is not None if not self.reverse else has_more
+
+        self.next_cursor = self.encode_cursor(rows[-1], False) if rows and has_next else None
+        self.previous_cursor = self.encode_cursor(rows[0], True) if rows and has_previous else None
+        return rows
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.get_page(list(self.get_page_queryset(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return self.get_page([obj async for obj in self.get_page_queryset(queryset, request, view)])
+
+    def get_link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_link(self.next_cursor),
+            "previous": self.get_link(self.previous_cursor),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class TemplateKeysetPagination(KeysetPagination):
+    """
+    ``KeysetPagination`` for plain Django views rendering HTML. There is
+    no COUNT and no page number, only "next"; an invalid cursor is a 404.
+    """
+    page_size = 25
+    max_page_size = 100
+
+    def __init__(self, ordering_fields, default_ordering=KeysetPagination.default_ordering):
+        self.view = SimpleNamespace(ordering_fields=ordering_fields, keyset_default_ordering=default_ordering)
+
+    def paginate(self, queryset, request):
+        try:
+            return self.paginate_queryset(queryset, Request(request), self.view)
+        except NotFound as exc:
+            raise Http404(exc.detail)
+
+    def get_page_url(self, path):
+        """``path`` with the current query string and the next page's cursor, or None."""
+        if self.next_cursor is None:
+            return None
+        url = f"{path}?{self.request.query_params.urlencode()}"
+        if self.field in self.view.ordering_fields:
+            # Spell out the ordering so the cursor matches whichever view serves the link
+            url = replace_query_param(url, self.ordering_query_param, self.ordering)
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
@@ -0,0 +1,259 @@
+"""
+Full-text search over property titles and descriptions.
+
+``search_properties(queryset, query)`` narrows a Property queryset to the
+listings matching ``query`` and annotates each with ``search_rank``
+(higher is more relevant). The work is done by a backend chosen from
+``settings.LISTINGS_SEARCH_BACKEND``, or from the database vendor when
+that is ``None``:
+
+* SQLite: an FTS5 external-content table (``listings_property_fts``)
+  kept in sync by triggers, ranked with bm25.
+* PostgreSQL: a generated ``search_vector`` tsvector column with a GIN
+  index, ranked with ``ts_rank_cd``.
+* Anything else, or an index that is missing: ``icontains`` on every
+  term, unranked.
+
+The index structures are created by ``install_search_index`` (migration
+0007) and maintained by the database itself, so saves, bulk loads and
+deletes need no extra work. SQLite drops triggers when a migration
+rebuilds ``listings_property``, so such migrations must call
+``install_search_index`` again; it is idempotent.
+"""
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.utils import OperationalError
+from django.utils.module_loading import import_string
+from rest_framework.filters import BaseFilterBackend
+
+FTS_TABLE = "listings_property_fts"
+TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+SQLITE_INSTALL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, description,
+        content='listings_property', content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON listings_property BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON listings_property BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, description
+    ON listings_property BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_UNINSTALL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+POSTGRES_INSTALL = [
+    """
+    ALTER TABLE listings_property ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS property_search_vector_idx
+    ON listings_property USING GIN (search_vector)
+    """,
+]
+
+POSTGRES_UNINSTALL = [
+    "DROP INDEX IF EXISTS property_search_vector_idx",
+    "ALTER TABLE listings_property DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def install_search_index(schema_editor):
+    """Create (or repair) the vendor's search index for listings_property."""
+    vendor = schema_editor.connection.vendor
+    statements = {"sqlite": SQLITE_INSTALL, "postgresql": POSTGRES_INSTALL}.get(vendor, [])
+    try:
+        for statement in statements:
+            schema_editor.execute(statement)
+    except OperationalError:
+        if vendor != "sqlite":
+            raise
+        # SQLite built without FTS5: searches fall back to icontains
+
+
+def uninstall_search_index(schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = {"sqlite": SQLITE_UNINSTALL, "postgresql": POSTGRES_UNINSTALL}.get(vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def search_terms(query):
+    return TERM_RE.findall((query or "").lower())
+
+
+class BaseSearchBackend:
+    def __init__(self, alias="default"):
+        self.alias = alias
+
+    def search(self, queryset, query):
+        raise NotImplementedError
+
+
+# =========================
+# BACKENDS
+# =========================
+
+class LikeSearchBackend(BaseSearchBackend):
+    """Every term must appear in the title or description. No index, no rank."""
+
+    def search(self, queryset, query):
+        for term in search_terms(query):
+            queryset = queryset.filter(Q(title__icontains=term) | Q(description__icontains=term))
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """
+    FTS5 with prefix matching on every term, so "forecl" finds
+    "foreclosure". Falls back to ``LikeSearchBackend`` when SQLite was
+    built without FTS5 and the migration skipped the table.
+    """
+
+    def is_available(self):
+        if not hasattr(self, "_available"):
+            with connections[self.alias].cursor() as cursor:
+                tables = connections[self.alias].introspection.table_names(cursor)
+            self._available = FTS_TABLE in tables
+        return self._available
+
+    def match_expression(self, query):
+        return " ".join(f'"{term}"*' for term in search_terms(query))
+
+    def search(self, queryset, query):
+        if not self.is_available():
+            return LikeSearchBackend(self.alias).search(queryset, query)
+
+        match = self.match_expression(query)
+        table = queryset.model._meta.db_table
+        matches = RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match])
+        # Rank every match in one pass and look each row up in that result.
+        # Matching per row (MATCH ... AND rowid = id) re-runs the query for
+        # every match; LIMIT -1 keeps SQLite from flattening it back into that.
+        rank = RawSQL(
+            f"SELECT rank FROM (SELECT rowid AS id, -bm25({FTS_TABLE}) AS rank "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s LIMIT -1) "
+            f'WHERE id = "{table}"."id"',
+            [match],
+            output_field=FloatField(),
+        )
+        return queryset.filter(id__in=matches).annotate(search_rank=rank)
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    ``websearch_to_tsquery`` against the GIN-indexed ``search_vector``
+    column, so quoted phrases, ``or`` and ``-term`` work as users expect.
+    """
+    config = "english"
+
+    def search(self, queryset, query):
+        table = queryset.model._meta.db_table
+        tsquery = "websearch_to_tsquery(%s::regconfig, %s)"
+        return queryset.filter(
+            id__in=RawSQL(
+                f"SELECT id FROM {table} WHERE search_vector @@ {tsquery}",
+                [self.config, query],
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                f'ts_rank_cd("{table}"."search_vector", {tsquery})',
+                [self.config, query],
+                output_field=FloatField(),
+            )
+        )
+
+
+VENDOR_BACKENDS = {
+    "sqlite": SQLiteFTSBackend,
+    "postgresql": PostgresSearchBackend,
+}
+
+_backends = {}
+
+
+def get_search_backend(alias="default"):
+    if alias not in _backends:
+        path = getattr(settings, "LISTINGS_SEARCH_BACKEND", None)
+        if path:
+            backend_class = import_string(path)
+        else:
+            backend_class = VENDOR_BACKENDS.get(connections[alias].vendor, LikeSearchBackend)
+        _backends[alias] = backend_class(alias)
+    return _backends[alias]
+
+
+def reset_search_backends():
+    _backends.clear()
+
+
+def search_properties(queryset, query):
+    """Filter ``queryset`` to listings matching ``query``, annotated with ``search_rank``."""
+    if not search_terms(query):
+        return queryset
+    return get_search_backend(queryset.db).search(queryset, query)
+
+
+# =========================
+# DRF FILTER
+# =========================
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    Drop-in replacement for ``SearchFilter`` on ``?search=``. Results are
+    ordered by relevance unless the request asks for another ordering.
+    """
+    search_param = "search"
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, "")
+        if not search_terms(query):
+            return queryset
+        queryset = search_properties(queryset, query)
+        if "ordering" not in request.query_params:
+            queryset = queryset.order_by("-search_rank", "-pk")
+        return queryset
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            "name": self.search_param,
+            "required": False,
+            "in": "query",
+            "description": "Full-text search on title and description.",
+            "schema": {"type": "string"},
+        }]
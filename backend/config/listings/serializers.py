@@ -1,7 +1,8 @@
 from rest_framework import serializers
+from core.perf import TimedSerializerMixin
 from .models import Property, Favorite
 
-class PropertySerializer(serializers.ModelSerializer):
+class PropertySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Property
         fields = [
@@ -9,7 +10,47 @@ class PropertySerializer(serializers.ModelSerializer):
             'price', 'distress_score', 'source', 
             'created_at', 'updated_at'
         ]
-class FavoriteSerializer(serializers.ModelSerializer):
+
+
+class SparseFieldsMixin:
+    """
+    Lets clients pick fields with ``?fields=id,title,price``. Without the
+    parameter every field except ``default_excluded_fields`` is returned.
+    """
+    default_excluded_fields = ()
+
+    @classmethod
+    def requested_fields(cls, request):
+        available = list(cls.Meta.fields)
+        requested = request.query_params.get("fields") if request else None
+        if requested:
+            wanted = {name.strip() for name in requested.split(",")}
+            return [name for name in available if name in wanted] or ["id"]
+        return [name for name in available if name not in cls.default_excluded_fields]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        keep = set(self.requested_fields(self.context.get("request")))
+        for name in list(self.fields):
+            if name not in keep:
+                self.fields.pop(name)
+
+
+class PropertyListSerializer(TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
+    """Lean list representation: leaves out ``description`` unless asked for."""
+    default_excluded_fields = ("description",)
+
+    class Meta:
+        model = Property
+        fields = [
+            'id', 'title', 'description', 'location',
+            'price', 'distress_score', 'source', 'favorite_count',
+            'duplicate_of', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+
+class FavoriteSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     property = PropertySerializer(read_only=True)
 
     class Meta:
@@ -0,0 +1,236 @@
+from collections import defaultdict
+from decimal import Decimal
+from django.core.signals import setting_changed
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
+from django.dispatch import Signal, receiver
+
+from .cache import bump_generation
+from .changes import record_changes
+from .dedupe import dedupe_listings, flag_new_listing, index_listing, promote_duplicates, reindex_listing
+from .keywords import reload_keyword_matcher
+from .search import reset_search_backends
+from .stream import publish_listings, reset_broker
+from .models import (
+    Property,
+    Favorite,
+    LocationMarketStats,
+    DistressKeyword,
+    NotificationPreference,
+    AlertRule,
+    PropertyChange,
+)
+
+# bulk_create() skips post_save, so bulk loaders send this afterwards
+# with the created ``instances``.
+properties_bulk_created = Signal()
+
+# Sent after bulk_update() with the updated ``instances`` and ``fields``.
+properties_bulk_updated = Signal()
+
+
+def _add_delta(deltas, values, sign):
+    if values is None:
+        # Flagged duplicates are not counted
+        return
+    location_key, price = values
+    count, price_sum = deltas[location_key]
+    deltas[location_key] = (count + sign, price_sum + sign * price)
+
+
+def _affects_market_stats(update_fields):
+    return not update_fields or bool({"location", "price", "duplicate_of"} & set(update_fields))
+
+
+@receiver(pre_save, sender=Property)
+def remember_market_values(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or instance.pk is None or not _affects_market_stats(update_fields):
+        return
+    if not hasattr(instance, "_loaded_market_values"):
+        # Not loaded from the database with these fields (built with a pk,
+        # loaded with .only() or refreshed): read what the row holds
+        row = (
+            Property.objects
+            .filter(pk=instance.pk)
+            .values_list("location", "price", "duplicate_of_id")
+            .first()
+        )
+        stored = row and Property(location=row[0], price=row[1], duplicate_of_id=row[2])
+        instance._loaded_market_values = stored and stored.market_values()
+
+
+@receiver(post_save, sender=Property)
+def update_market_stats_on_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or not _affects_market_stats(update_fields):
+        return
+
+    previous = None if created else getattr(instance, "_loaded_market_values", None)
+    current = instance.market_values()
+    instance._loaded_market_values = current
+    if previous == current:
+        return
+
+    deltas = defaultdict(lambda: (0, Decimal(0)))
+    _add_delta(deltas, previous, -1)
+    _add_delta(deltas, current, 1)
+    LocationMarketStats.apply_deltas(deltas)
+
+
+@receiver(post_delete, sender=Property)
+def update_market_stats_on_delete(sender, instance, **kwargs):
+    # A None snapshot is a flagged duplicate, which is not counted
+    if hasattr(instance, "_loaded_market_values"):
+        values = instance._loaded_market_values
+    else:
+        values = instance.market_values()
+    deltas = defaultdict(lambda: (0, Decimal(0)))
+    _add_delta(deltas, values, -1)
+    LocationMarketStats.apply_deltas(deltas)
+
+
+@receiver(properties_bulk_created, sender=Property)
+def update_market_stats_on_bulk_create(sender, instances, **kwargs):
+    deltas = defaultdict(lambda: (0, Decimal(0)))
+    for instance in instances:
+        _add_delta(deltas, instance.market_values(), 1)
+        instance._loaded_market_values = instance.market_values()
+    LocationMarketStats.apply_deltas(deltas)
+
+
+# =========================
+# CHANGE FEED
+# =========================
+
+# Connected ahead of the near-duplicate receivers: flagging a bulk load
+# sends properties_bulk_updated, and a listing's updated entry must not
+# precede its created entry.
+
+@receiver(post_save, sender=Property)
+def record_change_on_save(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        record_changes(PropertyChange.CREATED if created else PropertyChange.UPDATED, [instance.pk])
+
+
+@receiver(post_delete, sender=Property)
+def record_change_on_delete(sender, instance, **kwargs):
+    record_changes(PropertyChange.DELETED, [instance.pk])
+    # Their duplicate_of now points at the promoted listing
+    record_changes(PropertyChange.UPDATED, getattr(instance, "_duplicate_pks", None) or [])
+
+
+@receiver(properties_bulk_created, sender=Property)
+def record_changes_on_bulk_create(sender, instances, **kwargs):
+    record_changes(PropertyChange.CREATED, [obj.pk for obj in instances])
+
+
+@receiver(properties_bulk_updated, sender=Property)
+def record_changes_on_bulk_update(sender, instances, fields, **kwargs):
+    record_changes(PropertyChange.UPDATED, [obj.pk for obj in instances])
+
+
+# =========================
+# LIVE STREAM
+# =========================
+
+# Also ahead of the near-duplicate receivers, so subscribers see a bulk
+# loaded listing's created event before its duplicate_of update.
+
+@receiver(post_save, sender=Property)
+def stream_on_save(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        publish_listings("created" if created else "updated", [instance])
+
+
+@receiver(properties_bulk_created, sender=Property)
+def stream_on_bulk_create(sender, instances, **kwargs):
+    publish_listings("created", instances)
+
+
+@receiver(properties_bulk_updated, sender=Property)
+def stream_on_bulk_update(sender, instances, fields, **kwargs):
+    publish_listings("updated", instances, reload=True)
+
+
+# =========================
+# NEAR-DUPLICATES
+# =========================
+
+@receiver(pre_save, sender=Property)
+def dedupe_before_insert(sender, instance, raw=False, **kwargs):
+    if not raw and instance._state.adding:
+        flag_new_listing(instance)
+
+
+@receiver(post_save, sender=Property)
+def dedupe_on_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if created:
+        index_listing(instance)
+    elif update_fields is None or {"title", "description"} & set(update_fields):
+        reindex_listing(instance)
+
+
+@receiver(properties_bulk_created, sender=Property)
+def dedupe_on_bulk_create(sender, instances, **kwargs):
+    dedupe_listings(instances)
+
+
+@receiver(pre_delete, sender=Property)
+def remember_duplicates(sender, instance, **kwargs):
+    # on_delete=SET_NULL clears duplicate_of without signals
+    instance._duplicate_pks = list(instance.duplicates.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Property)
+def promote_duplicates_on_delete(sender, instance, **kwargs):
+    promote_duplicates(getattr(instance, "_duplicate_pks", None))
+
+
+@receiver(post_save, sender=Property)
+@receiver(post_delete, sender=Property)
+@receiver(properties_bulk_created, sender=Property)
+@receiver(properties_bulk_updated, sender=Property)
+def invalidate_cached_responses(sender, raw=False, **kwargs):
+    if not raw:
+        bump_generation()
+
+
+@receiver(post_save, sender=Favorite)
+def increment_favorite_count(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        Property.objects.filter(pk=instance.property_id).update(
+            favorite_count=F("favorite_count") + 1
+        )
+        bump_generation()
+
+
+@receiver(post_delete, sender=Favorite)
+def decrement_favorite_count(sender, instance, **kwargs):
+    Property.objects.filter(pk=instance.property_id, favorite_count__gt=0).update(
+        favorite_count=F("favorite_count") - 1
+    )
+    bump_generation()
+
+
+@receiver(post_save, sender=DistressKeyword)
+@receiver(post_delete, sender=DistressKeyword)
+def reload_keywords_on_change(sender, **kwargs):
+    reload_keyword_matcher()
+
+
+@receiver(setting_changed)
+def reload_on_setting_change(setting, **kwargs):
+    if setting.startswith("DISTRESS_KEYWORDS_"):
+        reload_keyword_matcher()
+    elif setting == "LISTINGS_SEARCH_BACKEND":
+        reset_search_backends()
+    elif setting.startswith("LISTINGS_STREAM_"):
+        reset_broker()
+
+
+@receiver(post_save, sender=NotificationPreference)
+def create_default_alert_rule(sender, instance, created, raw=False, **kwargs):
+    # New subscribers start with the historical default: score >= 5, any location
+    if created and not raw and not AlertRule.objects.filter(user_id=instance.user_id).exists():
+        AlertRule.objects.create(user_id=instance.user_id)
@@ -0,0 +1,250 @@
+"""
+Live stream of new and updated listings over Server-Sent Events.
+
+Every property write publishes the listings it touched once its
+transaction commits. That covers single saves (the API's perform_create
+and perform_update, forms, admin), bulk loads (process_csv, import jobs,
+import_properties) and bulk updates (rescoring, near-duplicate flags).
+``PropertyStreamView`` (``/api/api/properties/stream/``) holds the
+connection open on the ASGI app. It writes the listings that pass the
+client's ``location`` / ``min_price`` / ``max_price`` / ``min_score``
+filter, as ``created`` or ``updated`` events in the list API's row
+format, plus a keep-alive comment every ``LISTINGS_STREAM_HEARTBEAT``
+seconds.
+
+``LISTINGS_STREAM_BROKER`` picks how writes reach the streams:
+
+* ``"memory"`` (the default): in-process fan-out. A stream only sees
+  writes made by its own process, so use it with a single ASGI process.
+* ``"redis"``: pub/sub on ``LISTINGS_STREAM_REDIS_URL`` (Redis or any
+  server speaking its protocol). Writers PUBLISH, and each process runs
+  one listener that fans out to its own streams. Needs redis-py.
+
+Each stream reads from a bounded queue. A client that falls behind
+loses messages and gets a ``lagged`` event telling it to re-sync from
+the list API. Writers skip all of this while no stream is open.
+"""
+import asyncio
+import json
+import logging
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Property, normalize_location
+from .serializers import PropertyListSerializer
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "listings:stream"
+RELOAD_BATCH = 1000
+
+
+class ListingEvent:
+    """One streamed listing: its SSE frame and the values filters test."""
+    __slots__ = ("location_key", "price", "score", "frame")
+
+    def __init__(self, kind, row):
+        self.location_key = normalize_location(row["location"])
+        self.price = Decimal(row["price"])
+        self.score = row["distress_score"]
+        self.frame = f"event: {kind}\ndata: {json.dumps(row, separators=(',', ':'))}\n\n"
+
+
+class Subscription:
+    def __init__(self, size):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=size)
+        self.dropped = 0
+
+    def deliver(self, events):
+        # Runs on the subscription's event loop
+        try:
+            self.queue.put_nowait(events)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def get(self, timeout):
+        """The next list of ``ListingEvent``s, or None after ``timeout`` seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+# =========================
+# BROKERS
+# =========================
+
+class LocalBroker:
+    """Fans events out to the subscriptions open in this process."""
+
+    def __init__(self):
+        self.subscriptions = set()
+
+    def has_subscribers(self):
+        return bool(self.subscriptions)
+
+    def fan_out(self, events):
+        # Safe from any thread: each subscription is fed on its own loop
+        for subscription in list(self.subscriptions):
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, events)
+            except RuntimeError:
+                # Its event loop is closed
+                self.subscriptions.discard(subscription)
+
+    def subscribe(self, size):
+        """A new Subscription on the running loop; pair with ``unsubscribe``."""
+        subscription = Subscription(size)
+        self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self.subscriptions.discard(subscription)
+
+
+class MemoryBroker(LocalBroker):
+    def publish(self, kind, rows):
+        self.fan_out([ListingEvent(kind, row) for row in rows])
+
+
+class RedisBroker(LocalBroker):
+    def __init__(self, url, channel=CHANNEL):
+        super().__init__()
+        import redis  # ✅ lazy import (optional dependency)
+
+        self.url = url
+        self.channel = channel
+        self.client = redis.Redis.from_url(url)
+        self.listeners = {}
+        self.numsub = (0.0, False)
+
+    def has_subscribers(self):
+        # PUBSUB NUMSUB costs a round trip, so check at most once a second
+        checked, subscribed = self.numsub
+        if time.monotonic() - checked > 1:
+            try:
+                [(_, count)] = self.client.pubsub_numsub(self.channel)
+            except Exception:
+                logger.exception("Listing stream: cannot reach %s", self.url)
+                count = 0
+            subscribed = count > 0
+            self.numsub = (time.monotonic(), subscribed)
+        return subscribed
+
+    def publish(self, kind, rows):
+        self.client.publish(self.channel, json.dumps({"kind": kind, "rows": rows}))
+
+    def subscribe(self, size):
+        loop = asyncio.get_running_loop()
+        listener = self.listeners.get(loop)
+        if listener is None or listener.done():
+            self.listeners[loop] = loop.create_task(self.listen())
+        return super().subscribe(size)
+
+    async def listen(self):
+        """One channel subscription per process, fanned out to its streams."""
+        import redis.asyncio  # ✅ lazy import (optional dependency)
+
+        while True:
+            try:
+                client = redis.asyncio.Redis.from_url(self.url)
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        try:
+                            payload = json.loads(message["data"])
+                            events = [ListingEvent(payload["kind"], row) for row in payload["rows"]]
+                        except (ValueError, KeyError, TypeError, ArithmeticError):
+                            # Someone else publishing on the channel; keep listening
+                            logger.warning("Listing stream: skipped a malformed message on %s", self.channel, exc_info=True)
+                            continue
+                        self.fan_out(events)
+            except (redis.RedisError, OSError):
+                logger.exception("Listing stream: lost %s, reconnecting", self.url)
+                await asyncio.sleep(1)
+
+
+_brokers = {}
+
+
+def get_broker():
+    if "default" not in _brokers:
+        if settings.LISTINGS_STREAM_BROKER == "redis":
+            _brokers["default"] = RedisBroker(settings.LISTINGS_STREAM_REDIS_URL)
+        else:
+            _brokers["default"] = MemoryBroker()
+    return _brokers["default"]
+
+
+def reset_broker():
+    _brokers.clear()
+
+
+# =========================
+# PUBLISHING
+# =========================
+
+def listing_rows(instances):
+    return PropertyListSerializer(instances, many=True).data
+
+
+def publish_listings(kind, instances, reload=False):
+    """
+    Publish ``instances`` as ``kind`` events when the transaction commits.
+    ``reload`` re-reads them first, for partial instances from bulk_update().
+    """
+    broker = get_broker()
+    if not instances or not broker.has_subscribers():
+        return
+
+    if reload:
+        pks = [obj.pk for obj in instances]
+
+        def publish():
+            for start in range(0, len(pks), RELOAD_BATCH):
+                batch = Property.objects.filter(pk__in=pks[start:start + RELOAD_BATCH]).defer("description")
+                broker.publish(kind, listing_rows(batch))
+    else:
+        # Serialized now: the values as saved, whatever happens to the instances later
+        rows = listing_rows(instances)
+
+        def publish():
+            broker.publish(kind, rows)
+
+    transaction.on_commit(publish, robust=True)
+
+
+# =========================
+# SERVER-SENT EVENTS
+# =========================
+
+async def listing_stream(form):
+    """SSE text for the listings passing ``form`` (a valid ListingFilterForm), until cancelled."""
+    heartbeat = settings.LISTINGS_STREAM_HEARTBEAT
+    broker = get_broker()
+    subscription = broker.subscribe(settings.LISTINGS_STREAM_QUEUE_SIZE)
+    try:
+        yield ": subscribed\n\n"
+        while True:
+            events = await subscription.get(heartbeat)
+            if subscription.dropped:
+                yield f'event: lagged\ndata: {{"dropped":{subscription.dropped}}}\n\n'
+                subscription.dropped = 0
+            if events is None:
+                yield ": keep-alive\n\n"
+                continue
+            frames = "".join(
+                event.frame for event in events
+                if form.matches(event.location_key, event.price, event.score)
+            )
+            if frames:
+                yield frames
+    finally:
+        # Also runs when the client disconnects and the response is closed
+        broker.unsubscribe(subscription)
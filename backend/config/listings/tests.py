@@ -1,3 +1,1512 @@
-from django.test import TestCase
+import asyncio
+import base64
+import csv
+import gzip
+import io
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import unittest
+import warnings
+from unittest import mock
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from functools import partial
+from types import ModuleType
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction, sync_to_async
+
+from django.db import IntegrityError, connection, models, transaction
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db.migrations.executor import MigrationExecutor
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import include, path, resolve
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.testing import enforce_query_budgets
+from notifications.models import Notification
+
+from .models import (
+    AlertRule,
+    AlertRuleLocation,
+    CSVImportJob,
+    DistressKeyword,
+    Favorite,
+    LocationMarketStats,
+    NotificationPreference,
+    Property,
+    PropertyChange,
+)
+from .cache import cache_stats, get_cache
+from .changes import encode_token
+from .dedupe import listing_text, signatures, similarity
+from .export import parquet_available
+from .imports import claim_import_job, run_import_job, run_pending_imports
+from .keywords import KeywordMatcher, get_keyword_matcher
+from .market import compute_market_stats, current_version
+from .search import search_properties
+from .serializers import PropertyListSerializer
+from .stream import CHANNEL, get_broker, reset_broker
+from . import urls
+from .utils import (
+    DISTRESS_KEYWORDS,
+    CSVChunkImporter,
+    calculate_distress_score,
+    get_market_average_price,
+    notify_users,
+    process_csv,
+    score_batch,
+)
+
+
+class ScoreBatchTests(SimpleTestCase):
+    def test_matches_scalar_scores(self):
+        rng = random.Random(42)
+        phrases = list(DISTRESS_KEYWORDS) + ["Spacious", "URGENT", "near CBD", ""]
+
+        prices, descriptions, averages = [], [], []
+        for _ in range(2000):
+            average = rng.choice([0, 0.0, -5, 1_000_000, rng.uniform(1e5, 1e7)])
+            prices.append(rng.uniform(0, 2) * (average or 1_000_000))
+            descriptions.append(rng.choice([None, " ".join(rng.sample(phrases, 3))]))
+            averages.append(average)
+
+        # Exact band edges
+        for deviation in (0.1, 0.2, 0.3):
+            prices.append(1000 - 1000 * deviation)
+            descriptions.append("must sell")
+            averages.append(1000)
+
+        expected = [
+            calculate_distress_score(price, description, average)
+            for price, description, average in zip(prices, descriptions, averages)
+        ]
+        self.assertEqual(score_batch(prices, descriptions, averages).tolist(), expected)
+
+
+def naive_matches(phrases, text, word_boundary=False):
+    """Every phrase occurring in ``text``, by brute force."""
+    text = text.lower()
+    found = []
+    for phrase in phrases:
+        start = text.find(phrase)
+        while start != -1:
+            end = start + len(phrase)
+            if not word_boundary or (
+                (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum())
+            ):
+                found.append(phrase)
+                break
+            start = text.find(phrase, start + 1)
+    return found
+
+
+class KeywordMatcherTests(SimpleTestCase):
+    def test_automaton_matches_naive_search(self):
+        rng = random.Random(7)
+        for trial in range(200):
+            # A tiny alphabet forces overlapping and nested phrases
+            keywords = {
+                "".join(rng.choice("ab ") for _ in range(rng.randint(1, 5))): rng.randint(1, 5)
+                for _ in range(rng.randint(1, 12))
+            }
+            text = "".join(rng.choice("abAB .1") for _ in range(rng.randint(0, 60)))
+            for word_boundary in (False, True):
+                with self.subTest(trial=trial, word_boundary=word_boundary):
+                    matcher = KeywordMatcher(keywords, word_boundary=word_boundary, scan_limit=0)
+                    expected = naive_matches(matcher.phrases, text, word_boundary)
+                    self.assertEqual(matcher.matches(text), expected)
+                    weights = dict(zip(matcher.phrases, matcher.weights))
+                    self.assertEqual(matcher.score(text), float(sum(weights[phrase] for phrase in expected)))
+
+    def test_word_boundary(self):
+        keywords = {"sale": 1, "must sell": 2, " Bank Auction ": 3, "": 9}
+        matcher = KeywordMatcher(keywords, word_boundary=True)
+        self.assertEqual(matcher.phrases, ["sale", "must sell", "bank auction"])
+        self.assertEqual(matcher.matches("Wholesale prices, must sell."), ["must sell"])
+        self.assertEqual(matcher.matches("For sale: BANK AUCTION"), ["sale", "bank auction"])
+        self.assertEqual(matcher.matches("sale2 or mustsell"), [])
+        self.assertEqual(KeywordMatcher(keywords).matches("Wholesale"), ["sale"])
+
+    def test_small_dictionaries_use_substring_checks(self):
+        rng = random.Random(11)
+        words = list(DISTRESS_KEYWORDS) + ["garden", "sea view"]
+        scanned = KeywordMatcher(DISTRESS_KEYWORDS)
+        walked = KeywordMatcher(DISTRESS_KEYWORDS, scan_limit=0)
+        self.assertTrue(scanned.use_scan)
+        self.assertFalse(walked.use_scan)
+        self.assertFalse(KeywordMatcher(DISTRESS_KEYWORDS, word_boundary=True).use_scan)
+
+        for _ in range(200):
+            text = " ".join(rng.sample(words, 3)).upper()
+            self.assertEqual(scanned.matches(text), walked.matches(text))
+            self.assertEqual(scanned.score(text), walked.score(text))
+        self.assertEqual(scanned.score(""), 0.0)
+        self.assertEqual(walked.score(None), 0.0)
+
+
+@override_settings(DISTRESS_KEYWORDS_RELOAD_SECONDS=0)
+class KeywordReloadTests(TestCase):
+    def write_keywords(self, path, keywords, mtime_ns):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(keywords, f)
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+    def test_file_changes_are_picked_up(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "keywords.json")
+        self.write_keywords(path, {"bank auction": 2}, 1_000_000_000)
+
+        with override_settings(DISTRESS_KEYWORDS_SOURCE=path, DISTRESS_KEYWORDS_RELOAD_SECONDS=60):
+            matcher = get_keyword_matcher()
+            self.assertEqual(matcher.score("Bank auction"), 2.0)
+
+            self.write_keywords(path, {"bank auction": 5, "must sell": 1}, 2_000_000_000)
+            # Not re-checked until the reload interval passes
+            self.assertIs(get_keyword_matcher(), matcher)
+            with mock.patch("listings.keywords.time.monotonic", return_value=time.monotonic() + 61):
+                reloaded = get_keyword_matcher()
+            self.assertEqual(reloaded.score("Bank auction, must sell"), 6.0)
+
+            # An unchanged file is not recompiled
+            with mock.patch("listings.keywords.time.monotonic", return_value=time.monotonic() + 122):
+                self.assertIs(get_keyword_matcher(), reloaded)
+
+    def test_database_changes_are_picked_up(self):
+        with override_settings(DISTRESS_KEYWORDS_SOURCE="db"):
+            keyword = DistressKeyword.objects.create(phrase="repossessed", weight=2)
+            self.assertEqual(calculate_distress_score(1000, "Repossessed flat", 0), 2)
+
+            keyword.weight = 4
+            keyword.save()
+            self.assertEqual(calculate_distress_score(1000, "Repossessed flat", 0), 4)
+
+            # bulk_create sends no signal; the row count still changes
+            DistressKeyword.objects.bulk_create([DistressKeyword(phrase="flat", weight=1)])
+            self.assertEqual(calculate_distress_score(1000, "Repossessed flat", 0), 5)
+
+            DistressKeyword.objects.filter(phrase="flat").delete()
+            keyword.is_active = False
+            keyword.save()
+            self.assertEqual(calculate_distress_score(1000, "Repossessed flat", 0), 0)
+
+
+class RescoreCommandTests(TestCase):
+    def setUp(self):
+        checkpoint_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, checkpoint_dir)
+        self.checkpoint = f"{checkpoint_dir}/rescore.json"
+        rng = random.Random(7)
+        Property.objects.bulk_create([
+            Property(
+                title=f"Listing {i}", location=rng.choice(["Nairobi", "Kisumu"]),
+                location_key="", price=rng.randint(1, 20) * 100_000,
+                description=" ".join(rng.sample(list(DISTRESS_KEYWORDS) + ["spacious", "quiet"], 2)),
+            )
+            for i in range(40)
+        ])
+
+    def rescore(self, workers):
+        Property.objects.update(distress_score=0)
+        call_command(
+            "rescore_properties", workers=workers, chunk_size=7, checkpoint=self.checkpoint, stdout=io.StringIO()
+        )
+        return dict(Property.objects.values_list("pk", "distress_score"))
+
+    def test_workers_score_like_the_parent(self):
+        scores = self.rescore(workers=2)
+        self.assertTrue(any(scores.values()))
+        self.assertEqual(scores, self.rescore(workers=1))
+
+
+class MarketStatsEngineTests(SimpleTestCase):
+    def test_matches_per_location_statistics(self):
+        import pandas as pd
+
+        rng = random.Random(3)
+        as_of = pd.Timestamp("2026-06-01", tz="UTC")
+        rows = [
+            (f"loc{rng.randint(0, 40)}", round(rng.lognormvariate(13, 1), 2),
+             as_of - pd.Timedelta(days=rng.randint(0, 365)))
+            for _ in range(3000)
+        ]
+        frame = pd.DataFrame(rows, columns=["location_key", "price", "created_at"])
+        stats = compute_market_stats(frame, as_of=as_of, trim=0.1, window_days=90)
+
+        for key, group in frame.groupby("location_key"):
+            prices = sorted(group["price"])
+            cut = int(len(prices) * 0.1)
+            recent = sorted(group.loc[group["created_at"] >= as_of - pd.Timedelta(days=90), "price"])
+            row = stats.loc[key]
+            p25, median, p75 = statistics.quantiles(prices, n=4, method="inclusive")
+            self.assertEqual(row["count"], len(prices))
+            self.assertAlmostEqual(row["p25_price"], p25)
+            self.assertAlmostEqual(row["median_price"], median)
+            self.assertAlmostEqual(row["p75_price"], p75)
+            self.assertAlmostEqual(row["trimmed_mean_price"], statistics.fmean(prices[cut:len(prices) - cut]))
+            self.assertEqual(row["recent_count"], len(recent))
+            if recent:
+                self.assertAlmostEqual(row["recent_median_price"], statistics.median(recent))
+
+
+class LocationMarketStatsTests(TestCase):
+    def stats(self):
+        return {
+            stats.location_key: (stats.count, stats.price_sum, stats.mean_price)
+            for stats in LocationMarketStats.objects.filter(count__gt=0)
+        }
+
+    def listing(self, title, location="Nairobi", price=1000):
+        return Property.objects.create(title=title, description=f"{title} house", location=location, price=price)
+
+    def assertMatchesRebuild(self):
+        call_command("rebuild_market_stats", check=True, stdout=io.StringIO(), stderr=io.StringIO())
+
+    def test_saves_and_deletes_keep_stats_current(self):
+        first = self.listing("First")
+        second = self.listing("Second", price=3000)
+        self.assertEqual(self.stats(), {"nairobi": (2, Decimal("4000.00"), 2000.0)})
+
+        second.location = " MOMBASA"
+        second.save()
+        first.price = 1500
+        first.save(update_fields=["price"])
+        first.save(update_fields=["title"])
+        self.assertEqual(self.stats(), {
+            "nairobi": (1, Decimal("1500.00"), 1500.0),
+            "mombasa": (1, Decimal("3000.00"), 3000.0),
+        })
+
+        second.duplicate_of = first
+        second.save()
+        self.assertEqual(self.stats(), {"nairobi": (1, Decimal("1500.00"), 1500.0)})
+        second.delete()
+        first.delete()
+        self.assertEqual(self.stats(), {})
+        self.assertMatchesRebuild()
+
+    def test_saves_without_a_snapshot_read_the_row(self):
+        prop = self.listing("First")
+        self.listing("Second", price=3000)
+
+        partial_row = Property.objects.only("title", "price").get(pk=prop.pk)
+        partial_row.price = 2000
+        partial_row.save()
+
+        built = Property.objects.get(pk=prop.pk)
+        built.refresh_from_db()
+        built.location = "Kisumu"
+        built.save()
+
+        Property(
+            pk=prop.pk, title="First", description="", location="Kisumu", price=500, created_at=prop.created_at,
+        ).save()
+        self.assertEqual(self.stats(), {
+            "nairobi": (1, Decimal("3000.00"), 3000.0),
+            "kisumu": (1, Decimal("500.00"), 500.0),
+        })
+        self.assertMatchesRebuild()
+
+    def test_deleting_a_duplicate_leaves_stats_alone(self):
+        first = self.listing("First")
+        second = self.listing("Second")
+        Property.objects.filter(pk=second.pk).update(duplicate_of=first)
+        LocationMarketStats.apply_deltas({"nairobi": (-1, Decimal("-1000.00"))})
+
+        Property.objects.get(pk=second.pk).delete()
+        self.assertEqual(self.stats(), {"nairobi": (1, Decimal("1000.00"), 1000.0)})
+
+    def test_apply_deltas(self):
+        LocationMarketStats.apply_deltas({"nairobi": (2, Decimal("300")), "kisumu": (0, Decimal(0))})
+        self.assertEqual(self.stats(), {"nairobi": (2, Decimal("300.00"), 150.0)})
+        self.assertFalse(LocationMarketStats.objects.filter(location_key="kisumu").exists())
+
+        LocationMarketStats.apply_deltas({"nairobi": (-3, Decimal("-300"))})
+        stats = LocationMarketStats.objects.get(location_key="nairobi")
+        self.assertEqual((stats.count, stats.mean_price), (0, 0.0))
+
+    def test_check_reports_drift(self):
+        self.listing("First")
+        self.assertMatchesRebuild()
+
+        LocationMarketStats.objects.filter(location_key="nairobi").update(count=5)
+        LocationMarketStats.objects.create(location_key="ghost", count=1, price_sum=10)
+        stderr = io.StringIO()
+        with self.assertRaisesMessage(CommandError, "Market stats drift in 2 locations."):
+            call_command("rebuild_market_stats", check=True, stdout=io.StringIO(), stderr=stderr)
+        self.assertIn("'ghost': stored count/sum (1, Decimal('10.00')), expected (0, Decimal('0'))", stderr.getvalue())
+
+        call_command("rebuild_market_stats", stdout=io.StringIO())
+        self.assertMatchesRebuild()
+
+
+@override_settings(LISTINGS_MARKET_TRIM=0.2)
+class MarketPriceStrategyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for price in (100, 200, 300, 400, 9_000_000_000):
+            Property.objects.create(title=f"N{price}", description="", location="Nairobi", price=price)
+        # Outside the recent window
+        Property.objects.filter(price=100).update(created_at=Property.objects.get(price=100).created_at - timedelta(days=200))
+
+    def setUp(self):
+        get_cache().clear()
+        call_command("rebuild_market_stats", stdout=io.StringIO())
+
+    def test_outlier_does_not_skew_robust_prices(self):
+        self.assertGreater(get_market_average_price("Nairobi"), 1_000_000_000)
+        expected = {"median": 300.0, "trimmed_mean": 300.0, "recent_median": 350.0}
+        for strategy, price in expected.items():
+            with self.subTest(strategy=strategy), override_settings(LISTINGS_MARKET_PRICE_STRATEGY=strategy):
+                self.assertEqual(get_market_average_price("nairobi "), price)
+
+    @override_settings(LISTINGS_MARKET_PRICE_STRATEGY="median")
+    def test_cached_per_version_with_mean_fallback(self):
+        version = current_version()
+        with self.assertNumQueries(1):
+            get_market_average_price("Nairobi")
+        Property.objects.create(title="M", description="", location="Mombasa", price=500)
+        Property.objects.create(title="N", description="", location="Nairobi", price=1000)
+        self.assertEqual(get_market_average_price("Mombasa"), 500.0)
+        self.assertEqual(get_market_average_price("Nairobi"), 300.0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("rebuild_market_stats", stdout=io.StringIO())
+        self.assertEqual(current_version(), version + 1)
+        self.assertEqual(get_market_average_price("Nairobi"), 350.0)
+
+
+class NearDuplicateTests(TestCase):
+    description = (
+        "Spacious 4 bedroom maisonette for sale in Kileleshwa. Gated community, DSQ, "
+        "borehole on site, ample parking. LR No. 209/11863."
+    )
+
+    def listing(self, title, description=None, location="Kileleshwa", price=24_000_000, **fields):
+        return Property.objects.create(
+            title=title, description=self.description if description is None else description,
+            location=location, price=price, **fields
+        )
+
+    def test_signatures_estimate_similarity(self):
+        base = listing_text("4 bedroom maisonette", self.description)
+        sigs = signatures([base, base.upper().replace(",", " -"), "Bedsitter to let in Ruaka, near stage"])
+        self.assertEqual(similarity(sigs[0], sigs[1]), 1.0)
+        self.assertLess(similarity(sigs[0], sigs[2]), 0.2)
+
+    def test_relisting_is_flagged_and_left_out_of_stats_and_alerts(self):
+        user = get_user_model().objects.create_user("investor", "i@example.com", "pw")
+        NotificationPreference.objects.create(user=user)
+        original = self.listing("4 bedroom maisonette, Kileleshwa", distress_score=8)
+        relisted = self.listing("4 Bedroom Maisonette - Kileleshwa (agent)", price=23_500_000, distress_score=8)
+
+        self.assertEqual(relisted.duplicate_of, original)
+        self.assertIsNone(Property.objects.get(pk=original.pk).duplicate_of)
+        stats = LocationMarketStats.objects.get(location_key="kileleshwa")
+        self.assertEqual((stats.count, stats.price_sum), (1, 24_000_000))
+        self.assertEqual(notify_users(relisted), 0)
+        self.assertEqual(notify_users(original), 1)
+
+    def test_distinct_listings_are_not_flagged(self):
+        self.listing("4 bedroom maisonette, Kileleshwa")
+        others = [
+            self.listing("Same copy, other town", location="Nakuru"),
+            self.listing("Same copy, other price", price=40_000_000),
+            self.listing("Bedsitter", description="Bedsitter to let in Kileleshwa, near the stage, water 24/7."),
+        ]
+        self.assertFalse(Property.objects.filter(pk__in=[obj.pk for obj in others], duplicate_of__isnull=False))
+
+    def test_bulk_import_flags_or_merges(self):
+        rows = (
+            "title,description,location,price\n"
+            f"A,\"{self.description}\",Kileleshwa,24000000\n"
+            f"B,\"{self.description.upper()}\",kileleshwa,24100000\n"
+            "C,Bedsitter to let near the stage,Kileleshwa,900000\n"
+        )
+        stats = process_csv(io.BytesIO(rows.encode()))
+        self.assertEqual((stats["created"], stats["duplicates"]), (3, 0))
+        self.assertEqual(Property.objects.get(title="B").duplicate_of, Property.objects.get(title="A"))
+
+        with override_settings(LISTINGS_DEDUPE_MODE="merge"):
+            stats = process_csv(io.BytesIO(
+                rows.replace("B,", "D,").replace("C,Bedsitter to let", "E,Godown with loading bay").encode()
+            ))
+        self.assertEqual((stats["created"], stats["duplicates"]), (1, 2))
+        self.assertTrue(Property.objects.filter(title="E").exists())
+
+    def test_dedupe_command_clusters_existing_listings(self):
+        with override_settings(LISTINGS_DEDUPE_MODE="off"):
+            first = self.listing("First")
+            second = self.listing("Second", price=24_500_000)
+            third = self.listing("Third", price=23_800_000)
+            self.listing("Bedsitter", description="Bedsitter to let near the stage", price=900_000)
+        stats = LocationMarketStats.objects.get(location_key="kileleshwa")
+        self.assertEqual(stats.count, 4)
+
+        call_command("dedupe_properties", "--dry-run", stdout=io.StringIO())
+        self.assertFalse(Property.objects.filter(duplicate_of__isnull=False).exists())
+
+        out = io.StringIO()
+        call_command("dedupe_properties", stdout=out)
+        self.assertIn("2 near-duplicates in 1 clusters", out.getvalue())
+        self.assertEqual(
+            set(Property.objects.filter(duplicate_of=first).values_list("pk", flat=True)), {second.pk, third.pk}
+        )
+        stats.refresh_from_db()
+        self.assertEqual(stats.count, 2)
+
+        # Deleting the canonical listing promotes its earliest duplicate
+        first.delete()
+        self.assertIsNone(Property.objects.get(pk=second.pk).duplicate_of)
+        self.assertEqual(Property.objects.get(pk=third.pk).duplicate_of_id, second.pk)
+        stats.refresh_from_db()
+        self.assertEqual(stats.count, 2)
+        call_command("rebuild_market_stats", "--check", stdout=io.StringIO())
+
+
+@unittest.skipUnless(connection.vendor == "sqlite", "query plans are SQLite-specific")
+class HotQueryPlanTests(TestCase):
+    """Each hot Property query must be answered from an index, not a table scan."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Property.objects.bulk_create([
+            Property(
+                title=f"Listing {i}",
+                description="",
+                location=location,
+                location_key=location.lower(),
+                price=1_000_000 + i,
+                distress_score=i % 7,
+            )
+            for i, location in enumerate(["Nairobi", "Mombasa", "Kisumu"] * 50)
+        ])
+
+    def assertUsesIndex(self, queryset):
+        plan = queryset.explain()
+        self.assertRegex(plan, r"USING (COVERING )?INDEX")
+        self.assertNotRegex(plan, r"SCAN listings_property(?! USING)")
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_location_filter_with_default_ordering(self):
+        self.assertUsesIndex(
+            Property.objects.filter(location="Nairobi").order_by("-created_at", "-id")[:50]
+        )
+
+    def test_duplicate_check(self):
+        self.assertUsesIndex(
+            Property.objects.filter(title="Listing 1", location_key="nairobi")
+        )
+
+    def test_market_average_lookup(self):
+        self.assertUsesIndex(
+            LocationMarketStats.objects.filter(location_key="nairobi").values_list("mean_price")
+        )
+
+    def test_per_location_scan(self):
+        self.assertUsesIndex(Property.objects.filter(location_key="nairobi").values_list("price"))
+
+    def test_orderings(self):
+        for field in ("created_at", "price", "distress_score"):
+            with self.subTest(field=field):
+                self.assertUsesIndex(Property.objects.order_by(f"-{field}", "-id")[:50])
+
+    def test_keyset_page(self):
+        self.assertUsesIndex(
+            Property.objects
+            .filter(price__lte=1_000_100)
+            .filter(models.Q(price__lt=1_000_100) | models.Q(price=1_000_100, id__lt=10))
+            .order_by("-price", "-id")[:51]
+        )
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.foreclosure = Property.objects.create(
+            title="Foreclosure sale in Karen", description="Bank auction, must sell",
+            location="Nairobi", price=5_000_000,
+        )
+        cls.mention = Property.objects.create(
+            title="Family home", description="Not a foreclosure, just a quick move",
+            location="Nairobi", price=9_000_000,
+        )
+        cls.other = Property.objects.create(
+            title="Beach plot", description="Ocean view", location="Mombasa", price=3_000_000,
+        )
+
+    def setUp(self):
+        get_cache().clear()
+
+    def search(self, query):
+        return list(search_properties(Property.objects.all(), query).order_by("-search_rank", "-pk"))
+
+    def test_matches_title_and_description(self):
+        self.assertEqual(set(self.search("foreclosure")), {self.foreclosure, self.mention})
+        self.assertEqual(self.search("ocean"), [self.other])
+
+    def test_all_terms_must_match(self):
+        self.assertEqual(self.search("foreclosure auction"), [self.foreclosure])
+
+    def test_blank_query_returns_everything(self):
+        self.assertEqual(search_properties(Property.objects.all(), "  ?! ").count(), 3)
+
+    @unittest.skipUnless(connection.vendor == "sqlite", "FTS5 index is SQLite-specific")
+    def test_ranks_and_prefix_matches(self):
+        self.assertEqual(self.search("forecl")[0], self.foreclosure)
+
+    def test_index_follows_updates_and_deletes(self):
+        self.other.description = "Auctioneer's notice"
+        self.other.save()
+        self.assertEqual(self.search("ocean"), [])
+        self.assertIn(self.other, self.search("auctioneer"))
+
+        self.foreclosure.delete()
+        self.assertEqual(self.search("karen"), [])
+
+    def test_api_orders_by_rank_and_pages(self):
+        response = self.client.get("/api/api/properties/", {"search": "foreclosure", "page_size": 1})
+        self.assertEqual(response.status_code, 200)
+        first = response.json()
+        self.assertEqual(len(first["results"]), 1)
+
+        second = self.client.get(first["next"]).json()
+        ids = [first["results"][0]["id"], second["results"][0]["id"]]
+        self.assertCountEqual(ids, [self.foreclosure.pk, self.mention.pk])
+        self.assertIsNone(second["next"])
+
+
+class ResponseCacheTests(TestCase):
+    list_url = "/api/api/properties/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.prop = Property.objects.create(
+            title="Auction house", description="", location="Nairobi", price=1_000_000,
+        )
+
+    def setUp(self):
+        get_cache().clear()
+
+    def test_repeat_reads_are_served_from_cache(self):
+        first = self.client.get(self.list_url, {"location": "Nairobi", "page_size": 10})
+        with self.assertNumQueries(0):
+            # Same params in a different order hit the same entry
+            second = self.client.get(self.list_url, {"page_size": 10, "location": "Nairobi"})
+
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(cache_stats()["hits"], 1)
+        self.assertEqual(cache_stats()["misses"], 1)
+
+    def test_writes_invalidate(self):
+        self.client.get(self.list_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.prop.title = "Renamed auction house"
+            self.prop.save()
+
+        response = self.client.get(self.list_url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["results"][0]["title"], "Renamed auction house")
+
+    def test_conditional_requests(self):
+        url = f"/api/api/properties/{self.prop.pk}/"
+        response = self.client.get(url)
+        self.assertIn("ETag", response)
+        self.assertNotIn("Last-Modified", response)
+
+        with self.assertNumQueries(0):
+            revalidated = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(revalidated.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.prop.price = 900_000
+            self.prop.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 200)
+
+    def test_favorites_change_the_etag(self):
+        url = f"/api/api/properties/{self.prop.pk}/"
+        response = self.client.get(url)
+        self.assertEqual(response.json()["favorite_count"], 0)
+
+        user = get_user_model().objects.create_user("fan", "fan@example.com", "pw")
+        with self.captureOnCommitCallbacks(execute=True):
+            Favorite.objects.create(user=user, property=self.prop)
+
+        revalidated = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(revalidated.status_code, 200)
+
+    def test_list_pages_revalidate_on_membership(self):
+        response = self.client.get(self.list_url, {"location": "Nairobi"})
+        self.assertNotIn("Last-Modified", response)
+
+        # A listing joining the page with an older updated_at still changes it
+        with self.captureOnCommitCallbacks(execute=True):
+            older = Property.objects.create(title="Older", description="", location="Nairobi", price=1)
+            Property.objects.filter(pk=older.pk).update(updated_at=self.prop.updated_at - timedelta(days=1))
+        for headers in ({"If-None-Match": response["ETag"]}, {"If-Modified-Since": http_date(time.time() + 60)}):
+            with self.subTest(headers=headers):
+                revalidated = self.client.get(self.list_url, {"location": "Nairobi"}, headers=headers)
+                self.assertEqual(revalidated.status_code, 200)
+                self.assertIn(older.pk, [row["id"] for row in revalidated.json()["results"]])
+
+
+@override_settings(LISTINGS_DEDUPE_MODE="off")
+class ChunkedCSVImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Property.objects.create(title="Listing 3", description="", location="Nairobi", price=600_000)
+        Property.objects.create(title="Listing 4", description="", location="Kisumu", price=2_000_000)
+
+    def csv_rows(self):
+        rng = random.Random(5)
+        locations = ["Nairobi", " nairobi", "Kisumu", "MOMBASA", "mombasa "]
+        phrases = list(DISTRESS_KEYWORDS) + ["garden", "sea view"]
+        rows = []
+        for _ in range(120):
+            # Titles repeat, so duplicates land in the same and in later chunks
+            price = rng.choice([str(rng.randint(1, 40) * 50_000)] * 8 + ["n/a", ""])
+            rows.append({
+                "title": f"Listing {rng.randint(0, 40)}",
+                "description": " ".join(rng.sample(phrases, 2)),
+                "location": rng.choice(locations),
+                "price": price,
+            })
+        return rows
+
+    def import_row_by_row(self, rows):
+        rejected = duplicates = 0
+        for row in rows:
+            try:
+                price = float(row["price"])
+            except ValueError:
+                rejected += 1
+                continue
+            location = row["location"].strip()
+            if Property.duplicate_exists(row["title"], location):
+                duplicates += 1
+                continue
+            Property.objects.create(
+                title=row["title"], description=row["description"], location=location, price=price,
+                distress_score=calculate_distress_score(price, row["description"], get_market_average_price(location)),
+                source="csv",
+            )
+        return rejected, duplicates
+
+    def snapshot(self):
+        scores = {
+            (title, location_key): score
+            for title, location_key, score in Property.objects.values_list("title", "location_key", "distress_score")
+        }
+        stats = set(LocationMarketStats.objects.filter(count__gt=0).values_list(
+            "location_key", "count", "price_sum", "mean_price",
+        ))
+        return scores, stats
+
+    def test_matches_row_by_row_import(self):
+        rows = self.csv_rows()
+        with transaction.atomic():
+            rejected, duplicates = self.import_row_by_row(rows)
+            expected = self.snapshot()
+            transaction.set_rollback(True)
+        self.assertTrue(rejected and duplicates)
+        self.assertGreater(len(set(expected[0].values())), 3)
+
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=["title", "description", "location", "price"])
+        writer.writeheader()
+        writer.writerows(rows)
+        for batch_size in (1, 4, 7, 1000):
+            with self.subTest(batch_size=batch_size), transaction.atomic():
+                stats = process_csv(io.BytesIO(buffer.getvalue().encode()), batch_size=batch_size)
+                self.assertEqual(
+                    (stats["created"], stats["rejected"], stats["duplicates"]),
+                    (len(expected[0]) - 2, rejected, duplicates),
+                )
+                self.assertEqual(self.snapshot(), expected)
+                transaction.set_rollback(True)
+
+
+class ImportPropertiesCommandTests(TestCase):
+    def write_gzip(self, text):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = f"{directory}/listings.csv.gz"
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def test_gzip_import_with_workers_skips_only_bad_rows(self):
+        path = self.write_gzip(
+            "Title,Location,Price (KES),Distress Score\n"
+            "A,Nairobi,\"1,000,000\",5\n"
+            "B,Nairobi,not-a-price,5\n"
+            "C,Kisumu,200000,3\n"
+            "A,nairobi ,1000000,5\n"
+            "D,Mombasa,inf,4\n"
+            "E,Mombasa,300000,2\n"
+        )
+        stdout, stderr = io.StringIO(), io.StringIO()
+        pool = "listings.management.commands.import_properties.ProcessPoolExecutor"
+        with mock.patch(pool, wraps=ProcessPoolExecutor) as executor:
+            call_command("import_properties", file=path, workers=2, batch_size=2, stdout=stdout, stderr=stderr)
+        # Spawned workers set Django up themselves and open their own connections
+        self.assertEqual(executor.call_args.kwargs["mp_context"].get_start_method(), "spawn")
+
+        self.assertEqual(sorted(Property.objects.values_list("title", flat=True)), ["A", "C", "E"])
+        self.assertEqual(Property.objects.get(title="A").price, 1_000_000)
+        self.assertIn("Row 2 skipped: invalid numeric", stderr.getvalue())
+        self.assertIn("Row 5 skipped: error saving", stderr.getvalue())
+        self.assertIn("Row 4 duplicate skipped", stdout.getvalue())
+        self.assertIn("3 added, 3 skipped, out of 6 rows", stdout.getvalue())
+
+
+class CSVImportJobTests(TestCase):
+    csv = (
+        "title,description,location,price\n"
+        "A,must sell,Nairobi,100\n"
+        "B,,Nairobi,not-a-price\n"
+        "C,,Mombasa,300\n"
+        "A,duplicate,nairobi ,100\n"
+        "D,,Kisumu,400\n"
+    )
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+
+    def make_job(self, batch_size=2):
+        upload = SimpleUploadedFile("listings.csv", self.csv.encode(), content_type="text/csv")
+        return CSVImportJob.objects.create(file=upload, original_name=upload.name, batch_size=batch_size)
+
+    def test_upload_is_queued_and_reported(self):
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_superuser("admin", "a@example.com", "pw"))
+
+        upload = SimpleUploadedFile("listings.csv", self.csv.encode(), content_type="text/csv")
+        response = client.post("/api/api/upload-csv/", {"csv_file": upload})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(Property.objects.count(), 0)
+
+        run_pending_imports()
+        status = client.get(response.json()["job"]["status_url"]).json()
+        self.assertEqual(status["status"], "completed")
+        self.assertEqual(
+            (status["rows_processed"], status["rows_created"], status["rows_rejected"], status["rows_duplicate"]),
+            (5, 3, 1, 1),
+        )
+
+    def test_resumes_from_checkpoint(self):
+        job = self.make_job()
+        # A crashed run committed the first chunk (rows A, B) and stopped
+        Property.objects.create(title="A", location="Nairobi", price=100)
+        CSVImportJob.objects.filter(pk=job.pk).update(
+            status="running", rows_processed=2, rows_created=1, rows_rejected=1,
+            heartbeat_at="2000-01-01T00:00:00Z",
+        )
+
+        job = run_import_job(claim_import_job())
+        self.assertEqual(job.status, "completed")
+        self.assertEqual((job.rows_processed, job.rows_created, job.rows_duplicate), (5, 3, 1))
+        self.assertEqual(
+            sorted(Property.objects.values_list("title", flat=True)), ["A", "C", "D"]
+        )
+
+    def test_database_errors_fail_the_job(self):
+        job = self.make_job()
+
+        def import_chunk(importer, chunk):
+            Property.objects.create(title="Half", location="Nairobi", price=1)
+            raise IntegrityError("UNIQUE constraint failed: listings_property.title")
+
+        with mock.patch.object(CSVChunkImporter, "import_chunk", import_chunk):
+            job = run_import_job(claim_import_job())
+        self.assertEqual(job.status, "failed")
+        self.assertIn("IntegrityError", job.error)
+        self.assertEqual((job.rows_processed, Property.objects.count()), (0, 0))
+        self.assertIsNone(claim_import_job())
+
+    def test_live_job_is_not_claimed_twice(self):
+        self.make_job()
+        self.assertIsNotNone(claim_import_job())
+        self.assertIsNone(claim_import_job())
+
+
+class ExportTests(TestCase):
+    url = "/api/api/properties/export/"
+
+    @classmethod
+    def setUpTestData(cls):
+        Property.objects.bulk_create([
+            Property(
+                title=f"Listing {i}",
+                description='Bank auction, "as is"' if i % 2 else "",
+                location=location,
+                location_key=location.lower(),
+                price=1_000_000 + i,
+            )
+            for i, location in enumerate(["Nairobi", "Mombasa"] * 5)
+        ])
+
+    def get(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content)
+
+    def test_csv_uses_list_filters(self):
+        rows = list(csv.reader(io.StringIO(self.get(format="csv", location="Nairobi").decode())))
+        self.assertEqual(rows[0][:3], ["id", "title", "description"])
+        self.assertEqual(len(rows), 6)
+        self.assertEqual({row[3] for row in rows[1:]}, {"Nairobi"})
+
+    def test_ndjson_with_fields_and_search(self):
+        lines = self.get(format="ndjson", search="auction", fields="id,price").splitlines()
+        records = [json.loads(line) for line in lines]
+        self.assertEqual(len(records), 5)
+        self.assertEqual(set(records[0]), {"id", "price"})
+
+    @unittest.skipUnless(parquet_available(), "pyarrow is not installed")
+    def test_parquet(self):
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(io.BytesIO(self.get(format="parquet")))
+        self.assertEqual(table.num_rows, 10)
+        self.assertEqual(str(table.schema.field("price").type), "decimal128(12, 2)")
+
+    async def test_streams_under_asgi(self):
+        response = await self.async_client.get(self.url, {"format": "ndjson", "fields": "id,location"})
+        self.assertTrue(response.is_async)
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            # How the ASGI handler sends the body; a sync iterator would be read whole first
+            body = b"".join([chunk async for chunk in response])
+        self.assertEqual(caught, [])
+
+        ids = [obj.pk async for obj in Property.objects.order_by("pk")]
+        self.assertEqual([json.loads(line)["id"] for line in body.splitlines()], ids)
+
+    def test_rejects_unknown_format_and_fields(self):
+        self.assertEqual(self.client.get(self.url, {"format": "xml"}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"fields": "secret"}).status_code, 400)
+
+
+class KeysetPaginationTests(TestCase):
+    url = "/api/api/properties/"
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(23):
+            Property.objects.create(
+                title=f"Listing {i}", description=f"Listing {i} description", location="Nairobi",
+                price=(i % 3 + 1) * 100_000,
+            )
+        # Ties on the default ordering too
+        Property.objects.filter(pk__lte=Property.objects.order_by("pk")[10].pk).update(
+            created_at=Property.objects.order_by("pk").first().created_at
+        )
+
+    def setUp(self):
+        get_cache().clear()
+
+    def walk(self, url, link, params=None):
+        """Follow ``link`` from ``url``: the pages' ids and the URL of the last page."""
+        pages = []
+        while True:
+            body = self.client.get(url, params).json()
+            pages.append([row["id"] for row in body["results"]])
+            if not body[link]:
+                return pages, url
+            url, params = body[link], None
+
+    def test_cursors_walk_forward_and_back(self):
+        orderings = {
+            "price": Property.objects.order_by("price", "pk"),
+            "-price": Property.objects.order_by("-price", "-pk"),
+            "-created_at": Property.objects.order_by("-created_at", "-pk"),
+        }
+        for ordering, queryset in orderings.items():
+            with self.subTest(ordering=ordering):
+                expected = list(queryset.values_list("pk", flat=True))
+                pages, last = self.walk(self.url, "next", {"ordering": ordering, "page_size": 4})
+                self.assertEqual([pk for page in pages for pk in page], expected)
+                self.assertEqual([len(page) for page in pages], [4] * 5 + [3])
+
+                backwards, _ = self.walk(last, "previous")
+                self.assertEqual(backwards, pages[::-1])
+
+    def test_invalid_cursors_are_not_found(self):
+        body = self.client.get(self.url, {"ordering": "price", "page_size": 2}).json()
+        cursor = parse_qs(urlparse(body["next"]).query)["cursor"][0]
+        tampered = base64.urlsafe_b64encode(json.dumps({"o": "price", "v": "cheap", "id": 1, "r": False}).encode())
+        for params in (
+            {"cursor": "bogus"},
+            {"cursor": cursor, "ordering": "-created_at"},
+            {"cursor": tampered.decode(), "ordering": "price"},
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(self.url, params).status_code, 404)
+
+    def test_sparse_fields(self):
+        def fields(**params):
+            return set(self.client.get(self.url, {"page_size": 1, **params}).json()["results"][0])
+
+        everything = set(PropertyListSerializer.Meta.fields)
+        self.assertEqual(fields(), everything - {"description"})
+        self.assertEqual(fields(fields="id,price"), {"id", "price"})
+        self.assertEqual(fields(fields=" description , title"), {"description", "title"})
+        self.assertEqual(fields(fields="bogus"), {"id"})
+
+
+class AlertRuleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.default = User.objects.create_user("default", "d@example.com", "pw")
+        cls.local = User.objects.create_user("local", "l@example.com", "pw")
+        for user in (cls.default, cls.local):
+            NotificationPreference.objects.create(user=user)
+
+        cls.default_rule = AlertRule.objects.get(user=cls.default)
+        cls.local_rule = AlertRule.objects.get(user=cls.local)
+        cls.local_rule.min_distress_score = 2
+        cls.local_rule.any_location = False
+        cls.local_rule.min_price, cls.local_rule.max_price = 500_000, 2_000_000
+        cls.local_rule.save()
+        AlertRuleLocation.objects.create(rule=cls.local_rule, location_key="nairobi")
+        AlertRule.objects.create(user=cls.local, min_distress_score=0, is_active=False)
+
+    def listing(self, score, location="Nairobi", price=1_000_000):
+        return Property(title="Listing", location=location, price=price, distress_score=score)
+
+    def test_matching(self):
+        cases = [
+            (self.listing(6), {self.default_rule, self.local_rule}),
+            (self.listing(3, location=" NAIROBI"), {self.local_rule}),
+            (self.listing(3, location="Kisumu"), set()),
+            (self.listing(6, location="Kisumu"), {self.default_rule}),
+            (self.listing(3, price=400_000), set()),
+            (self.listing(3, price=2_000_000), {self.local_rule}),
+            (self.listing(3, price=2_000_001), set()),
+        ]
+        for prop, expected in cases:
+            with self.subTest(location=prop.location, price=prop.price, score=prop.distress_score):
+                self.assertEqual(set(AlertRule.matching(prop)), expected)
+
+    def test_notify_users_follows_the_rules(self):
+        low = Property.objects.create(title="Low", description="", location="Nairobi", price=1_000_000, distress_score=3)
+        high = Property.objects.create(title="High", description="", location="Nairobi", price=1_000_000, distress_score=6)
+
+        self.assertEqual(notify_users(low), 1)
+        self.assertEqual(notify_users(high), 2)
+        self.assertEqual(notify_users(low, threshold=5), 0)
+        self.assertEqual(
+            sorted(Notification.objects.values_list("property__title", "recipient")),
+            [("High", "d@example.com"), ("High", "l@example.com"), ("Low", "l@example.com")],
+        )
+
+
+class AlertRuleMigrationTests(TransactionTestCase):
+    def migrate(self, *targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(list(targets) or executor.loader.graph.leaf_nodes())
+        return executor.loader.project_state(targets).apps if targets else None
+
+    def tearDown(self):
+        self.migrate()
+
+    def test_existing_subscribers_get_the_old_default(self):
+        apps = self.migrate(("listings", "0004_distresskeyword"))
+        User = apps.get_model("auth", "User")
+        NotificationPreference = apps.get_model("listings", "NotificationPreference")
+        subscriber = User.objects.create(username="subscriber")
+        NotificationPreference.objects.create(user=subscriber, email_alert=True)
+        NotificationPreference.objects.create(user=subscriber, sms_alert=True)
+        User.objects.create(username="bystander")
+
+        apps = self.migrate(("listings", "0005_alertrule"))
+        rules = apps.get_model("listings", "AlertRule").objects.all()
+        self.assertEqual(
+            [(rule.user_id, rule.min_distress_score, rule.any_location, rule.is_active) for rule in rules],
+            [(subscriber.pk, 5.0, True, True)],
+        )
+
+
+@enforce_query_budgets
+class FavoriteQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.user = User.objects.create_user("buyer", "b@example.com", "pw")
+        cls.other = User.objects.create_user("other", "o@example.com", "pw")
+        cls.properties = Property.objects.bulk_create([
+            Property(title=f"Listing {i}", description="", location="Nairobi",
+                     location_key="nairobi", price=1_000_000 + i)
+            for i in range(3)
+        ])
+
+    def setUp(self):
+        get_cache().clear()
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def favorite(self, user, prop):
+        return Favorite.objects.create(user=user, property=prop)
+
+    def test_favorite_count_follows_adds_and_removes(self):
+        first, second = self.properties[:2]
+        favorite = self.favorite(self.user, first)
+        self.favorite(self.other, first)
+        self.favorite(self.user, second)
+        first.refresh_from_db()
+        self.assertEqual(first.favorite_count, 2)
+
+        favorite.delete()
+        self.other.delete()
+        first.refresh_from_db()
+        self.assertEqual(first.favorite_count, 0)
+
+    def test_favorite_list_is_constant_in_queries(self):
+        self.favorite(self.user, self.properties[0])
+        with self.assertNumQueries(1):
+            self.api.get("/api/api/favorites/")
+
+        for prop in self.properties[1:]:
+            self.favorite(self.user, prop)
+        with self.assertNumQueries(1):
+            response = self.api.get("/api/api/favorites/")
+        self.assertEqual(len(response.json()), 3)
+
+    def test_dashboard_is_constant_in_queries(self):
+        self.client.force_login(self.user)
+        self.favorite(self.user, self.properties[0])
+        self.client.get("/api/dashboard/")  # creates the notification preferences
+        # session, user, preferences, favorites joined to their properties
+        with self.assertNumQueries(4):
+            self.client.get("/api/dashboard/")
+
+        for prop in self.properties[1:]:
+            self.favorite(self.user, prop)
+        with self.assertNumQueries(4):
+            self.client.get("/api/dashboard/")
+
+    def test_order_by_favorite_count(self):
+        self.favorite(self.user, self.properties[1])
+        self.favorite(self.other, self.properties[1])
+        self.favorite(self.user, self.properties[2])
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/api/properties/", {"ordering": "-favorite_count"})
+        counts = [row["favorite_count"] for row in response.json()["results"]]
+        self.assertEqual(counts, [2, 1, 0])
+
+
+@enforce_query_budgets
+class PropertyListPageTests(TestCase):
+    url = "/api/properties/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user("browser", "br@example.com", "pw")
+        cls.properties = Property.objects.bulk_create([
+            Property(title=f"Listing {i}", description="", location=location,
+                     location_key=location.lower(), price=1_000_000 + i * 1000, distress_score=i % 10)
+            for i, location in enumerate(["Nairobi", "Mombasa"] * 20)
+        ])
+
+    def setUp(self):
+        get_cache().clear()
+        self.client.force_login(self.user)
+
+    def titles(self, response):
+        return [p.title for p, _ in response.context["rows"]]
+
+    def test_pages_without_count(self):
+        # session, user, one page of listings
+        with self.assertNumQueries(3):
+            first = self.client.get(self.url)
+        self.assertEqual(len(first.context["rows"]), 25)
+        self.assertContains(first, 'hx-get="/api/properties/rows/?')
+        # The CDN copy of htmx is pinned to its published hash
+        self.assertContains(first, 'integrity="sha384-')
+        self.assertContains(first, 'crossorigin="anonymous"')
+
+        second = self.client.get(first.context["next_url"])
+        self.assertEqual(len(second.context["rows"]), 15)
+        self.assertIsNone(second.context["next_url"])
+        self.assertEqual(len(set(self.titles(first) + self.titles(second))), 40)
+
+        self.assertEqual(self.client.get(self.url, {"cursor": "bogus"}).status_code, 404)
+
+    def test_filters(self):
+        response = self.client.get(self.url, {
+            "location": " nairobi ", "min_price": 1_010_000, "max_price": 1_030_000,
+            "min_score": 2, "ordering": "price",
+        })
+        # Listings 10, 20 and 30 fall below the score or above the price
+        self.assertEqual(self.titles(response), [f"Listing {i}" for i in (12, 14, 16, 18, 22, 24, 26, 28)])
+
+        invalid = self.client.get(self.url, {"min_price": 5, "max_price": 1})
+        self.assertContains(invalid, "Min price must not exceed max price.")
+
+    def test_rows_partial_follows_cursor_and_caches_fragments(self):
+        first = self.client.get(self.url, {"ordering": "-distress_score"})
+        rows = self.client.get(first.context["next_rows_url"])
+        self.assertTemplateUsed(rows, "properties/_property_rows.html")
+        self.assertTemplateNotUsed(rows, "base.html")
+        self.assertEqual(len(rows.context["rows"]), 15)
+
+        with self.assertTemplateNotUsed("properties/_property_row.html"):
+            self.client.get(self.url, {"ordering": "-distress_score"})
+
+        # A new favorite changes the row's key without touching updated_at
+        Favorite.objects.create(user=self.user, property=self.properties[9])
+        response = self.client.get(self.url, {"ordering": "-distress_score"})
+        self.assertTemplateUsed(response, "properties/_property_row.html")
+        self.assertEqual(dict(response.context["rows"])[self.properties[9]].count("<td>1</td>"), 1)
+
+
+def asgi_urlconf():
+    """The listings API routes with their views built as under the ASGI app."""
+    with override_settings(ASYNC_VIEWS=True):
+        api = [
+            path(str(route.pattern), route.callback.view_class.as_view(**route.callback.view_initkwargs), name=route.name)
+            for route in urls.urlpatterns if hasattr(route.callback, "view_class")
+        ]
+    urlconf = ModuleType("asgi_urls")
+    urlconf.urlpatterns = [path("api/", include((api, "listings"), namespace=None))]
+    return urlconf
+
+
+@enforce_query_budgets
+@override_settings(ROOT_URLCONF=asgi_urlconf())
+class AsyncReadPathTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user("investor", "i@example.com", "pw")
+        cls.prop = Property.objects.create(
+            title="Bank auction", description="must sell", location="Nairobi", price=1_000_000,
+        )
+        Favorite.objects.create(user=cls.user, property=cls.prop)
+
+    def setUp(self):
+        get_cache().clear()
+        self.auth = {"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+
+    def test_read_views_are_async_under_asgi_only(self):
+        for url in ("/api/api/properties/", f"/api/api/properties/{self.prop.pk}/", "/api/api/favorites/"):
+            with self.subTest(url=url):
+                self.assertTrue(iscoroutinefunction(resolve(url).func))
+                self.assertFalse(iscoroutinefunction(resolve(url, "config.urls").func))
+
+    async def test_list_and_detail(self):
+        response = await self.async_client.get("/api/api/properties/", {"location": "Nairobi"})
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual([row["id"] for row in response.json()["results"]], [self.prop.pk])
+
+        cached = await self.async_client.get("/api/api/properties/", {"location": "Nairobi"})
+        self.assertEqual(cached["X-Cache"], "HIT")
+
+        detail = await self.async_client.get(f"/api/api/properties/{self.prop.pk}/")
+        self.assertEqual(detail.json()["title"], "Bank auction")
+        self.assertIn("ETag", detail)
+        missing = await self.async_client.get(f"/api/api/properties/{self.prop.pk + 100}/")
+        self.assertEqual(missing.status_code, 404)
+
+    async def test_favorites_need_authentication(self):
+        response = await self.async_client.get("/api/api/favorites/")
+        self.assertEqual(response.status_code, 401)
+
+        response = await self.async_client.get("/api/api/favorites/", headers=self.auth)
+        self.assertEqual(response.json()[0]["property"]["id"], self.prop.pk)
+
+    @override_settings(PERF_SERVER_TIMING=True)
+    async def test_writes_run_in_a_thread(self):
+        response = await self.async_client.post(
+            "/api/api/properties/",
+            {"title": "Urgent sale", "description": "urgent auction", "location": "Nairobi", "price": 500_000},
+            content_type="application/json",
+            headers=self.auth,
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertGreater(response.json()["distress_score"], 0)
+        self.assertIn("scoring", response["Server-Timing"])
+
+
+class ListingStreamTests(TestCase):
+    url = "/api/api/properties/stream/"
+
+    def setUp(self):
+        reset_broker()
+
+    async def open_stream(self, **params):
+        response = await self.async_client.get(self.url, params)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b": subscribed\n\n")
+        return stream
+
+    def write(self, func, *args):
+        with self.captureOnCommitCallbacks(execute=True):
+            return func(*args)
+
+    async def next_event(self, stream):
+        chunk = (await asyncio.wait_for(anext(stream), 5)).decode()
+        return [
+            (frame.split("\n")[0], json.loads(frame.split("data: ", 1)[1]))
+            for frame in chunk.strip().split("\n\n")
+        ]
+
+    async def test_streams_matching_saves(self):
+        stream = await self.open_stream(location=" nairobi", min_score=5, max_price=2_000_000)
+
+        create = partial(Property.objects.create, description="urgent auction", distress_score=6)
+        await sync_to_async(self.write)(partial(create, title="Elsewhere", location="Nakuru", price=500_000))
+        await sync_to_async(self.write)(partial(create, title="Pricey", location="Nairobi", price=9_000_000))
+        await sync_to_async(self.write)(partial(create, title="Calm", location="Nairobi", price=800_000, distress_score=1))
+        prop = await sync_to_async(self.write)(partial(create, title="Match", location="Nairobi", price=800_000))
+
+        [(event, row)] = await self.next_event(stream)
+        self.assertEqual((event, row["id"], row["title"]), ("event: created", prop.pk, "Match"))
+
+        prop.price = 700_000
+        await sync_to_async(self.write)(prop.save)
+        [(event, row)] = await self.next_event(stream)
+        self.assertEqual((event, row["price"]), ("event: updated", "700000.00"))
+
+    async def test_bulk_loaded_duplicates_stream_created_before_flagged(self):
+        stream = await self.open_stream()
+        description = NearDuplicateTests.description
+        rows = (
+            "title,description,location,price\n"
+            f"A,\"{description}\",Kileleshwa,24000000\n"
+            f"B,\"{description.upper()}\",kileleshwa,24100000\n"
+        )
+        await sync_to_async(self.write)(process_csv, io.BytesIO(rows.encode()))
+        first, second = [obj async for obj in Property.objects.order_by("pk")]
+
+        events = []
+        while len(events) < 3:
+            events += [(event, row["id"]) for event, row in await self.next_event(stream)]
+        self.assertEqual(
+            events,
+            [("event: created", first.pk), ("event: created", second.pk), ("event: updated", second.pk)],
+        )
+
+    async def test_streams_bulk_imports(self):
+        stream = await self.open_stream(location="Kisumu")
+        rows = (
+            "title,description,location,price\n"
+            "A,Bank auction,Kisumu,1000000\n"
+            "B,Bank auction,Mombasa,1000000\n"
+            "C,Distress sale,kisumu,2000000\n"
+        )
+        await sync_to_async(self.write)(process_csv, io.BytesIO(rows.encode()))
+        events = await self.next_event(stream)
+        self.assertEqual([(event, row["title"]) for event, row in events], [("event: created", "A"), ("event: created", "C")])
+
+    def test_writes_skip_publishing_without_streams(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            Property.objects.create(title="Quiet", description="", location="Nairobi", price=1)
+        self.assertFalse([callback for callback in callbacks if callback.__module__ == "listings.stream"])
+
+    async def test_rejects_invalid_filters(self):
+        response = await self.async_client.get(self.url, {"min_price": 5, "max_price": 1})
+        self.assertEqual(response.status_code, 400)
+
+    def test_needs_asgi(self):
+        response = self.client.get(self.url, headers={"Accept": "text/event-stream"})
+        self.assertEqual(response.status_code, 501)
+
+
+def fake_redis_modules():
+    """
+    ``redis`` and ``redis.asyncio`` modules with just what RedisBroker
+    uses, backed by one in-process pub/sub server.
+    """
+    subscribers = []  # (loop, queue, channel)
+
+    class RedisError(Exception):
+        pass
+
+    class Redis:
+        @classmethod
+        def from_url(cls, url):
+            return cls()
+
+        def publish(self, channel, data):
+            message = {"type": "message", "channel": channel, "data": data}
+            for loop, queue, subscribed in list(subscribers):
+                if subscribed == channel:
+                    loop.call_soon_threadsafe(queue.put_nowait, message)
+
+        def pubsub_numsub(self, channel):
+            return [(channel, sum(subscribed == channel for *_, subscribed in subscribers))]
+
+    class PubSub:
+        def __init__(self):
+            self.queue = asyncio.Queue()
+            self.subscriptions = []
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc_info):
+            for subscription in self.subscriptions:
+                subscribers.remove(subscription)
+
+        async def subscribe(self, channel):
+            subscription = (asyncio.get_running_loop(), self.queue, channel)
+            self.subscriptions.append(subscription)
+            subscribers.append(subscription)
+            self.queue.put_nowait({"type": "subscribe", "channel": channel, "data": 1})
+
+        async def listen(self):
+            while True:
+                yield await self.queue.get()
+
+    class AsyncRedis:
+        @classmethod
+        def from_url(cls, url):
+            return cls()
+
+        def pubsub(self):
+            return PubSub()
+
+    redis = ModuleType("redis")
+    redis.Redis, redis.RedisError = Redis, RedisError
+    redis.asyncio = ModuleType("redis.asyncio")
+    redis.asyncio.Redis = AsyncRedis
+    return {"redis": redis, "redis.asyncio": redis.asyncio}
+
+
+@override_settings(LISTINGS_STREAM_BROKER="redis", LISTINGS_STREAM_REDIS_URL="redis://streams")
+class RedisListingStreamTests(ListingStreamTests):
+    """The stream tests again, with writes going through Redis pub/sub."""
+
+    def setUp(self):
+        super().setUp()
+        self.enterContext(mock.patch.dict(sys.modules, fake_redis_modules()))
+
+    async def open_stream(self, **params):
+        stream = await super().open_stream(**params)
+        # The process's channel listener subscribes in the background
+        for _ in range(100):
+            if get_broker().client.pubsub_numsub(CHANNEL)[0][1]:
+                break
+            await asyncio.sleep(0.01)
+        return stream
+
+    async def test_skips_malformed_messages(self):
+        stream = await self.open_stream(location="Nairobi")
+        client = get_broker().client
+        for data in (b"not json", b'{"kind": "created"}', b'{"kind": "created", "rows": [{"price": "x"}]}'):
+            client.publish(CHANNEL, data)
+
+        with self.assertLogs("listings.stream", "WARNING") as logs:
+            prop = await sync_to_async(self.write)(partial(
+                Property.objects.create, title="After", description="", location="Nairobi", price=1,
+            ))
+            [(event, row)] = await self.next_event(stream)
+        self.assertEqual((event, row["id"]), ("event: created", prop.pk))
+        self.assertEqual(len(logs.records), 3)
+
+
+@enforce_query_budgets
+class ChangeFeedTests(TestCase):
+    url = "/api/api/properties/changes/"
+
+    def listing(self, title, **fields):
+        return Property.objects.create(
+            title=title, description="must sell", location="Nairobi", price=1_000_000, **fields
+        )
+
+    async def sync(self, since=None, **params):
+        if since:
+            params["since"] = since
+        response = await self.async_client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    async def test_delta_sync(self):
+        first = await sync_to_async(self.listing)("First")
+        page = await self.sync()
+        self.assertEqual([(c["kind"], c["listing"]["title"]) for c in page["changes"]], [("created", "First")])
+        self.assertFalse(page["has_more"])
+
+        second = await sync_to_async(self.listing)("Second")
+        first.price = 900_000
+        await sync_to_async(first.save)()
+        rows = "title,description,location,price\nBulk,Bank auction,Kisumu,1000000\n"
+        await sync_to_async(process_csv)(io.BytesIO(rows.encode()))
+        second_pk = second.pk
+        await sync_to_async(second.delete)()
+
+        page = await self.sync(page["next"])
+        self.assertEqual(
+            [(c["kind"], c["id"]) for c in page["changes"]],
+            [("updated", first.pk), ("created", await Property.objects.values_list("pk", flat=True).aget(title="Bulk")),
+             ("deleted", second_pk)],
+        )
+        self.assertEqual(page["changes"][0]["listing"]["price"], "900000.00")
+        self.assertEqual([c["seq"] for c in page["changes"]], sorted(c["seq"] for c in page["changes"]))
+
+        caught_up = await self.sync(page["next"])
+        self.assertEqual(caught_up["changes"], [])
+
+    async def test_pages_follow_the_token(self):
+        for title in ("A", "B", "C"):
+            await sync_to_async(self.listing)(title)
+        page = await self.sync(limit=2)
+        self.assertTrue(page["has_more"])
+        rest = await self.sync(page["next"], limit=2)
+        self.assertEqual([c["listing"]["title"] for c in page["changes"] + rest["changes"]], ["A", "B", "C"])
+        self.assertFalse(rest["has_more"])
+
+    def test_log_is_compacted(self):
+        prop = self.listing("Edited")
+        for price in (900_000, 800_000, 700_000):
+            prop.price = price
+            prop.save()
+        self.assertEqual(sorted(PropertyChange.objects.filter(property_id=prop.pk).values_list("kind", flat=True)),
+                         ["created", "updated"])
+        pk = prop.pk
+        prop.delete()
+        self.assertEqual(list(PropertyChange.objects.filter(property_id=pk).values_list("kind", flat=True)), ["deleted"])
+
+    async def test_bulk_loaded_duplicates_are_created_before_flagged(self):
+        description = NearDuplicateTests.description
+        rows = (
+            "title,description,location,price\n"
+            f"A,\"{description}\",Kileleshwa,24000000\n"
+            f"B,\"{description.upper()}\",kileleshwa,24100000\n"
+        )
+        await sync_to_async(process_csv)(io.BytesIO(rows.encode()))
+        first, second = [obj async for obj in Property.objects.order_by("pk")]
+        self.assertEqual(second.duplicate_of_id, first.pk)
+
+        log = [(c.property_id, c.kind) async for c in PropertyChange.objects.order_by("seq")]
+        self.assertEqual(log, [(first.pk, "created"), (second.pk, "created"), (second.pk, "updated")])
+        page = await self.sync()
+        self.assertEqual(
+            [(c["kind"], c["id"]) for c in page["changes"]], [("created", first.pk), ("created", second.pk)]
+        )
+        self.assertEqual(page["changes"][1]["listing"]["duplicate_of"], first.pk)
+
+    def test_rejects_bad_and_expired_tokens(self):
+        self.assertEqual(self.client.get(self.url, {"since": "not-a-token"}).status_code, 400)
+        expired = encode_token(1, time.time() - 31 * 86400)
+        self.assertEqual(self.client.get(self.url, {"since": expired}).status_code, 410)
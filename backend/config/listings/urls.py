@@ -8,9 +8,17 @@ from .views import (
     FavoriteDetailView,
     NotificationPreferenceView,
     PropertyCSVUploadView,
+    CSVImportJobStatusView,
+    PropertyCacheStatsView,
+    PropertyExportView,
+    PropertyStreamView,
+    PropertyChangesView,
+    AlertRuleListView,
+    AlertRuleDetailView,
 
     # UI views
     property_list_ui,
+    property_rows_partial,
     dashboard_view,
     add_favorite,
     remove_favorite,
@@ -19,16 +27,24 @@ from .views import (
 urlpatterns = [
     # UI ROUTES
     path("properties/", property_list_ui, name="property-list-ui"),
+    path("properties/rows/", property_rows_partial, name="property-rows"),
     path("dashboard/", dashboard_view, name="dashboard"),
     path("favorites/add/<int:property_id>/", add_favorite, name="add-favorite"),
     path("favorites/remove/<int:favorite_id>/", remove_favorite, name="remove-favorite"),
     # API ROUTESs
     path("api/properties/", PropertyListView.as_view(), name="api-property-list"),
     path("api/properties/<int:pk>/", PropertyDetailView.as_view(), name="api-property-detail"),
+    path("api/properties/export/", PropertyExportView.as_view(), name="api-property-export"),
+    path("api/properties/stream/", PropertyStreamView.as_view(), name="api-property-stream"),
+    path("api/properties/changes/", PropertyChangesView.as_view(), name="api-property-changes"),
+    path("api/properties/cache-stats/", PropertyCacheStatsView.as_view(), name="api-property-cache-stats"),
     path("api/favorites/", FavoriteListView.as_view(), name="api-favorite-list"),
     path("api/favorites/<int:pk>/", FavoriteDetailView.as_view(), name="api-favorite-detail"),
     path("api/notifications/", NotificationPreferenceView.as_view(), name="api-notifications"),
     path("api/upload-csv/", PropertyCSVUploadView.as_view(), name="api-upload-csv"),
+    path("api/upload-csv/<int:pk>/", CSVImportJobStatusView.as_view(), name="api-upload-csv-status"),
+    path("api/alert-rules/", AlertRuleListView.as_view(), name="api-alert-rule-list"),
+    path("api/alert-rules/<int:pk>/", AlertRuleDetailView.as_view(), name="api-alert-rule-detail"),
     path("properties/", views.property_list_ui, name="property-list"),
     path("properties/add/", views.add_property_view, name="add-property"),
 ]
@@ -1,15 +1,22 @@
 import csv
-import os
+import time
 from io import TextIOWrapper
-from django.db.models import Avg
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
-from twilio.rest import Client
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db import transaction
+
+from core.perf import timed
+
+from .dedupe import get_mode as get_dedupe_mode, near_duplicate_rows
+from .keywords import get_keyword_matcher
 
 # =========================
 # DISTRESS SCORING LOGIC
 # =========================
 
+# Built-in dictionary, used unless settings.DISTRESS_KEYWORDS_SOURCE
+# points at a file or the DistressKeyword table (see listings.keywords).
 DISTRESS_KEYWORDS = {
     "urgent": 2,
     "must sell": 3,
@@ -24,20 +31,14 @@ def keyword_distress_score(description: str) -> float:
     if not description:
         return 0.0
 
-    description = description.lower()
-    score = 0.0
-
-    for keyword, weight in DISTRESS_KEYWORDS.items():
-        if keyword in description:
-            score += weight
-
-    return score
+    return get_keyword_matcher().score(description)
 
 
 def price_deviation_score(price: float, market_average: float) -> float:
     if not market_average or market_average <= 0:
         return 0.0
 
+    price, market_average = float(price), float(market_average)
     deviation = (market_average - price) / market_average
 
     if deviation <= 0:
@@ -52,24 +53,60 @@ def price_deviation_score(price: float, market_average: float) -> float:
         return 1.0
 
 
+@timed("scoring")
 def calculate_distress_score(price: float, description: str, market_average: float = 0) -> float:
     keyword_score = keyword_distress_score(description)
     price_score = price_deviation_score(price, market_average)
     return round(keyword_score + price_score, 2)
 
 
+@timed("scoring")
+def score_batch(prices, descriptions, market_averages):
+    """
+    Vectorized ``calculate_distress_score`` over equal-length sequences.
+
+    Keyword weights come from one automaton pass per description and
+    price-deviation bands from ``np.select``. Returns a NumPy array of
+    scores identical to calling the scalar function row by row.
+    """
+    prices = np.asarray(prices, dtype=float)
+    market_averages = np.nan_to_num(np.asarray(market_averages, dtype=float))
+    descriptions = pd.Series(descriptions, dtype=object).fillna("").astype(str)
+    keyword_scores = np.asarray(get_keyword_matcher().score_many(descriptions), dtype=float)
+
+    has_average = market_averages > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        deviation = np.where(has_average, (market_averages - prices) / market_averages, 0.0)
+
+    price_scores = np.select(
+        [~has_average | (deviation <= 0), deviation >= 0.3, deviation >= 0.2, deviation >= 0.1],
+        [0.0, 5.0, 4.0, 2.0],
+        default=1.0,
+    )
+    return np.round(keyword_scores + price_scores, 2)
+
+
 def get_market_average_price(location: str) -> float:
     """
-    Calculate average property price for a given location.
+    Look up the reference price for a given location.
+    Uses the robust statistic chosen by LISTINGS_MARKET_PRICE_STRATEGY
+    when one has been computed (see listings.market), otherwise reads the
+    materialized mean from LocationMarketStats (an indexed lookup).
     Uses lazy import to avoid circular dependency.
     """
-    from .models import Property  # ✅ lazy import
+    from .market import robust_prices  # ✅ lazy import
+    from .models import LocationMarketStats, normalize_location  # ✅ lazy import
+
+    key = normalize_location(location)
+    robust_price = robust_prices().get(key)
+    if robust_price:
+        return float(robust_price)
 
     avg_price = (
-        Property.objects
-        .filter(location__iexact=location)
-        .aggregate(avg=Avg("price"))
-        .get("avg")
+        LocationMarketStats.objects
+        .filter(location_key=key, count__gt=0)
+        .values_list("mean_price", flat=True)
+        .first()
     )
 
     return float(avg_price) if avg_price else 0.0
@@ -79,115 +116,210 @@ def get_market_average_price(location: str) -> float:
 # CSV PROCESSING
 # =========================
 
-def process_csv(file):
-    from .models import Property  # ✅ lazy import
-
-    csv_file = TextIOWrapper(file, encoding="utf-8")
-    reader = csv.DictReader(csv_file)
-
-    created_count = 0
-
-    for row in reader:
-        try:
-            price = float(row.get("price", 0))
-        except ValueError:
-            continue
-
-        location = row.get("location", "").strip()
-        description = row.get("description", "")
+class MarketAverageTracker:
+    """
+    Running per-location price averages for bulk ingestion.
 
-        market_average = get_market_average_price(location)
+    Seeded with one query against LocationMarketStats, then updated in
+    memory as rows are accepted, so every row sees the same average the
+    row-by-row path would have read from the database. Locations with a
+    robust reference price (LISTINGS_MARKET_PRICE_STRATEGY) use it as is.
+    """
 
-        distress_score = calculate_distress_score(
-            price=price,
-            description=description,
-            market_average=market_average,
-        )
+    def __init__(self):
+        from .market import robust_prices  # ✅ lazy import
+        from .models import LocationMarketStats  # ✅ lazy import
 
-        Property.objects.create(
-            title=row.get("title", ""),
-            description=description,
-            location=location,
-            price=price,
-            distress_score=distress_score,
-            source="csv",
-        )
+        self.totals = {}
+        self.counts = {}
+        self.robust = robust_prices()
 
-        created_count += 1
+        rows = LocationMarketStats.objects.values_list("location_key", "count", "price_sum")
+        for location_key, count, price_sum in rows:
+            self.totals[location_key] = float(price_sum)
+            self.counts[location_key] = count
 
-    return created_count
+    def average(self, location: str) -> float:
+        from .models import normalize_location  # ✅ lazy import
 
+        key = normalize_location(location)
+        if self.robust.get(key):
+            return self.robust[key]
+        count = self.counts.get(key)
+        return self.totals[key] / count if count else 0.0
 
-# =========================
-# NOTIFICATIONS
-# =========================
+    def add(self, location: str, price: float):
+        from .models import normalize_location  # ✅ lazy import
 
-SENDGRID_API_KEY = os.getenv("SENDGRID_API_KEY")
-TWILIO_SID = os.getenv("TWILIO_SID")
-TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
-TWILIO_PHONE_NUMBER = os.getenv("TWILIO_PHONE_NUMBER")
+        key = normalize_location(location)
+        self.totals[key] = self.totals.get(key, 0.0) + price
+        self.counts[key] = self.counts.get(key, 0) + 1
 
 
-def send_email_alert(to_email, subject, content):
-    if not SENDGRID_API_KEY:
-        return
+def _chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
 
-    message = Mail(
-        from_email="no-reply@propertyalert.com",
-        to_emails=to_email,
-        subject=subject,
-        html_content=content,
-    )
 
-    try:
-        sg = SendGridAPIClient(SENDGRID_API_KEY)
-        sg.send(message)
-    except Exception as e:
-        print(f"SendGrid error: {e}")
+class CSVChunkImporter:
+    """
+    Scores and writes CSV rows one chunk at a time.
+
+    Rows are scored against in-memory market averages and written with
+    ``bulk_create``. Rows whose (title, location) already exists, in the
+    database or in an earlier chunk, are skipped as duplicates, and so
+    are near-duplicates when ``LISTINGS_DEDUPE_MODE`` is ``"merge"``. The
+    caller owns the transaction, so chunks can be committed together
+    (``process_csv``) or one by one (background import jobs).
+    """
 
+    def __init__(self, batch_size=None):
+        self.batch_size = batch_size or settings.LISTINGS_CSV_BATCH_SIZE
+        self.timings = {"averages": 0.0, "parse": 0.0, "score": 0.0, "write": 0.0}
+        self.created, self.rejected, self.duplicates = 0, 0, 0
+        self.seen = set()
+
+        stage = time.perf_counter()
+        self.averages = MarketAverageTracker()
+        self.timings["averages"] += time.perf_counter() - stage
+
+    def import_chunk(self, chunk):
+        """Import one list of CSV rows; returns (created, rejected, duplicates)."""
+        from .models import Property, normalize_location  # ✅ lazy import
+        from .signals import properties_bulk_created  # ✅ lazy import
+
+        rejected_count, duplicate_count = 0, 0
+
+        stage = time.perf_counter()
+        parsed = []
+        for row in chunk:
+            try:
+                price = float(row.get("price", 0))
+            except (TypeError, ValueError):
+                rejected_count += 1
+                continue
+            location = (row.get("location") or "").strip()
+            parsed.append((row, price, location, (row.get("title") or "", normalize_location(location))))
+
+        # One lookup per chunk against the (title, location_key) unique index
+        self.seen.update(
+            Property.objects
+            .filter(title__in={key[0] for *_, key in parsed})
+            .values_list("title", "location_key")
+        )
+        rows = []
+        for row, price, location, key in parsed:
+            if key in self.seen:
+                duplicate_count += 1
+                continue
+            self.seen.add(key)
+            rows.append((row, price, location))
+
+        if get_dedupe_mode() == "merge":
+            near = near_duplicate_rows([
+                (row.get("title") or "", row.get("description") or "", normalize_location(location), price)
+                for row, price, location in rows
+            ])
+            duplicate_count += len(near)
+            rows = [entry for i, entry in enumerate(rows) if i not in near]
+        self.timings["parse"] += time.perf_counter() - stage
+
+        stage = time.perf_counter()
+        market_averages = []
+        for row, price, location in rows:
+            market_averages.append(self.averages.average(location))
+            self.averages.add(location, price)
+
+        descriptions = [row.get("description") or "" for row, _, _ in rows]
+        scores = score_batch(
+            [price for _, price, _ in rows], descriptions, market_averages
+        ).tolist()
+
+        objs = [
+            Property(
+                title=row.get("title") or "",
+                description=description,
+                location=location,
+                location_key=normalize_location(location),
+                price=price,
+                distress_score=distress_score,
+                source="csv",
+            )
+            for (row, price, location), description, distress_score
+            in zip(rows, descriptions, scores)
+        ]
+        self.timings["score"] += time.perf_counter() - stage
+
+        stage = time.perf_counter()
+        Property.objects.bulk_create(objs, batch_size=self.batch_size)
+        properties_bulk_created.send(sender=Property, instances=objs)
+        self.timings["write"] += time.perf_counter() - stage
+
+        self.created += len(objs)
+        self.rejected += rejected_count
+        self.duplicates += duplicate_count
+        return len(objs), rejected_count, duplicate_count
+
+    def stats(self, elapsed):
+        return {
+            "created": self.created,
+            "rejected": self.rejected,
+            "duplicates": self.duplicates,
+            "batch_size": self.batch_size,
+            "elapsed": round(elapsed, 4),
+            "rows_per_sec": round(self.created / elapsed, 1) if elapsed else 0.0,
+            "timings": {name: round(value, 4) for name, value in self.timings.items()},
+        }
+
+
+def process_csv(file, batch_size=None):
+    """
+    Bulk-import properties from an uploaded CSV file in a single
+    transaction. Returns a stats dict with row counts, per-stage timings
+    (seconds) and throughput. Large uploads should go through a
+    ``CSVImportJob`` instead, which commits chunk by chunk.
+    """
+    started = time.perf_counter()
+    reader = csv.DictReader(TextIOWrapper(file, encoding="utf-8"))
 
-def send_sms_alert(to_number, content):
-    if not TWILIO_SID or not TWILIO_AUTH_TOKEN:
-        return
+    with transaction.atomic():
+        importer = CSVChunkImporter(batch_size)
+        for chunk in _chunked(reader, importer.batch_size):
+            importer.import_chunk(chunk)
 
-    client = Client(TWILIO_SID, TWILIO_AUTH_TOKEN)
+    return importer.stats(time.perf_counter() - started)
 
-    try:
-        client.messages.create(
-            body=content,
-            from_=TWILIO_PHONE_NUMBER,
-            to=to_number,
-        )
-    except Exception as e:
-        print(f"Twilio error: {e}")
 
+# =========================
+# NOTIFICATIONS
+# =========================
 
-def notify_users(property_obj, threshold=5):
-    """
-    Notify users if property distress score exceeds threshold.
+@timed("notification")
+def notify_users(property_obj, threshold=None):
     """
-    if property_obj.distress_score < threshold:
-        return
-
-    from .models import NotificationPreference  # ✅ lazy import
-
-    users = NotificationPreference.objects.all()
-    subject = f"Distress Property Alert: {property_obj.title}"
-    content = f"""
-    <p>A property is flagged as distressed:</p>
-    <ul>
-        <li>Title: {property_obj.title}</li>
-        <li>Location: {property_obj.location}</li>
-        <li>Price: {property_obj.price}</li>
-        <li>Distress Score: {property_obj.distress_score}</li>
-    </ul>
+    Queue alerts for users whose alert rules match the property.
+    Rules are matched with indexed queries instead of scanning every
+    subscriber. The old global floor (score >= 5) lives on in the rules:
+    subscribers start with a ``min_distress_score=5`` rule (existing ones
+    via migration 0005), so ``threshold`` no longer defaults to 5 and
+    only adds a floor on top of rules users may have lowered.
+    Delivery happens in the send_notifications worker, not the request.
     """
-
-    for pref in users:
-        if pref.email_alert:
-            send_email_alert(pref.user.email, subject, content)
-        if pref.sms_alert and pref.phone_number:
-            send_sms_alert(
-                pref.phone_number,
-                f"{subject}\nPrice: {property_obj.price}\nScore: {property_obj.distress_score}",
-            )
+    if property_obj.duplicate_of_id:
+        # Subscribers were alerted about the original listing
+        return 0
+    if threshold is not None and property_obj.distress_score < threshold:
+        return 0
+
+    from .models import AlertRule, NotificationPreference  # ✅ lazy import
+    from notifications.services import enqueue_property_alert  # ✅ lazy import
+
+    user_ids = AlertRule.matching(property_obj).values("user_id")
+    preferences = NotificationPreference.objects.filter(user_id__in=user_ids)
+    return enqueue_property_alert(property_obj, preferences)
@@ -1,15 +1,20 @@
 # =========================
 # Django imports
 # =========================
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.views.decorators.http import require_POST
 
 # =========================
 # DRF imports
 # =========================
 from rest_framework import generics, serializers, filters
+from rest_framework.renderers import JSONRenderer
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import (
@@ -22,10 +27,26 @@ from django_filters.rest_framework import DjangoFilterBackend
 # =========================
 # Local imports
 # =========================
-from .models import Property, Favorite, NotificationPreference
-from .forms import PropertyForm, PropertyCSVUploadForm
+from core.async_views import AsyncAPIViewMixin, AsyncListModelMixin, AsyncRetrieveModelMixin
+from core.perf import TimedSerializerMixin, query_budget
+from .models import (
+    Property,
+    Favorite,
+    NotificationPreference,
+    AlertRule,
+    AlertRuleLocation,
+    CSVImportJob,
+    normalize_location,
+)
+from .forms import PropertyForm, PropertyCSVUploadForm, PropertyFilterForm, ListingFilterForm
+from .cache import CachedResponseMixin, cache_stats, render_cached_rows
+from .changes import StaleToken, decode_token, read_changes
+from .export import EXPORTERS, EXPORT_FIELDS, aiter_chunks, parquet_available
+from .pagination import KeysetPagination, TemplateKeysetPagination
+from .search import FullTextSearchFilter
+from .serializers import PropertyListSerializer
+from .stream import get_broker, listing_stream
 from .utils import (
-    process_csv,
     calculate_distress_score,
     get_market_average_price,
     notify_users,
@@ -83,10 +104,36 @@ def remove_favorite(request, favorite_id):
 # ======================================================
 # UI: Property List (with inline Add Property form)
 # ======================================================
+# Columns rendered by properties/_property_row.html (plus the cache key)
+PROPERTY_ROW_FIELDS = ["id", "title", "location", "price", "distress_score", "favorite_count", "created_at", "updated_at"]
+
+
+def property_page(request, default_ordering="-created_at"):
+    """
+    Template context for one page of the HTML property list: the filter
+    form, the rows (rendered through the fragment cache) and the URLs of
+    the next page, as a full page and as bare rows for htmx.
+    """
+    filters = PropertyFilterForm(request.GET)
+    filters.is_valid()
+    queryset = filters.filter(Property.objects.only(*PROPERTY_ROW_FIELDS))
+
+    paginator = TemplateKeysetPagination(
+        ordering_fields=["created_at", "distress_score", "price"],
+        default_ordering=default_ordering,
+    )
+    properties = paginator.paginate(queryset, request)
+    return {
+        "filters": filters,
+        "rows": render_cached_rows("properties/_property_row.html", properties),
+        "next_url": paginator.get_page_url(reverse("property-list-ui")),
+        "next_rows_url": paginator.get_page_url(reverse("property-rows")),
+    }
+
+
+@query_budget(3, POST=20)
 @login_required
 def property_list_ui(request):
-    properties = Property.objects.all().order_by("-created_at")
-
     if request.method == "POST":
         form = PropertyForm(request.POST)
         if form.is_valid():
@@ -111,15 +158,23 @@ def property_list_ui(request):
         request,
         "properties/property_list.html",
         {
-            "properties": properties,
+            **property_page(request),
             "form": form,
         },
     )
 
 
+@query_budget(3)
+@login_required
+def property_rows_partial(request):
+    """The next page of rows for the property list's "Load more" (htmx)."""
+    return render(request, "properties/_property_rows.html", property_page(request))
+
+
 # ======================================================
 # UI: Dashboard
 # ======================================================
+@query_budget(10)
 @login_required
 def dashboard_view(request):
     user = request.user
@@ -154,17 +209,57 @@ class PropertyCSVUploadView(APIView):
         form = PropertyCSVUploadForm(request.POST, request.FILES)
         if form.is_valid():
             file = form.cleaned_data["csv_file"]
-            count = process_csv(file)
+            job = CSVImportJob.objects.create(
+                uploaded_by=request.user,
+                file=file,
+                original_name=file.name,
+                batch_size=settings.LISTINGS_CSV_BATCH_SIZE,
+            )
             return Response(
-                {"message": f"{count} properties uploaded successfully."}
+                {
+                    "message": "Upload queued for import.",
+                    "job": CSVImportJobSerializer(job, context={"request": request}).data,
+                },
+                status=202,
             )
         return Response({"error": "Invalid file."}, status=400)
 
 
+class CSVImportJobSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    rows_per_sec = serializers.FloatField(read_only=True)
+    status_url = serializers.HyperlinkedIdentityField(view_name="api-upload-csv-status")
+
+    class Meta:
+        model = CSVImportJob
+        fields = [
+            "id",
+            "original_name",
+            "status",
+            "rows_processed",
+            "rows_created",
+            "rows_rejected",
+            "rows_duplicate",
+            "rows_per_sec",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+            "status_url",
+        ]
+        read_only_fields = fields
+
+
+@query_budget(3)
+class CSVImportJobStatusView(generics.RetrieveAPIView):
+    queryset = CSVImportJob.objects.all()
+    serializer_class = CSVImportJobSerializer
+    permission_classes = [IsAdminUser]
+
+
 # ======================================================
 # API: Property
 # ======================================================
-class PropertySerializer(serializers.ModelSerializer):
+class PropertySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Property
         fields = [
@@ -175,31 +270,70 @@ class PropertySerializer(serializers.ModelSerializer):
             "price",
             "distress_score",
             "source",
+            "favorite_count",
+            "duplicate_of",
             "created_at",
             "updated_at",
         ]
-        read_only_fields = ["distress_score", "created_at", "updated_at"]
+        read_only_fields = ["distress_score", "favorite_count", "duplicate_of", "created_at", "updated_at"]
+
+    def validate(self, attrs):
+        title = attrs.get("title", getattr(self.instance, "title", None))
+        location = attrs.get("location", getattr(self.instance, "location", None))
+        if title and location and Property.duplicate_exists(
+            title, location, getattr(self.instance, "pk", None)
+        ):
+            raise serializers.ValidationError(
+                "A property with this title already exists in this location."
+            )
+        return attrs
 
 
-class PropertyListView(generics.ListCreateAPIView):
+@query_budget(3, POST=20)
+class PropertyListView(CachedResponseMixin, AsyncListModelMixin, generics.ListCreateAPIView):
     queryset = Property.objects.all().order_by("-created_at")
     serializer_class = PropertySerializer
     permission_classes = [AllowAny]
+    pagination_class = KeysetPagination
 
     filter_backends = [
         DjangoFilterBackend,
-        filters.SearchFilter,
+        FullTextSearchFilter,
         filters.OrderingFilter,
     ]
     filterset_fields = ["location"]
-    search_fields = ["title", "description"]
-    ordering_fields = ["price", "distress_score", "created_at"]
+    ordering_fields = ["price", "distress_score", "favorite_count", "created_at"]
 
     def get_permissions(self):
         if self.request.method == "POST":
             self.permission_classes = [IsAuthenticated]
         return super().get_permissions()
 
+    def get_serializer_class(self):
+        if self.request.method == "GET":
+            return PropertyListSerializer
+        return PropertySerializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method == "GET":
+            # Only load the columns the response will contain
+            fields = set(PropertyListSerializer.requested_fields(self.request))
+            queryset = queryset.only(
+                *(fields | {"id", "created_at", "updated_at", "price", "distress_score", "favorite_count"})
+            )
+        return queryset
+
+    def paginate_queryset(self, queryset):
+        rows = super().paginate_queryset(queryset)
+        self.set_cache_etag(self.request, rows)
+        return rows
+
+    async def apaginate_queryset(self, queryset):
+        rows = await super().apaginate_queryset(queryset)
+        self.set_cache_etag(self.request, rows)
+        return rows
+
     def perform_create(self, serializer):
         data = serializer.validated_data
         market_avg = get_market_average_price(data["location"])
@@ -216,10 +350,21 @@ class PropertyListView(generics.ListCreateAPIView):
         notify_users(property_obj)
 
 
-class PropertyDetailView(generics.RetrieveUpdateDestroyAPIView):
+@query_budget(3)
+class PropertyDetailView(CachedResponseMixin, AsyncRetrieveModelMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Property.objects.all()
     serializer_class = PropertySerializer
 
+    def get_object(self):
+        obj = super().get_object()
+        self.set_cache_etag(self.request, [obj])
+        return obj
+
+    async def aget_object(self):
+        obj = await super().aget_object()
+        self.set_cache_etag(self.request, [obj])
+        return obj
+
     def get_permissions(self):
         if self.request.method in ["PUT", "PATCH", "DELETE"]:
             self.permission_classes = [IsAuthenticated]
@@ -237,10 +382,139 @@ class PropertyDetailView(generics.RetrieveUpdateDestroyAPIView):
         notify_users(property_obj)
 
 
+class PropertyExportView(generics.GenericAPIView):
+    """
+    Stream the (filtered) property table as CSV, NDJSON or Parquet.
+
+    Accepts the same ``location`` / ``search`` / ``ordering`` filters as
+    PropertyListView, plus ``?format=csv|ndjson|parquet`` and
+    ``?fields=``. Rows are read with a server-side iterator and written
+    as they arrive, so memory use stays flat however large the table is,
+    under WSGI and ASGI alike.
+    """
+    queryset = Property.objects.all().order_by("pk")
+    permission_classes = [AllowAny]
+    chunk_size = 2000
+
+    filter_backends = [
+        DjangoFilterBackend,
+        FullTextSearchFilter,
+        filters.OrderingFilter,
+    ]
+    filterset_fields = ["location"]
+    ordering_fields = ["price", "distress_score", "favorite_count", "created_at"]
+
+    def perform_content_negotiation(self, request, force=False):
+        # ?format= selects the export format, not a DRF renderer; errors render as JSON
+        renderer = JSONRenderer()
+        return renderer, renderer.media_type
+
+    def get_fields(self, request):
+        requested = [f.strip() for f in request.query_params.get("fields", "").split(",") if f.strip()]
+        unknown = set(requested) - set(EXPORT_FIELDS)
+        if unknown:
+            raise serializers.ValidationError({"fields": f"Unknown fields: {', '.join(sorted(unknown))}"})
+        return [f for f in EXPORT_FIELDS if f in requested] or EXPORT_FIELDS
+
+    def get(self, request, format=None):
+        export_format = request.query_params.get("format", "csv")
+        if export_format not in EXPORTERS:
+            return Response(
+                {"error": f"Unsupported format. Choose one of: {', '.join(EXPORTERS)}."},
+                status=400,
+            )
+        if export_format == "parquet" and not parquet_available():
+            return Response({"error": "Parquet export requires pyarrow."}, status=400)
+
+        fields = self.get_fields(request)
+        rows = (
+            self.filter_queryset(self.get_queryset())
+            .values_list(*fields)
+            .iterator(chunk_size=self.chunk_size)
+        )
+        exporter, content_type, extension = EXPORTERS[export_format]
+        content = exporter(fields, rows)
+        if isinstance(request._request, ASGIRequest):
+            content = aiter_chunks(content)
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="properties.{extension}"'
+        return response
+
+
+class PropertyCacheStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, format=None):
+        return Response(cache_stats())
+
+
+@query_budget(2)
+class PropertyChangesView(AsyncAPIViewMixin, APIView):
+    """
+    Inserts, updates and deletes of listings since a sync token, in
+    commit order (see listings.changes). ``?since=`` takes the ``next``
+    token of the previous response; ``?limit=`` caps the entries.
+    """
+    permission_classes = [AllowAny]
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params.get("limit", settings.LISTINGS_CHANGES_PAGE_SIZE))
+        except ValueError:
+            raise serializers.ValidationError({"limit": "Must be an integer."})
+        return max(1, min(limit, settings.LISTINGS_CHANGES_MAX_PAGE_SIZE))
+
+    def get(self, request, format=None):
+        # Sync: under the async dispatch both queries share one thread hop
+        since, issued = 0, None
+        if request.query_params.get("since"):
+            try:
+                since, issued = decode_token(request.query_params["since"])
+            except StaleToken as exc:
+                return Response({"error": str(exc)}, status=410)
+            except ValueError as exc:
+                return Response({"error": str(exc)}, status=400)
+
+        entries, next_token, has_more = read_changes(since, issued, self.get_limit(request))
+        return Response({"changes": entries, "next": next_token, "has_more": has_more})
+
+
+class PropertyStreamView(AsyncAPIViewMixin, APIView):
+    """
+    Server-Sent Events of new and updated listings (see listings.stream),
+    filtered by ``location``, ``min_price``, ``max_price`` and
+    ``min_score``. Served by the ASGI app only.
+    """
+    # Always async: a stream holds its connection open on the event loop
+    view_is_async = True
+    permission_classes = [AllowAny]
+
+    def perform_content_negotiation(self, request, force=False):
+        # Accept: text/event-stream is answered by get(); errors render as JSON
+        renderer = JSONRenderer()
+        return renderer, renderer.media_type
+
+    async def get(self, request, format=None):
+        if not isinstance(request._request, ASGIRequest):
+            return Response({"error": "The listing stream is only served over ASGI."}, status=501)
+
+        form = ListingFilterForm(request.query_params)
+        if not form.is_valid():
+            return Response(form.errors, status=400)
+        if len(get_broker().subscriptions) >= settings.LISTINGS_STREAM_MAX_CLIENTS:
+            return Response({"error": "Too many open streams, retry later."}, status=503)
+
+        response = StreamingHttpResponse(listing_stream(form), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        # Stop proxies (nginx) from buffering the stream
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
 # ======================================================
 # API: Favorites
 # ======================================================
-class FavoriteSerializer(serializers.ModelSerializer):
+class FavoriteSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     property = PropertySerializer(read_only=True)
     property_id = serializers.PrimaryKeyRelatedField(
         queryset=Property.objects.all(),
@@ -254,12 +528,13 @@ class FavoriteSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "property", "added_at"]
 
 
-class FavoriteListView(generics.ListCreateAPIView):
+@query_budget(3)
+class FavoriteListView(AsyncListModelMixin, generics.ListCreateAPIView):
     serializer_class = FavoriteSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Favorite.objects.filter(user=self.request.user)
+        return Favorite.objects.filter(user=self.request.user).select_related("property")
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -276,13 +551,14 @@ class FavoriteDetailView(generics.DestroyAPIView):
 # ======================================================
 # API: Notification Preferences
 # ======================================================
-class NotificationPreferenceSerializer(serializers.ModelSerializer):
+class NotificationPreferenceSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = NotificationPreference
         fields = "__all__"
         read_only_fields = ["user"]
 
 
+@query_budget(6)
 class NotificationPreferenceView(generics.RetrieveUpdateAPIView):
     serializer_class = NotificationPreferenceSerializer
     permission_classes = [IsAuthenticated]
@@ -292,3 +568,81 @@ class NotificationPreferenceView(generics.RetrieveUpdateAPIView):
             user=self.request.user
         )
         return pref
+
+
+# ======================================================
+# API: Alert Rules
+# ======================================================
+class AlertRuleSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    locations = serializers.ListField(
+        child=serializers.CharField(max_length=255),
+        required=False,
+        write_only=True,
+        help_text="Leave empty to match any location.",
+    )
+
+    class Meta:
+        model = AlertRule
+        fields = [
+            "id",
+            "min_distress_score",
+            "min_price",
+            "max_price",
+            "locations",
+            "is_active",
+            "created_at",
+        ]
+        read_only_fields = ["id", "created_at"]
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data["locations"] = [loc.location_key for loc in instance.locations.all()]
+        return data
+
+    def validate(self, attrs):
+        min_price, max_price = attrs.get("min_price"), attrs.get("max_price")
+        if min_price is not None and max_price is not None and min_price > max_price:
+            raise serializers.ValidationError("min_price cannot exceed max_price.")
+        return attrs
+
+    def save_locations(self, rule, locations):
+        keys = {normalize_location(location) for location in locations} - {""}
+        rule.locations.all().delete()
+        AlertRuleLocation.objects.bulk_create(
+            [AlertRuleLocation(rule=rule, location_key=key) for key in keys]
+        )
+        rule.any_location = not keys
+        rule.save(update_fields=["any_location"])
+
+    def create(self, validated_data):
+        locations = validated_data.pop("locations", [])
+        rule = super().create(validated_data)
+        self.save_locations(rule, locations)
+        return rule
+
+    def update(self, instance, validated_data):
+        locations = validated_data.pop("locations", None)
+        rule = super().update(instance, validated_data)
+        if locations is not None:
+            self.save_locations(rule, locations)
+        return rule
+
+
+@query_budget(4)
+class AlertRuleListView(generics.ListCreateAPIView):
+    serializer_class = AlertRuleSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return AlertRule.objects.filter(user=self.request.user).prefetch_related("locations")
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+
+class AlertRuleDetailView(generics.RetrieveUpdateDestroyAPIView):
+    serializer_class = AlertRuleSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return AlertRule.objects.filter(user=self.request.user).prefetch_related("locations")
@@ -1,4 +1,8 @@
 from django.contrib import admin
 from .models import Notification
 
-admin.site.register(Notification)
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ("user", "notification_type", "recipient", "sent", "attempts", "created_at")
+    list_filter = ("notification_type", "sent")
@@ -0,0 +1,198 @@
+"""
+Delivery backends used by the notification outbox worker.
+
+Each backend sends a list of ``Notification`` objects for one channel and
+returns one entry per notification: ``None`` when it was delivered, or an
+error message when it should be retried. Backends are configured per
+channel in ``settings.NOTIFICATION_BACKENDS``.
+"""
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+
+import requests
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .transport import get_transport
+
+
+class BaseBackend:
+    def __init__(self, **options):
+        self.options = options
+
+    def send_messages(self, notifications):
+        raise NotImplementedError
+
+
+# =========================
+# PROVIDERS
+# =========================
+
+class SendGridEmailBackend(BaseBackend):
+    """
+    SendGrid v3 Mail Send over a pooled session.
+
+    Notifications sharing a subject and body (e.g. one alert fanned out to
+    many users) go out as a single request with one personalization per
+    recipient, up to SendGrid's limit of 1000 per request.
+    """
+    MAX_PERSONALIZATIONS = 1000
+
+    def __init__(
+        self,
+        api_key=None,
+        from_email="no-reply@propertyalert.com",
+        base_url="https://api.sendgrid.com",
+        rate=None,
+        pool_size=20,
+        **options,
+    ):
+        super().__init__(**options)
+        self.api_key = api_key or os.getenv("SENDGRID_API_KEY")
+        self.from_email = from_email
+        self.transport = get_transport(base_url, rate=rate, pool_size=pool_size)
+
+    def send_messages(self, notifications):
+        if not self.api_key:
+            return ["SENDGRID_API_KEY is not set"] * len(notifications)
+
+        groups = defaultdict(list)
+        for index, notification in enumerate(notifications):
+            groups[(notification.subject, notification.message)].append(index)
+
+        results = [None] * len(notifications)
+        for (subject, content), indexes in groups.items():
+            for start in range(0, len(indexes), self.MAX_PERSONALIZATIONS):
+                batch = indexes[start:start + self.MAX_PERSONALIZATIONS]
+                error = self.send_batch(
+                    subject, content, [notifications[i].recipient for i in batch]
+                )
+                for i in batch:
+                    results[i] = error
+        return results
+
+    def send_batch(self, subject, content, recipients):
+        payload = {
+            "personalizations": [{"to": [{"email": email}]} for email in recipients],
+            "from": {"email": self.from_email},
+            "subject": subject,
+            "content": [{"type": "text/html", "value": content}],
+        }
+        try:
+            response = self.transport.post(
+                "/v3/mail/send",
+                json=payload,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+            )
+        except requests.RequestException as e:
+            return f"SendGrid error: {e}"
+        if response.status_code >= 300:
+            return f"SendGrid error: HTTP {response.status_code} {response.text[:200]}"
+        return None
+
+
+class TwilioSMSBackend(BaseBackend):
+    """
+    Twilio Messages API over a pooled session. Twilio has no multi-recipient
+    SMS request, so throughput comes from the worker's thread pool and
+    is capped by ``rate`` (messages per second).
+    """
+
+    def __init__(
+        self,
+        account_sid=None,
+        auth_token=None,
+        from_number=None,
+        base_url="https://api.twilio.com",
+        rate=None,
+        pool_size=20,
+        **options,
+    ):
+        super().__init__(**options)
+        self.account_sid = account_sid or os.getenv("TWILIO_SID")
+        self.auth_token = auth_token or os.getenv("TWILIO_AUTH_TOKEN")
+        self.from_number = from_number or os.getenv("TWILIO_PHONE_NUMBER")
+        self.transport = get_transport(base_url, rate=rate, pool_size=pool_size)
+
+    def send_messages(self, notifications):
+        if not self.account_sid or not self.auth_token:
+            return ["TWILIO_SID / TWILIO_AUTH_TOKEN are not set"] * len(notifications)
+
+        path = f"/2010-04-01/Accounts/{self.account_sid}/Messages.json"
+        results = []
+        for notification in notifications:
+            try:
+                response = self.transport.post(
+                    path,
+                    data={
+                        "Body": notification.message,
+                        "From": self.from_number,
+                        "To": notification.recipient,
+                    },
+                    auth=(self.account_sid, self.auth_token),
+                )
+            except requests.RequestException as e:
+                results.append(f"Twilio error: {e}")
+                continue
+            if response.status_code >= 300:
+                results.append(f"Twilio error: HTTP {response.status_code} {response.text[:200]}")
+            else:
+                results.append(None)
+        return results
+
+
+# =========================
+# LOCAL / TESTING
+# =========================
+
+class ConsoleBackend(BaseBackend):
+    """Writes each notification to stdout instead of sending it."""
+
+    def send_messages(self, notifications):
+        for notification in notifications:
+            sys.stdout.write(
+                f"[{notification.notification_type}] to {notification.recipient}: "
+                f"{notification.subject or notification.message}\n"
+            )
+        return [None] * len(notifications)
+
+
+class FakeBackend(BaseBackend):
+    """
+    Offline stand-in for a provider, for load tests.
+
+    Keeps delivered notifications in ``FakeBackend.outbox`` and can
+    simulate per-request ``latency`` (seconds) and a random
+    ``failure_rate`` (0-1).
+    """
+    outbox = []
+    _lock = threading.Lock()
+
+    def __init__(self, latency=0.0, failure_rate=0.0, **options):
+        super().__init__(**options)
+        self.latency = latency
+        self.failure_rate = failure_rate
+
+    def send_messages(self, notifications):
+        if self.latency:
+            time.sleep(self.latency)
+
+        results = []
+        for notification in notifications:
+            if self.failure_rate and random.random() < self.failure_rate:
+                results.append("Simulated provider failure")
+                continue
+            with self._lock:
+                self.outbox.append(notification)
+            results.append(None)
+        return results
+
+
+def get_backend(channel):
+    config = settings.NOTIFICATION_BACKENDS[channel]
+    backend_class = import_string(config["BACKEND"])
+    return backend_class(**config.get("OPTIONS", {}))
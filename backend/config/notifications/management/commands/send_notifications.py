@@ -0,0 +1,68 @@
+import time
+from django.core.management.base import BaseCommand
+from notifications.services import deliver_pending
+
+
+class Command(BaseCommand):
+    help = "Drain the notification outbox through the configured email/SMS backends"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Notifications claimed per round"
+        )
+        parser.add_argument(
+            "--send-size",
+            type=int,
+            default=100,
+            help="Notifications handed to a backend per call"
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=8,
+            help="Threads sending to the providers concurrently"
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling for new notifications instead of exiting when the outbox is empty"
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Seconds to wait between polls when the outbox is empty (with --loop)"
+        )
+
+    def handle(self, *args, **options):
+        total_sent, total_failed = 0, 0
+        started = time.perf_counter()
+
+        try:
+            while True:
+                sent, failed = deliver_pending(
+                    batch_size=options["batch_size"],
+                    workers=options["workers"],
+                    send_size=options["send_size"],
+                )
+                total_sent += sent
+                total_failed += failed
+
+                if sent or failed:
+                    self.stdout.write(f"Sent {sent}, failed {failed}")
+                elif options["loop"]:
+                    time.sleep(options["interval"])
+                else:
+                    break
+        except KeyboardInterrupt:
+            pass
+
+        elapsed = time.perf_counter() - started
+        rate = total_sent / elapsed if elapsed else 0.0
+        self.stdout.write(self.style.SUCCESS(
+            f"Outbox drained: {total_sent} sent, {total_failed} failed "
+            f"in {elapsed:.2f}s ({rate:.0f} msgs/sec)."
+        ))
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from listings.models import Property
 
 class Notification(models.Model):
@@ -11,9 +12,22 @@ class Notification(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     property = models.ForeignKey(Property, on_delete=models.CASCADE, null=True, blank=True)
     notification_type = models.CharField(max_length=10, choices=NOTIFICATION_CHOICES)
+    recipient = models.CharField(max_length=255, blank=True)
+    subject = models.CharField(max_length=255, blank=True)
     message = models.TextField()
     sent = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Outbox bookkeeping for the send_notifications worker
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["sent", "next_attempt_at"], name="notification_outbox_idx"),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.notification_type} - Sent: {self.sent}"
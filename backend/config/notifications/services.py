@@ -0,0 +1,169 @@
+"""
+Notification outbox.
+
+Views only enqueue ``Notification`` rows (``sent=False``); the
+``send_notifications`` worker command drains them through the configured
+backends with retries and exponential backoff.
+"""
+import random
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.text import Truncator
+
+from .backends import get_backend
+from .models import Notification
+
+
+def enqueue_property_alert(property_obj, preferences=None, batch_size=1000):
+    """
+    Queue email/SMS alerts about ``property_obj`` for the given
+    NotificationPreference queryset (default: every user with
+    notifications enabled). Returns the number of notifications queued.
+    """
+    from listings.models import NotificationPreference  # ✅ lazy import
+
+    if preferences is None:
+        preferences = NotificationPreference.objects.all()
+
+    # Property.title alone can fill Notification.subject
+    subject = Truncator(f"Distress Property Alert: {property_obj.title}").chars(
+        Notification._meta.get_field("subject").max_length
+    )
+    content = f"""
+    <p>A property is flagged as distressed:</p>
+    <ul>
+        <li>Title: {property_obj.title}</li>
+        <li>Location: {property_obj.location}</li>
+        <li>Price: {property_obj.price}</li>
+        <li>Distress Score: {property_obj.distress_score}</li>
+    </ul>
+    """
+    sms_content = f"{subject}\nPrice: {property_obj.price}\nScore: {property_obj.distress_score}"
+
+    prefs = (
+        preferences
+        .filter(Q(email_alert=True) | Q(sms_alert=True))
+        .select_related("user")
+        .iterator(chunk_size=batch_size)
+    )
+
+    queued, pending = 0, []
+    for pref in prefs:
+        if pref.email_alert and pref.user.email:
+            pending.append(Notification(
+                user=pref.user,
+                property=property_obj,
+                notification_type="email",
+                recipient=pref.user.email,
+                subject=subject,
+                message=content,
+            ))
+        if pref.sms_alert and pref.phone_number:
+            pending.append(Notification(
+                user=pref.user,
+                property=property_obj,
+                notification_type="sms",
+                recipient=pref.phone_number,
+                subject=subject,
+                message=sms_content,
+            ))
+        if len(pending) >= batch_size:
+            Notification.objects.bulk_create(pending)
+            queued += len(pending)
+            pending = []
+
+    if pending:
+        Notification.objects.bulk_create(pending)
+        queued += len(pending)
+    return queued
+
+
+def retry_delay(attempts):
+    """Exponential backoff with jitter for the given attempt number."""
+    base = settings.NOTIFICATION_RETRY_BASE_SECONDS
+    return timedelta(seconds=base * 2 ** (attempts - 1) * random.uniform(0.8, 1.2))
+
+
+def claim_batch(batch_size):
+    """
+    Lease up to ``batch_size`` due notifications so concurrent workers
+    don't pick the same rows. A crashed worker's lease simply expires.
+
+    Rows without a recipient (created before the outbox, or POSTed to the
+    notifications API) have nowhere to go and are never claimed.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            Notification.objects
+            .select_for_update(skip_locked=True)
+            .filter(
+                sent=False,
+                next_attempt_at__lte=now,
+                attempts__lt=settings.NOTIFICATION_MAX_ATTEMPTS,
+            )
+            .exclude(recipient="")
+            .order_by("next_attempt_at", "id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        Notification.objects.filter(id__in=ids).update(
+            next_attempt_at=now + timedelta(seconds=settings.NOTIFICATION_LEASE_SECONDS)
+        )
+    return list(Notification.objects.filter(id__in=ids).order_by("id"))
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _send(job):
+    backend, chunk = job
+    try:
+        return chunk, backend.send_messages(chunk)
+    except Exception as e:
+        return chunk, [f"{type(e).__name__}: {e}"] * len(chunk)
+
+
+def deliver_pending(batch_size=500, workers=8, send_size=100):
+    """
+    Send one batch of due notifications. Returns ``(sent, failed)``.
+
+    Notifications are grouped per channel and handed to the backend
+    ``send_size`` at a time on a thread pool.
+    """
+    notifications = claim_batch(batch_size)
+    if not notifications:
+        return 0, 0
+
+    jobs = []
+    for channel in ("email", "sms"):
+        batch = [n for n in notifications if n.notification_type == channel]
+        if batch:
+            backend = get_backend(channel)
+            jobs.extend((backend, chunk) for chunk in _chunks(batch, send_size))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_send, jobs))
+
+    now = timezone.now()
+    sent_ids, failed = [], []
+    for chunk, errors in results:
+        for notification, error in zip(chunk, errors):
+            if error is None:
+                sent_ids.append(notification.id)
+                continue
+            notification.attempts += 1
+            notification.last_error = error
+            notification.next_attempt_at = now + retry_delay(notification.attempts)
+            failed.append(notification)
+
+    Notification.objects.filter(id__in=sent_ids).update(
+        sent=True, sent_at=now, attempts=F("attempts") + 1, last_error=""
+    )
+    Notification.objects.bulk_update(failed, ["attempts", "last_error", "next_attempt_at"])
+    return len(sent_ids), len(failed)
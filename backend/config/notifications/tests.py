@@ -1,3 +1,242 @@
-from django.test import TestCase
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import requests
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from listings.models import NotificationPreference, Property
+
+from . import transport
+from .backends import SendGridEmailBackend, TwilioSMSBackend
+from .models import Notification
+from .services import claim_batch, deliver_pending, enqueue_property_alert
+from .transport import RateLimiter, get_transport
+
+
+def response(status_code=202, text=""):
+    return mock.Mock(status_code=status_code, text=text)
+
+
+class TransportTests(SimpleTestCase):
+    def setUp(self):
+        transport._transports.clear()
+
+    def test_transports_are_shared_per_endpoint_and_options(self):
+        first = get_transport("https://api.example.com/", rate=5, pool_size=10)
+        self.assertIs(get_transport("https://api.example.com", rate=5, pool_size=10), first)
+        self.assertIsNot(get_transport("https://api.example.com", rate=50, pool_size=10), first)
+        self.assertEqual(get_transport("https://api.example.com", rate=50, pool_size=10).limiter.rate, 50)
+
+    def test_post_uses_the_pooled_session(self):
+        client = get_transport("https://api.example.com/", timeout=3)
+        with mock.patch.object(requests.Session, "post", return_value=response()) as post:
+            client.post("/v1/send", json={"a": 1})
+        post.assert_called_once_with("https://api.example.com/v1/send", json={"a": 1}, timeout=3)
+
+    def test_rate_limiter_waits_for_tokens(self):
+        limiter = RateLimiter(rate=100, burst=2)
+        started = time.monotonic()
+        for _ in range(4):
+            limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - started, 0.015)
+
+
+class BackendTests(SimpleTestCase):
+    def setUp(self):
+        transport._transports.clear()
+        patcher = mock.patch.object(requests.Session, "post", return_value=response())
+        self.post = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def notification(self, recipient, message="Alert", subject="Distress Property Alert", kind="email"):
+        return Notification(notification_type=kind, recipient=recipient, subject=subject, message=message)
+
+    def test_sendgrid_batches_identical_messages(self):
+        backend = SendGridEmailBackend(api_key="key")
+        notifications = [self.notification(f"u{i}@example.com") for i in range(3)]
+        notifications.append(self.notification("other@example.com", message="Other"))
+
+        self.assertEqual(backend.send_messages(notifications), [None] * 4)
+        self.assertEqual(self.post.call_count, 2)
+        url, kwargs = self.post.call_args_list[0].args[0], self.post.call_args_list[0].kwargs
+        self.assertEqual(url, "https://api.sendgrid.com/v3/mail/send")
+        self.assertEqual(kwargs["headers"], {"Authorization": "Bearer key"})
+        self.assertEqual(
+            [p["to"][0]["email"] for p in kwargs["json"]["personalizations"]],
+            ["u0@example.com", "u1@example.com", "u2@example.com"],
+        )
+
+    def test_sendgrid_reports_errors_per_request(self):
+        backend = SendGridEmailBackend(api_key="key")
+        self.post.side_effect = [response(500, "boom"), requests.ConnectionError("refused")]
+        results = backend.send_messages([
+            self.notification("a@example.com"), self.notification("b@example.com"),
+            self.notification("c@example.com", message="Other"),
+        ])
+        self.assertEqual(results[0], results[1])
+        self.assertIn("HTTP 500 boom", results[0])
+        self.assertIn("refused", results[2])
+
+    def test_sendgrid_needs_an_api_key(self):
+        with mock.patch.dict("os.environ", {"SENDGRID_API_KEY": ""}):
+            backend = SendGridEmailBackend()
+        self.assertEqual(backend.send_messages([self.notification("a@example.com")]), ["SENDGRID_API_KEY is not set"])
+        self.post.assert_not_called()
+
+    def test_twilio_sends_one_request_per_message(self):
+        backend = TwilioSMSBackend(account_sid="AC1", auth_token="token", from_number="+100")
+        self.post.side_effect = [response(201), response(400, "invalid number")]
+        results = backend.send_messages([
+            self.notification("+254700000001", kind="sms"), self.notification("bad", kind="sms"),
+        ])
+
+        self.assertIsNone(results[0])
+        self.assertIn("HTTP 400 invalid number", results[1])
+        first = self.post.call_args_list[0]
+        self.assertEqual(first.args[0], "https://api.twilio.com/2010-04-01/Accounts/AC1/Messages.json")
+        self.assertEqual(first.kwargs["auth"], ("AC1", "token"))
+        self.assertEqual(first.kwargs["data"], {"Body": "Alert", "From": "+100", "To": "+254700000001"})
+
+
+class RecordingBackend:
+    """Records what it sends; recipients in ``failing`` get an error."""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.sent = []
+
+    def send_messages(self, notifications):
+        results = []
+        for notification in notifications:
+            if notification.recipient in self.failing:
+                results.append("HTTP 503 unavailable")
+            else:
+                self.sent.append(notification.recipient)
+                results.append(None)
+        return results
+
+
+@override_settings(NOTIFICATION_MAX_ATTEMPTS=3, NOTIFICATION_RETRY_BASE_SECONDS=30, NOTIFICATION_LEASE_SECONDS=300)
+class OutboxTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.property = Property.objects.create(
+            title="Bank auction", description="must sell", location="Nairobi", price=1_000_000,
+        )
+        for i in range(3):
+            user = get_user_model().objects.create_user(f"u{i}", f"u{i}@example.com", "pw")
+            NotificationPreference.objects.create(user=user, sms_alert=True, phone_number=f"+25470000000{i}")
+        quiet = get_user_model().objects.create_user("quiet", "quiet@example.com", "pw")
+        NotificationPreference.objects.create(user=quiet, email_alert=False)
+        no_address = get_user_model().objects.create_user("nomail", "", "pw")
+        NotificationPreference.objects.create(user=no_address, sms_alert=True)
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.backend = RecordingBackend()
+        patcher = mock.patch("notifications.services.get_backend", return_value=self.backend)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # No jitter, so the backoff is exact
+        patcher = mock.patch("notifications.services.random.uniform", return_value=1.0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def at(self, seconds):
+        return mock.patch("notifications.services.timezone.now", return_value=self.now + timedelta(seconds=seconds))
+
+    def enqueue(self):
+        queued = enqueue_property_alert(self.property, batch_size=4)
+        Notification.objects.update(next_attempt_at=self.now)
+        return queued
+
+    def deliver(self, seconds=0):
+        with self.at(seconds):
+            return deliver_pending(batch_size=10, workers=2, send_size=2)
+
+    def test_enqueue_skips_missing_addresses(self):
+        self.assertEqual(self.enqueue(), 6)
+        self.assertEqual(
+            sorted(Notification.objects.values_list("notification_type", "recipient")),
+            [("email", f"u{i}@example.com") for i in range(3)] + [("sms", f"+25470000000{i}") for i in range(3)],
+        )
+
+    def test_long_titles_fit_the_subject(self):
+        self.property.title = "x" * 255
+        self.assertEqual(enqueue_property_alert(self.property), 6)
+        subjects = set(Notification.objects.values_list("subject", flat=True))
+        self.assertEqual(len(subjects), 1)
+        [subject] = subjects
+        self.assertEqual(len(subject), Notification._meta.get_field("subject").max_length)
+        self.assertTrue(subject.startswith("Distress Property Alert: xxx"))
+        self.assertTrue(subject.endswith("…"))
+
+    def test_leased_rows_are_claimed_once(self):
+        self.enqueue()
+        with self.at(0):
+            first = claim_batch(2)
+            second = claim_batch(10)
+            self.assertEqual(claim_batch(10), [])
+        self.assertEqual(len(first) + len(second), 6)
+        self.assertFalse({n.pk for n in first} & {n.pk for n in second})
+        self.assertEqual({n.next_attempt_at for n in first}, {self.now + timedelta(seconds=300)})
+
+        # Both workers stalled: nothing is due until their leases expire
+        self.assertEqual(self.deliver(299), (0, 0))
+        self.assertEqual(self.deliver(301), (6, 0))
+        self.assertEqual(self.deliver(10_000), (0, 0))
+        self.assertEqual(sorted(self.backend.sent), sorted(Notification.objects.values_list("recipient", flat=True)))
+
+    def test_two_workers_send_each_notification_once(self):
+        self.enqueue()
+        with self.at(0):
+            stalled = claim_batch(3)
+        # The second worker drains what the first did not claim
+        self.assertEqual(self.deliver(1), (3, 0))
+        self.assertEqual(self.deliver(2), (0, 0))
+        self.assertEqual(self.deliver(301), (3, 0))
+
+        self.assertEqual(len(self.backend.sent), 6)
+        self.assertEqual(len(set(self.backend.sent)), 6)
+        self.assertTrue(set(n.recipient for n in stalled) <= set(self.backend.sent))
+        self.assertEqual(set(Notification.objects.values_list("sent", "attempts")), {(True, 1)})
+
+    def test_rows_without_a_recipient_are_not_claimed(self):
+        user = get_user_model().objects.get(username="u0")
+        Notification.objects.create(user=user, notification_type="email", message="legacy", next_attempt_at=self.now)
+        self.assertEqual(self.deliver(0), (0, 0))
+
+        self.enqueue()
+        self.assertEqual(self.deliver(0), (6, 0))
+        self.assertEqual(self.deliver(10_000), (0, 0))
+        self.assertNotIn("", self.backend.sent)
+        self.assertEqual(Notification.objects.get(recipient="").attempts, 0)
+
+    def test_backoff_then_give_up(self):
+        self.enqueue()
+        self.backend.failing = {"u0@example.com"}
+        self.assertEqual(self.deliver(0), (5, 1))
+
+        failed = Notification.objects.get(recipient="u0@example.com")
+        self.assertEqual((failed.attempts, failed.last_error, failed.sent), (1, "HTTP 503 unavailable", False))
+        self.assertEqual(failed.next_attempt_at, self.now + timedelta(seconds=30))
+
+        # Backoff doubles: retries are due 30s, then 60s after each failure
+        self.assertEqual(self.deliver(29), (0, 0))
+        self.assertEqual(self.deliver(31), (0, 1))
+        self.assertEqual(self.deliver(31 + 59), (0, 0))
+        self.assertEqual(self.deliver(31 + 61), (0, 1))
+
+        # NOTIFICATION_MAX_ATTEMPTS reached: never claimed again
+        self.assertEqual(self.deliver(100_000), (0, 0))
+        failed.refresh_from_db()
+        self.assertEqual((failed.attempts, failed.sent), (3, False))
+
+    def test_backend_errors_fail_the_chunk(self):
+        self.enqueue()
+        self.backend.send_messages = mock.Mock(side_effect=requests.ConnectionError("refused"))
+        self.assertEqual(self.deliver(0), (0, 6))
+        self.assertEqual(set(Notification.objects.values_list("attempts", "last_error")), {(1, "ConnectionError: refused")})
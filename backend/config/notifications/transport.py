@@ -0,0 +1,71 @@
+"""
+HTTP transport shared by the provider backends.
+
+One long-lived ``requests.Session`` (keep-alive connection pool) and one
+rate limiter per provider endpoint, reused by every backend instance in
+the process, so messages don't pay a fresh TCP/TLS handshake each.
+"""
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class RateLimiter:
+    """Thread-safe token bucket: ``rate`` tokens per second, up to ``burst``."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        tokens = min(tokens, self.capacity)
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class Transport:
+    def __init__(self, base_url, pool_size=20, rate=None, burst=None, timeout=10):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.limiter = RateLimiter(rate, burst) if rate else None
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def post(self, path, cost=1, **kwargs):
+        if self.limiter:
+            self.limiter.acquire(cost)
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.post(f"{self.base_url}{path}", **kwargs)
+
+
+_transports = {}
+_lock = threading.Lock()
+
+
+def get_transport(base_url, **options):
+    """
+    Return the process-wide transport for ``base_url`` and ``options``,
+    creating it once. Callers passing other options (``rate``,
+    ``pool_size``, ...) get a transport of their own.
+    """
+    key = (base_url.rstrip("/"), tuple(sorted(options.items())))
+    with _lock:
+        if key not in _transports:
+            _transports[key] = Transport(base_url, **options)
+        return _transports[key]